@@ -31,6 +31,8 @@ Two-pass approach to minimise Python overhead:
 Pass 1  – cheap Python loop over cycles to locate cycle boundaries.
           Uses a pre-built per-byte-position lookup table so each cycle
           costs only n_state_bytes Python ops (not n_sensors).
+          Skipped altogether when the cycle positions are handed over
+          from a cycle index (see ``get_cycle_index()``).
 
 Pass 2  – batch numpy operations over ALL cycles at once:
           • extract state bytes for every cycle in one fancy-index read
@@ -42,7 +44,8 @@ inside a Python loop, which dominated runtime for files with many cycles.
 """
 
 import struct
-from typing import Any
+import threading
+from typing import Any, Callable
 
 import numpy as np
 
@@ -56,17 +59,56 @@ _FMT_CHAR = {2: "h", 4: "f", 8: "d"}  # byte-size → struct char
 # Shift amounts to extract 4 × 2-bit fields from one byte (MSB first)
 _SHIFTS = np.array([6, 4, 2, 0], dtype=np.int32)
 
+# Number of sensor states decoded at a time
+_BATCH_ELEMENTS = 1 << 20
+
+# The byte that ends each cycle
+_SEPARATOR = ord("d")
+
+# Number of cycles after which a serial walk, which looks for the first
+# values of a sensor, gives way to the vectorised walk of all cycles
+_SERIAL_WALK_LIMIT = 10000
+
+
+# Buffer per thread into which compressed files are decompressed, so that
+# it is allocated once and reused for every file read
+_buffers = threading.local()
+
+# Size in bytes above which the buffer of a thread is released once the
+# file read into it is no longer used, rather than kept for the next file
+_MAX_KEPT_BUFFER_SIZE = 64 << 20
+
 
 # ── helpers ──────────────────────────────────────────────────────────────────
 
 
-def _read_file(filename: str) -> bytes:
+def _decompression_buffer() -> bytearray:
+    """Return the decompression buffer of the calling thread."""
+    buffer: bytearray | None = getattr(_buffers, "buffer", None)
+    if buffer is None:
+        buffer = _buffers.buffer = bytearray()
+    return buffer
+
+
+def _read_file(filename: str) -> bytes | memoryview:
     """Return raw decompressed bytes for *filename* (handles .?cd/.?cg files)."""
     from dbdreader.decompress import is_compressed, Decompressor
 
     if is_compressed(filename):
         with Decompressor(filename) as d:
-            return d.decompress()
+            try:
+                data = d.decompress_into(_decompression_buffer())
+            except BufferError:
+                # the buffer is still in use (a view of it is alive),
+                # and cannot be grown; use a new one.
+                _buffers.buffer = bytearray()
+                assert d.fp is not None
+                d.fp.seek(0)
+                data = d.decompress_into(_buffers.buffer)
+        if len(_buffers.buffer) > _MAX_KEPT_BUFFER_SIZE:
+            # data keeps the buffer alive for as long as it is used.
+            _buffers.buffer = None
+        return data
     with open(filename, "rb") as fh:
         return fh.read()
 
@@ -95,7 +137,7 @@ def _insert_ti(vi_list: list[int], ti: int) -> tuple[list[int], int]:
 
 def _build_chunk_lut(
     n_state_bytes: int, n_sensors: int, bs_list: list[int]
-) -> list[list[int]]:
+) -> np.ndarray[Any, Any]:
     """
     Build a lookup table: lut[byte_pos][byte_value] = total data bytes
     contributed to the chunk by the four sensors encoded in that state byte.
@@ -103,16 +145,321 @@ def _build_chunk_lut(
     Used in Pass 1 to compute chunksize per cycle in O(n_state_bytes) ops.
     """
     byte_vals = np.arange(256, dtype=np.int32)
-    lut = np.zeros((n_state_bytes, 256), dtype=np.int32)
-    for bpos in range(n_state_bytes):
-        for slot in range(4):
-            sidx = bpos * 4 + slot
-            if sidx >= n_sensors:
-                break
-            shift = 6 - slot * 2  # 6, 4, 2, 0
-            states = (byte_vals >> shift) & 3  # (256,)
-            lut[bpos] += (states == UPDATED) * bs_list[sidx]
-    return lut.tolist()  # nested Python list for fast indexing
+    # updated[v, slot]: the sensor in slot of a state byte with value v is UPDATED
+    updated = ((byte_vals[:, np.newaxis] >> _SHIFTS) & 3) == UPDATED  # (256, 4)
+    bs = np.zeros(n_state_bytes * 4, dtype=np.int32)
+    bs[:n_sensors] = bs_list[:n_sensors]
+    lut: np.ndarray[Any, Any] = bs.reshape(n_state_bytes, 4) @ updated.T.astype(
+        np.int32
+    )  # (n_state_bytes, 256)
+    return lut
+
+
+def _walk_cycles_serially(
+    data: bytes | memoryview,
+    n_state_bytes: int,
+    pos: int,
+    chunk_lut: list[list[int]],
+    stop: Callable[[bytes], bool] | None = None,
+    max_cycles: int | None = None,
+) -> list[int]:
+    """
+    Return the file position of the state bytes of every cycle from
+    *pos* on, following the chain of cycles one by one. If *stop* is
+    given, it is called with the state bytes of each cycle, and the walk
+    ends after the first cycle for which it returns True. If
+    *max_cycles* is given, the walk ends after that many cycles.
+
+    Glider cycles repeat the same few state byte patterns, so the chunk
+    size of each pattern is memoised. Cost: about one dict lookup per
+    cycle.
+    """
+    chunksizes: dict[bytes, int] = {}
+    file_size = len(data)
+    state_positions = []
+    while pos + n_state_bytes <= file_size:
+        state_bytes = bytes(data[pos : pos + n_state_bytes])
+        chunksize = chunksizes.get(state_bytes, -1)
+        if chunksize < 0:
+            # Chunksize via LUT: chunk_lut[bpos][state_bytes[bpos]] summed
+            # over the state bytes
+            chunksize = sum(map(list.__getitem__, chunk_lut, state_bytes))
+            chunksizes[state_bytes] = chunksize
+        if pos + n_state_bytes + chunksize > file_size:
+            break
+        state_positions.append(pos)
+        if stop is not None and stop(state_bytes):
+            break
+        if len(state_positions) == max_cycles:
+            break
+        pos += n_state_bytes + chunksize + 1
+    return state_positions
+
+
+def _first_cycle_to_decode(
+    data: bytes | memoryview,
+    sp_arr: np.ndarray[Any, Any],
+    k0: int,
+    n_state_bytes: int,
+    n_sensors: int,
+    bs_arr: np.ndarray[Any, Any],
+    vit_arr: np.ndarray[Any, Any],
+) -> int:
+    """
+    Return the cycle from which on each of the sensors *vit_arr* is
+    UPDATED before cycle *k0* (or 0), so that decoding from there gives
+    the values carried forward into cycle *k0*. The cycles before *k0*
+    are searched backwards in growing steps.
+    """
+    data_u8 = np.frombuffer(data, dtype=np.uint8)
+    step = 64
+    while True:
+        k = max(k0 - step, 0)
+        if k == 0:
+            return 0
+        offsets = _chunk_offsets(
+            data_u8, sp_arr[k:k0], n_state_bytes, n_sensors, bs_arr, vit_arr
+        )
+        if np.all((offsets >= 0).any(axis=0)):
+            return k
+        step *= 4
+
+
+def _valid_cycle_index(
+    data: bytes | memoryview, cycle_offsets: Any, n_state_bytes: int, bin_offset: int
+) -> bool:
+    """
+    Return whether the cycle positions of a cycle index fit *data*: they
+    should increase, lie in the binary data, and each follow the
+    separator that ends the cycle before.
+    """
+    offsets = np.asarray(cycle_offsets, dtype=np.float64)
+    if offsets.size == 0:
+        return True
+    if not (
+        np.all(offsets == np.floor(offsets))
+        and offsets[0] >= bin_offset + 17
+        and offsets[-1] <= len(data) - n_state_bytes
+        and np.all(np.diff(offsets) > 0)
+    ):
+        return False
+    data_u8 = np.frombuffer(data, dtype=np.uint8)
+    return bool(np.all(data_u8[offsets.astype(np.intp) - 1] == _SEPARATOR))
+
+
+def _sensors_set_in(sensors: list[int], n_cycles: int) -> Callable[[bytes], bool]:
+    """
+    Return a function for _walk_cycles_serially() that stops the walk
+    once each of *sensors* has been UPDATED or SAME in *n_cycles* cycles.
+    """
+    counts = [0] * len(sensors)
+    set_in: dict[bytes, list[bool]] = {}  # memoised per state byte pattern
+
+    def stop(state_bytes: bytes) -> bool:
+        is_set = set_in.get(state_bytes)
+        if is_set is None:
+            is_set = [
+                (state_bytes[s // 4] >> (6 - 2 * (s % 4))) & 3 != NOTSET
+                for s in sensors
+            ]
+            set_in[state_bytes] = is_set
+        for k, b in enumerate(is_set):
+            counts[k] += b
+        return min(counts) >= n_cycles
+
+    return stop
+
+
+def _walk_cycles(
+    data: bytes | memoryview,
+    n_state_bytes: int,
+    n_sensors: int,
+    bin_offset: int,
+    bs_list: list[int],
+) -> np.ndarray[Any, Any]:
+    """
+    PASS 1: return the file position of the state bytes of every cycle.
+
+    For each cycle record (state_bytes + data_chunk + separator) the
+    data-chunk size is computed using the lookup table to find the start
+    of the next cycle. A truncated cycle at the end of the file is
+    dropped.
+
+    Rather than following the chain of cycles one by one, every
+    position that follows a separator byte is taken as a candidate
+    cycle start. The start of the cycle after each candidate is computed
+    for all candidates at once, and the chain of cycles from the first
+    cycle is then found by pointer jumping, in O(log n_cycles)
+    vectorised steps. Should the chain leave the candidates (a corrupt
+    separator), it is followed serially from there on.
+    """
+    chunk_lut = _build_chunk_lut(n_state_bytes, n_sensors, bs_list)
+    data_u8 = np.frombuffer(data, dtype=np.uint8)
+    file_size = len(data)
+    start = bin_offset + 17  # skip known cycle
+    cand = np.flatnonzero(data_u8[start:] == _SEPARATOR) + (start + 1)
+    cand = np.concatenate((np.array([start], dtype=np.intp), cand.astype(np.intp)))
+    cand = cand[cand + n_state_bytes <= file_size]
+    n = cand.shape[0]
+    if n == 0:
+        return np.empty(0, dtype=np.intp)
+
+    # Chunk size of each candidate, in batches of bounded size
+    chunksize = np.empty(n, dtype=np.intp)
+    bpos = np.arange(n_state_bytes, dtype=np.intp)
+    batch_size = max(1, _BATCH_ELEMENTS // max(n_state_bytes, 1))
+    for i in range(0, n, batch_size):
+        sb = data_u8[cand[i : i + batch_size, np.newaxis] + bpos]
+        chunksize[i : i + batch_size] = chunk_lut[bpos, sb].sum(axis=1)
+
+    # The candidate that follows each candidate; n if the chain ends.
+    complete = cand + n_state_bytes + chunksize <= file_size
+    next_pos = cand + n_state_bytes + chunksize + 1
+    j = np.searchsorted(cand, next_pos)
+    is_cand = j < n
+    is_cand[is_cand] = cand[j[is_cand]] == next_pos[is_cand]
+    next_cand = np.append(np.where(complete & is_cand, j, n), n)
+
+    # Pointer jumping: jumps[k] maps a candidate onto the one 2**k cycles
+    # further on, and steps counts the cycles to the end of the chain.
+    steps = (next_cand != n).astype(np.intp)
+    jumps = [next_cand]
+    while True:
+        jump = jumps[-1]
+        if np.all(jump[jump] == n):
+            steps += steps[jump]
+            break
+        steps += steps[jump]
+        jumps.append(jump[jump])
+    # A candidate is on the chain from the first cycle if it is found
+    # steps[0] - steps[i] cycles after the first.
+    distance = steps[0] - steps[:n]
+    reached = np.zeros(n, dtype=np.intp)
+    for k, jump in enumerate(jumps):
+        bit = (distance >> k) & 1 == 1
+        reached[bit] = jump[reached[bit]]
+    on_chain = (distance >= 0) & (reached == np.arange(n)) & complete
+    state_positions = cand[on_chain]
+
+    last = np.flatnonzero(on_chain)[-1] if state_positions.shape[0] else -1
+    if last >= 0 and not is_cand[last]:
+        # the chain leaves the candidates (or the end of the file is reached)
+        rest = _walk_cycles_serially(
+            data, n_state_bytes, int(next_pos[last]), chunk_lut.tolist()
+        )
+        state_positions = np.concatenate(
+            (state_positions, np.array(rest, dtype=np.intp))
+        )
+    return np.asarray(state_positions, dtype=np.intp)
+
+
+def _chunk_offsets(
+    data_u8: np.ndarray[Any, Any],
+    sp_arr: np.ndarray[Any, Any],
+    n_state_bytes: int,
+    n_sensors: int,
+    bs_arr: np.ndarray[Any, Any],
+    vit_arr: np.ndarray[Any, Any],
+) -> np.ndarray[Any, Any]:
+    """
+    Return the byte offsets within the data chunk of the sensors *vit_arr*
+    for every cycle, shape (n_cycles, len(vit_arr)).
+
+    UPDATED → offset; SAME → -1; NOTSET → -2.
+
+    The offset of a sensor depends on the sensors before it only, so
+    only the state of the sensors up to the last wanted one is decoded.
+    The cycles are decoded in batches of at most _BATCH_ELEMENTS sensor
+    states, which bounds the memory used, however wide the file is.
+    """
+    n_cycles = sp_arr.shape[0]
+    n_used = min(int(vit_arr.max()) + 1, n_sensors)  # sensors to decode
+    n_used_state_bytes = (n_used + 3) // 4
+    bs_used = bs_arr[np.newaxis, :n_used]
+    batch_size = max(1, _BATCH_ELEMENTS // n_used)
+    offsets = np.empty((n_cycles, vit_arr.shape[0]), dtype=np.int32)
+    for start in range(0, n_cycles, batch_size):
+        sp_batch = sp_arr[start : start + batch_size]
+        # Extract state bytes of the batch: shape (n_batch, n_used_state_bytes)
+        sb_idx = sp_batch[:, np.newaxis] + np.arange(n_used_state_bytes, dtype=np.intp)
+        all_sb = data_u8[sb_idx]  # uint8, (n_batch, n_used_state_bytes)
+
+        # Glider cycles repeat the same few state byte patterns: decode each
+        # distinct pattern once, and map the cycles onto their pattern.
+        # (Comparing the rows as single void values is much faster than
+        # np.unique(axis=0).)
+        rows = all_sb.view(np.dtype((np.void, n_used_state_bytes))).reshape(-1)
+        unique_rows, layout = np.unique(rows, return_inverse=True)
+        patterns = unique_rows.view(np.uint8).reshape(-1, n_used_state_bytes)
+        n_patterns = patterns.shape[0]
+
+        # Decode 2-bit fields: (n_patterns, n_used_state_bytes, 4) → (n_patterns, n_used)
+        all_fields = (
+            patterns[:, :, np.newaxis] >> _SHIFTS
+        ) & 3  # int, (n_patterns, n_used_state_bytes, 4)
+        all_fields = all_fields.reshape(n_patterns, n_used_state_bytes * 4)[:, :n_used]
+
+        # Compute byte offsets within the data chunk for every sensor in every pattern.
+        upd_mask = all_fields == UPDATED  # bool, (n_patterns, n_used)
+        w_bs = np.where(upd_mask, bs_used, 0)  # int32, (n_patterns, n_used)
+        cum_bs = np.cumsum(w_bs, axis=1)  # int32, (n_patterns, n_used)
+        # (n_patterns, n_used)
+        all_off = np.where(upd_mask, cum_bs - w_bs, np.int32(-1))
+        all_off = np.where(all_fields == NOTSET, np.int32(-2), all_off)
+
+        # Offsets for only the wanted sensors: (n_batch, nvt)
+        offsets[start : start + batch_size] = all_off[:, vit_arr][layout.reshape(-1)]
+    return offsets
+
+
+def _read_column(
+    data_u8: np.ndarray[Any, Any],
+    cstart: np.ndarray[Any, Any],
+    offsets: np.ndarray[Any, Any],
+    bs: int,
+    endian: str,
+    return_nans: int,
+) -> np.ndarray[Any, Any]:
+    """
+    Return float64 array (n_cycles,) for a sensor of byte size *bs*, given
+    its chunk *offsets* in each cycle.
+
+    UPDATED cycles → actual data value.
+    SAME cycles    → carry-forward of last UPDATED value (numpy ffill).
+    NOTSET cycles  → NaN (or FILLVALUE if return_nans).
+    """
+    n_cycles = offsets.shape[0]
+    vals = np.full(n_cycles, np.nan, dtype=np.float64)
+
+    upd = np.where(offsets >= 0)[0]  # indices of UPDATED cycles
+    if upd.size:
+        abs_pos = cstart[upd] + offsets[upd].astype(np.intp)
+
+        if bs == 1:
+            raw = data_u8[abs_pos].view(np.int8).astype(np.float64)
+            vals[upd] = raw
+        else:
+            # Gather bs consecutive bytes for each updated cycle,
+            # reinterpret as the sensor's native type.
+            bidx = abs_pos[:, np.newaxis] + np.arange(bs, dtype=np.intp)
+            raw = data_u8[bidx].tobytes()  # flat byte buffer
+            dt = np.dtype(endian + _FMT_CHAR[bs])
+            vals[upd] = np.frombuffer(raw, dtype=dt)
+
+    # Forward-fill: propagate each UPDATED value into subsequent SAME slots.
+    # Classic numpy trick: build an index array that "sticks" at the last
+    # non-NaN position, then use it to index vals.
+    has_val = ~np.isnan(vals)
+    ff_idx = np.where(has_val, np.arange(n_cycles, dtype=np.intp), np.intp(0))
+    np.maximum.accumulate(ff_idx, out=ff_idx)
+    vals = vals[ff_idx]
+
+    # NOTSET cycles: mark as FILLVALUE (if return_nans) or leave as
+    # carried-forward value (which will be excluded by the caller).
+    if return_nans:
+        vals[offsets == np.int32(-2)] = FILLVALUE
+
+    return vals
 
 
 # ── public API ───────────────────────────────────────────────────────────────
@@ -129,6 +476,10 @@ def get(
     return_nans: int,
     skip_initial_line: int,
     max_values_to_read: int,
+    cycle_offsets: Any = None,
+    cycle_times: Any = None,
+    t_min: float = -np.inf,
+    t_max: float = np.inf,
 ) -> tuple[int, list[Any]]:
     """
     Read one or more sensor time-series from a glider binary data file.
@@ -145,13 +496,27 @@ def get(
     return_nans        : int   – 1 → include NOTSET slots as FILLVALUE rows
     skip_initial_line  : int   – 1 → discard first data cycle
     max_values_to_read : int   – stop after this many rows (0 = unlimited)
+    cycle_offsets      : array – optional; positions of the cycles as
+                                 returned by get_cycle_index(), which
+                                 makes Pass 1 unnecessary
+    cycle_times        : array – optional; time stamps of the cycles as
+                                 returned by get_cycle_index()
+    t_min, t_max       : float – only cycles with a time stamp within
+                                 [t_min, t_max] are returned. With
+                                 cycle_times, only the cycles of the
+                                 window (and those before it that
+                                 carry values into it) are decoded;
+                                 without, all cycles are decoded and
+                                 then filtered by time
 
     Returns
     -------
     (error_no, result) where error_no is 0 on success and result is a
-    list of 2*nv lists:
+    list of 2*nv arrays:
         [t_0, t_1, …, t_{nv-1}, v_0, v_1, …, v_{nv-1}]
-    where each t_i / v_i is a Python list of floats.
+    where each t_i / v_i is a contiguous float64 ndarray (the C extension
+    returns Float64Buffer objects instead, which numpy.asarray() wraps
+    without copying).
     """
 
     try:
@@ -172,116 +537,93 @@ def get(
     bs_arr = np.array(bs_list, dtype=np.int32)  # (n_sensors,)
     vit_arr = np.array(vit, dtype=np.intp)  # (nvt,)
 
-    # ── chunk-size lookup table (for pass 1) ─────────────────────────────────
-    chunk_lut = _build_chunk_lut(n_state_bytes, n_sensors, bs_list)
-
-    # ── PASS 1: locate cycle boundaries ──────────────────────────────────────
-    # For each cycle record (state_bytes + data_chunk + separator):
-    #   * record the file position of the state bytes
-    #   * compute the data-chunk size using the lookup table
-    # Cost: O(n_cycles × n_state_bytes) pure-Python ops — cheap.
-
     min_offset_value = -2 if return_nans else -1
-    file_size = len(data)
-    pos = bin_offset + 17  # skip known cycle
-    write_data = not bool(skip_initial_line)
-
-    state_positions = []  # file pos of state bytes for each cycle
-    chunk_sizes = []  # data-chunk byte count for each cycle
-    write_flags = []  # whether to emit output for each cycle
-
-    while pos < file_size:
-        if pos + n_state_bytes > file_size:
-            break
-
-        # Chunksize via LUT: O(n_state_bytes) lookups
-        chunksize = 0
-        for bpos in range(n_state_bytes):
-            chunksize += chunk_lut[bpos][data[pos + bpos]]
-
-        state_positions.append(pos)
-        chunk_sizes.append(chunksize)
-        write_flags.append(write_data)
-
-        pos += n_state_bytes + chunksize + 1
-        write_data = True
 
-    n_cycles = len(state_positions)
+    # ── PASS 1: locate cycle boundaries ──────────────────────────────────────
+    sp_arr: np.ndarray[Any, Any] | None = None
+    first_in_window = 0  # cycles decoded before the time window
+    if cycle_offsets is not None and not _valid_cycle_index(
+        data, cycle_offsets, n_state_bytes, bin_offset
+    ):
+        # a stale or corrupt index: find the cycles instead
+        cycle_offsets = cycle_times = None
+    if cycle_offsets is not None:
+        sp_arr = np.asarray(cycle_offsets).astype(np.intp)
+        if cycle_times is not None:
+            # the index tells us where the time window ends.
+            past = np.asarray(cycle_times) > t_max
+            if past.any():
+                sp_arr = sp_arr[: np.argmax(past)]
+        sp_arr = sp_arr[sp_arr + n_state_bytes <= len(data)]
+        if cycle_times is not None and t_min > -np.inf:
+            # Jump to the time window, as the C extension does. Values
+            # that are not updated there are carried forward from before
+            # the window, so the cycles back to the last update of each
+            # sensor are decoded too.
+            in_window = np.asarray(cycle_times)[: sp_arr.shape[0]] >= t_min
+            if in_window.any():
+                k0 = int(np.argmax(in_window))
+                k = _first_cycle_to_decode(
+                    data, sp_arr, k0, n_state_bytes, n_sensors, bs_arr, vit_arr
+                )
+                sp_arr = sp_arr[k:]
+                first_in_window = k0 - k
+            else:
+                sp_arr = sp_arr[:0]
+    elif 0 < max_values_to_read < _SERIAL_WALK_LIMIT and t_min == -np.inf:
+        # The values come from the first cycles in which the sensors are
+        # set (one more for an initial line that may be skipped), so
+        # there is no need to find the cycles after those. A sensor may
+        # be set rarely, or never, so the walk is given up after
+        # _SERIAL_WALK_LIMIT cycles.
+        chunk_lut = _build_chunk_lut(n_state_bytes, n_sensors, bs_list).tolist()
+        state_positions = _walk_cycles_serially(
+            data,
+            n_state_bytes,
+            bin_offset + 17,
+            chunk_lut,
+            _sensors_set_in(list(vi), max_values_to_read + 1),
+            _SERIAL_WALK_LIMIT,
+        )
+        if len(state_positions) < _SERIAL_WALK_LIMIT:
+            sp_arr = np.array(state_positions, dtype=np.intp)
+    if sp_arr is None:
+        sp_arr = _walk_cycles(data, n_state_bytes, n_sensors, bin_offset, bs_list)
+
+    n_cycles = sp_arr.shape[0]
     if n_cycles == 0:
-        return 0, [[] for _ in range(nv)] + [[] for _ in range(nv)]
+        return 0, [np.empty(0) for _ in range(2 * nv)]
 
     # ── PASS 2: vectorised processing of all cycles at once ──────────────────
     data_u8 = np.frombuffer(data, dtype=np.uint8)
-    sp_arr = np.array(state_positions, dtype=np.intp)  # (n_cycles,)
     cstart = sp_arr + n_state_bytes  # chunk start positions
+    wanted_off = _chunk_offsets(
+        data_u8, sp_arr, n_state_bytes, n_sensors, bs_arr, vit_arr
+    )  # int32, (n_cycles, nvt)
 
-    # Extract state bytes for ALL cycles: shape (n_cycles, n_state_bytes)
-    sb_idx = sp_arr[:, np.newaxis] + np.arange(n_state_bytes, dtype=np.intp)
-    all_sb = data_u8[sb_idx]  # uint8, (n_cycles, n_state_bytes)
-
-    # Decode 2-bit fields: (n_cycles, n_state_bytes, 4) → (n_cycles, n_sensors)
-    all_fields = (
-        all_sb[:, :, np.newaxis] >> _SHIFTS
-    ) & 3  # int, (n_cycles, n_state_bytes, 4)
-    all_fields = all_fields.reshape(n_cycles, n_state_bytes * 4)[:, :n_sensors]
-
-    # Compute byte offsets within the data chunk for every sensor in every cycle.
-    # UPDATED → cumulative offset; SAME → -1; NOTSET → -2.
-    upd_mask = all_fields == UPDATED  # bool, (n_cycles, n_sensors)
-    w_bs = np.where(upd_mask, bs_arr[np.newaxis, :], 0)  # int32, (n_cycles, n_sensors)
-    cum_bs = np.cumsum(w_bs, axis=1)  # int32, (n_cycles, n_sensors)
-    all_off = np.where(upd_mask, cum_bs - w_bs, np.int32(-1))  # (n_cycles, n_sensors)
-    all_off = np.where(all_fields == NOTSET, np.int32(-2), all_off)
-
-    # Offsets for only the wanted sensors: (n_cycles, nvt)
-    wanted_off = all_off[:, vit_arr]  # int32, (n_cycles, nvt)
-
-    # ── helper: read all values for one column of wanted_off ─────────────────
     def _read_col(col: int) -> np.ndarray[Any, Any]:
-        """
-        Return float64 array (n_cycles,) for wanted sensor at column *col*.
-        UPDATED cycles → actual data value.
-        SAME cycles    → carry-forward of last UPDATED value (numpy ffill).
-        NOTSET cycles  → NaN (or FILLVALUE if return_nans).
-        """
-        sidx = vit[col]
-        bs = bs_list[sidx]
-        offsets = wanted_off[:, col]  # int32, (n_cycles,)
-        vals = np.full(n_cycles, np.nan, dtype=np.float64)
-
-        upd = np.where(offsets >= 0)[0]  # indices of UPDATED cycles
-        if upd.size:
-            abs_pos = cstart[upd] + offsets[upd].astype(np.intp)
-
-            if bs == 1:
-                raw = data_u8[abs_pos].view(np.int8).astype(np.float64)
-                vals[upd] = raw
-            else:
-                # Gather bs consecutive bytes for each updated cycle,
-                # reinterpret as the sensor's native type.
-                bidx = abs_pos[:, np.newaxis] + np.arange(bs, dtype=np.intp)
-                raw = data_u8[bidx].tobytes()  # flat byte buffer
-                dt = np.dtype(endian + _FMT_CHAR[bs])
-                vals[upd] = np.frombuffer(raw, dtype=dt)
-
-        # Forward-fill: propagate each UPDATED value into subsequent SAME slots.
-        # Classic numpy trick: build an index array that "sticks" at the last
-        # non-NaN position, then use it to index vals.
-        has_val = ~np.isnan(vals)
-        ff_idx = np.where(has_val, np.arange(n_cycles, dtype=np.intp), np.intp(0))
-        np.maximum.accumulate(ff_idx, out=ff_idx)
-        vals = vals[ff_idx]
-
-        # NOTSET cycles: mark as FILLVALUE (if return_nans) or leave as
-        # carried-forward value (which will be excluded by the mask below).
-        if return_nans:
-            vals[offsets == np.int32(-2)] = FILLVALUE
-
-        return vals
+        return _read_column(
+            data_u8, cstart, wanted_off[:, col], bs_list[vit[col]], endian, return_nans
+        )
+
+    # the first cycle is not written if skip_initial_line is set.
+    write_arr = np.ones(n_cycles, dtype=bool)
+    write_arr[0] = not bool(skip_initial_line)
+    # cycles before the time window only carry values forward into it.
+    write_arr[:first_in_window] = False
 
     # ── read time and sensor values ───────────────────────────────────────────
     t_vals = _read_col(nti)  # (n_cycles,) float64
-    write_arr = np.array(write_flags, dtype=bool)
+
+    # ── time window ──────────────────────────────────────────────────────────
+    # The time stamp of a cycle in which the time is not set is FILLVALUE,
+    # as in the C extension.
+    t_window = np.where(wanted_off[:, nti] == -2, FILLVALUE, t_vals)
+    past = t_window > t_max
+    if past.any():
+        write_arr[np.argmax(past) :] = False
+    if t_min > -np.inf or t_max < np.inf:
+        write_arr &= t_window >= t_min
 
     result_t: list[Any] = [None] * nv
     result_v: list[Any] = [None] * nv
@@ -295,7 +637,7 @@ def get(
         v_off = wanted_off[:, col]
 
         # Include this cycle in output if:
-        #   • write_flags says so (skip_initial_line handling)
+        #   • write_arr says so (skip_initial_line handling)
         #   • sensor has a valid offset (UPDATED or SAME; also NOTSET if return_nans)
         include = v_off >= min_offset_value
         mask = write_arr & include
@@ -306,7 +648,297 @@ def get(
                 mask = np.zeros(n_cycles, dtype=bool)
                 mask[keep[:max_values_to_read]] = True
 
-        result_t[j] = t_vals[mask].tolist()
-        result_v[j] = v_vals[mask].tolist()
+        result_t[j] = t_vals[mask]
+        result_v[j] = v_vals[mask]
 
     return 0, [result_t[j] for j in range(nv)] + [result_v[j] for j in range(nv)]
+
+
+def get_count(
+    n_state_bytes: int,
+    n_sensors: int,
+    bin_offset: int,
+    byte_sizes: tuple[int, ...],
+    filename: str,
+    ti: int,
+    vi: tuple[int, ...],
+    return_nans: int,
+    skip_initial_line: int,
+    max_values_to_read: int,
+    cycle_offsets: Any = None,
+    cycle_times: Any = None,
+    t_min: float = -np.inf,
+    t_max: float = np.inf,
+) -> tuple[int, tuple[int, ...] | None]:
+    """
+    Count the values get() returns for each sensor.
+
+    Mirrors ``_dbdreader.get_count`` of the C extension; the parameters
+    are those of get().
+
+    Returns
+    -------
+    (error_no, counts) where counts holds the number of values of each
+    of the sensors *vi*.
+    """
+    error_no, r = get(
+        n_state_bytes,
+        n_sensors,
+        bin_offset,
+        byte_sizes,
+        filename,
+        ti,
+        vi,
+        return_nans,
+        skip_initial_line,
+        max_values_to_read,
+        cycle_offsets=cycle_offsets,
+        cycle_times=cycle_times,
+        t_min=t_min,
+        t_max=t_max,
+    )
+    if error_no:
+        return error_no, None
+    return 0, tuple(len(r[j]) for j in range(len(vi)))
+
+
+def get_into(
+    n_state_bytes: int,
+    n_sensors: int,
+    bin_offset: int,
+    byte_sizes: tuple[int, ...],
+    filename: str,
+    ti: int,
+    vi: tuple[int, ...],
+    return_nans: int,
+    skip_initial_line: int,
+    max_values_to_read: int,
+    t_buffers: Any,
+    v_buffers: Any,
+    cycle_offsets: Any = None,
+    cycle_times: Any = None,
+    t_min: float = -np.inf,
+    t_max: float = np.inf,
+) -> tuple[int, tuple[int, ...] | None]:
+    """
+    Read sensors into caller-provided buffers.
+
+    Mirrors ``_dbdreader.get_into`` of the C extension. The parameters
+    are those of get(), plus *t_buffers* and *v_buffers*: for each of
+    the sensors *vi* a writable float64 array (such as a slice of a
+    preallocated array) for its time stamps and values. Values beyond
+    the length of a buffer are counted, but not written.
+
+    Returns
+    -------
+    (error_no, counts) as get_count().
+    """
+    nv = len(vi)
+    if len(t_buffers) != nv or len(v_buffers) != nv:
+        raise ValueError(
+            "get_into: t_buffers and v_buffers should have a buffer for each sensor."
+        )
+    error_no, r = get(
+        n_state_bytes,
+        n_sensors,
+        bin_offset,
+        byte_sizes,
+        filename,
+        ti,
+        vi,
+        return_nans,
+        skip_initial_line,
+        max_values_to_read,
+        cycle_offsets=cycle_offsets,
+        cycle_times=cycle_times,
+        t_min=t_min,
+        t_max=t_max,
+    )
+    if error_no:
+        return error_no, None
+    for j in range(nv):
+        t_buffer = np.asarray(t_buffers[j])
+        v_buffer = np.asarray(v_buffers[j])
+        n = min(len(r[j]), t_buffer.shape[0], v_buffer.shape[0])
+        t_buffer[:n] = r[j][:n]
+        v_buffer[:n] = r[nv + j][:n]
+    return 0, tuple(len(r[j]) for j in range(nv))
+
+
+def get_table(
+    n_state_bytes: int,
+    n_sensors: int,
+    bin_offset: int,
+    byte_sizes: tuple[int, ...],
+    filename: str,
+    ti: int,
+    vi: tuple[int, ...],
+    skip_initial_line: int,
+    max_values_to_read: int,
+    cycle_offsets: Any = None,
+    cycle_times: Any = None,
+    t_min: float = -np.inf,
+    t_max: float = np.inf,
+) -> tuple[int, Any, Any]:
+    """
+    Read sensors with a single, shared time axis.
+
+    Mirrors ``_dbdreader.get_table`` of the C extension. The parameters
+    are those of get(), except that *vi* may be in any order and holds
+    -1 for sensors that are not in the file, and that NOTSET values are
+    always returned (as FILLVALUE).
+
+    Returns
+    -------
+    (error_no, t, values) where t holds the time stamps of n cycles and
+    values is an (n, len(vi)) float64 array. Columns for which vi holds
+    -1 are NaN.
+    """
+    present = sorted((s, k) for k, s in enumerate(vi) if s >= 0)
+    # without any sensor to read, read the time variable for the time axis.
+    vi_sorted = tuple(s for s, _ in present) or (ti,)
+    error_no, r = get(
+        n_state_bytes,
+        n_sensors,
+        bin_offset,
+        byte_sizes,
+        filename,
+        ti,
+        vi_sorted,
+        1,
+        skip_initial_line,
+        max_values_to_read,
+        cycle_offsets=cycle_offsets,
+        cycle_times=cycle_times,
+        t_min=t_min,
+        t_max=t_max,
+    )
+    if error_no:
+        return error_no, None, None
+    t = r[0]
+    values = np.full((t.shape[0], len(vi)), np.nan)
+    for i, (_, k) in enumerate(present):
+        values[:, k] = r[len(vi_sorted) + i]
+    return 0, t, values
+
+
+def get_cycle_index(
+    n_state_bytes: int,
+    n_sensors: int,
+    bin_offset: int,
+    byte_sizes: tuple[int, ...],
+    filename: str,
+    ti: int,
+) -> tuple[int, Any, Any]:
+    """
+    Walk the cycles of a file once and record where they are.
+
+    Mirrors ``_dbdreader.get_cycle_index`` of the C extension.
+
+    Returns
+    -------
+    (error_no, offsets, times) where offsets holds the file position of
+    the state bytes of each cycle and times the value of the time
+    variable *ti* in that cycle (carried forward if not updated, NaN if
+    not set), both as float64 arrays. *offsets* can be passed to get()
+    to skip Pass 1.
+    """
+    try:
+        data = _read_file(filename)
+    except FileNotFoundError:
+        return 2, None, None  # ERROR_FILE_NOT_FOUND
+    except Exception:
+        return 1, None, None  # ERROR_UNEXPECTED_END_OF_FILE
+    bs_list = list(byte_sizes)
+    sp_arr = _walk_cycles(data, n_state_bytes, n_sensors, bin_offset, bs_list)
+    if sp_arr.shape[0] == 0:
+        return 0, np.empty(0), np.empty(0)
+    endian = "<" if struct.unpack_from("<H", data, bin_offset + 2)[0] == 4660 else ">"
+    data_u8 = np.frombuffer(data, dtype=np.uint8)
+    offsets = _chunk_offsets(
+        data_u8,
+        sp_arr,
+        n_state_bytes,
+        n_sensors,
+        np.array(bs_list, dtype=np.int32),
+        np.array([ti], dtype=np.intp),
+    )[:, 0]
+    times = _read_column(
+        data_u8, sp_arr + n_state_bytes, offsets, bs_list[ti], endian, 0
+    )
+    times[offsets == np.int32(-2)] = np.nan
+    return 0, sp_arr.astype(np.float64), times
+
+
+def get_many(
+    descriptors: list[tuple[Any, ...]],
+    return_nans: int,
+    max_values_to_read: int,
+) -> tuple[tuple[int, ...], list[Any], list[tuple[int, ...]]]:
+    """
+    Read the same parameters from a list of files in one call.
+
+    Mirrors ``_dbdreader.get_many`` of the C extension.
+
+    descriptors        : list  – one tuple per file: (n_state_bytes,
+                                 n_sensors, bin_offset, byte_sizes,
+                                 filename, ti, vi, skip_initial_line),
+                                 where vi lists the sensor index of each
+                                 requested parameter in the caller's order
+    return_nans        : int   – 1 → include NOTSET slots as FILLVALUE rows
+    max_values_to_read : int   – stop reading files once this many rows of
+                                 the first parameter are read (0 = unlimited)
+
+    Returns
+    -------
+    (error_nos, result, offsets) where error_nos holds the error number of
+    each file, result is a list of 2*nv concatenated arrays
+    [t_0, …, t_{nv-1}, v_0, …, v_{nv-1}], and offsets holds for each
+    parameter a tuple of n_files+1 positions marking where the data of
+    each file start.
+    """
+    nv = len(descriptors[0][6])
+    error_nos = []
+    chunks: list[list[Any]] = [[] for _ in range(2 * nv)]
+    offsets = [[0] for _ in range(nv)]
+    values_read_sofar = 0
+    for descriptor in descriptors:
+        (
+            n_state_bytes,
+            n_sensors,
+            bin_offset,
+            byte_sizes,
+            filename,
+            ti,
+            vi,
+            skip_initial_line,
+        ) = descriptor
+        error_no = 0
+        n = [0] * nv
+        if max_values_to_read <= 0 or values_read_sofar < max_values_to_read:
+            # the reader expects vi sorted; keep track of where each
+            # requested parameter ends up.
+            order = sorted(range(nv), key=lambda k: vi[k])
+            error_no, r = get(
+                n_state_bytes,
+                n_sensors,
+                bin_offset,
+                byte_sizes,
+                filename,
+                ti,
+                tuple(vi[k] for k in order),
+                return_nans,
+                skip_initial_line,
+                max_values_to_read,
+            )
+            if not error_no:
+                for i, k in enumerate(order):
+                    chunks[k].append(r[i])
+                    chunks[nv + k].append(r[nv + i])
+                    n[k] = len(r[i])
+                values_read_sofar += n[0]
+        error_nos.append(error_no)
+        for k in range(nv):
+            offsets[k].append(offsets[k][-1] + n[k])
+    result = [np.concatenate(c) if c else np.empty(0) for c in chunks]
+    return tuple(error_nos), result, [tuple(o) for o in offsets]
@@ -2,7 +2,11 @@ from functools import partial
 from itertools import chain
 import os
 import struct
+import tempfile
 import time
+import hashlib
+import json
+import sqlite3
 import numpy
 import glob
 import fnmatch
@@ -10,11 +14,11 @@ import sys
 import re
 import datetime
 from calendar import timegm
-from collections import defaultdict, namedtuple
+from collections import OrderedDict, defaultdict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Callable, Iterator
 import logging
-
-import lz4.block  # type: ignore[import-untyped]
+import threading
 
 logger = logging.getLogger(os.path.basename(__file__))
 
@@ -325,6 +329,52 @@ def heading_interpolating_function_factory(t: Any, v: Any) -> Callable[[Any], An
     return lambda _t: numpy.arctan2(yi(_t), xi(_t)) % (2 * numpy.pi)
 
 
+def _postprocess_values(
+    parameter: str,
+    t: Any,
+    v: Any,
+    decimalLatLon: bool = True,
+    discardBadLatLon: bool = False,
+    return_nans: bool = False,
+) -> tuple[Any, Any, Any]:
+    """Applies the fill value and lat/lon handling to data as read by the binary reader.
+
+    Parameters
+    ----------
+    parameter : str
+        parameter name
+    t : ndarray
+        time vector
+    v : ndarray
+        value vector (may be modified in place)
+    decimalLatLon, discardBadLatLon, return_nans : bool
+        see DBD.get()
+
+    Returns
+    -------
+    (ndarray, ndarray, ndarray or None)
+        time vector, value vector and the boolean condition used to
+        discard bogus lat/lon values (None if nothing was discarded).
+    """
+    condition = None
+    if return_nans:
+        idx = numpy.where(numpy.isclose(v, 1e9))[0]
+        v[idx] = numpy.nan
+    if parameter in LATLON_PARAMS:
+        if discardBadLatLon and not return_nans:
+            # discards and return nans is not compatible.
+            # p is either a latitude or longitude parameter. Check now which one it is.
+            if "lat" in parameter:
+                value_limit = 9000  # nmea style
+            else:
+                value_limit = 18000  # nmea style
+            condition = numpy.logical_and(v >= -value_limit, v <= value_limit)
+            t, v = numpy.compress(condition, (t, v), axis=1)
+        if decimalLatLon:
+            v = toDec(v)
+    return t, v, condition
+
+
 def _default_interp1d_factory(x: Any, y: Any) -> Callable[..., Any]:
     """Default linear interpolating function factory used by get_sync()
     and get_CTD_sync().
@@ -421,6 +471,224 @@ class DBDCache(object):
         DBDCache.CACHEDIR = path
 
 
+SensorList = namedtuple(
+    "SensorList", "parameters parameter_names used_sensors"
+)
+
+
+class SensorListRegistry(object):
+    """Process wide registry of parsed cache files
+
+    The sensor list of a factored dbd file is read from a cache file,
+    named after the sensor list CRC. Typically, all files of a mission
+    share only a handful of sensor lists, so rather than parsing the
+    same cache file for every file opened, the parsed sensor lists are
+    kept in this registry and shared by all DBD instances.
+
+    Entries are keyed by the path and modification time of the cache
+    file, so that a cache file that is rewritten is parsed again. At
+    most MAX_ENTRIES sensor lists are kept; when exceeded, the least
+    recently used entry is dropped. The registry is thread safe.
+
+    The sensor lists are returned as SensorList namedtuples, with fields
+
+    * parameters: tuple of (byte size, name, unit) of the sensors used,
+    * parameter_names: tuple of the names of all sensors,
+    * used_sensors: tuple of bools, True for each sensor that is used.
+
+    They are shared and immutable, and should not be modified.
+    """
+
+    MAX_ENTRIES = 16
+
+    _entries: "OrderedDict[tuple[str, int], SensorList]" = OrderedDict()
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, cacheFilename: str, dbdheader: "DBDHeader") -> SensorList:
+        """Get the sensor list of a cache file
+
+        Parameters
+        ----------
+        cacheFilename : str
+            path to the cache file
+        dbdheader : DBDHeader
+            header of the file that refers to the cache file. It is used
+            to parse the cache file when it is not registered yet.
+
+        Returns
+        -------
+        SensorList
+            the parsed sensor list
+
+        Raises
+        ------
+        FileNotFoundError
+            if the cache file does not exist.
+        """
+        key = (os.path.abspath(cacheFilename), os.stat(cacheFilename).st_mtime_ns)
+        with cls._lock:
+            sensor_list = cls._entries.get(key)
+            if sensor_list is not None:
+                cls._entries.move_to_end(key)
+                return sensor_list
+        # Parse outside the lock, so that other threads are not held up.
+        with open(cacheFilename, "br") as fpCache:
+            parameter = dbdheader.read_cache(fpCache)
+        parameter_names = tuple(dbdheader.info["parameter_list"])
+        used = set(name for _, name, _ in parameter)
+        sensor_list = SensorList(
+            tuple(parameter),
+            parameter_names,
+            tuple(name in used for name in parameter_names),
+        )
+        with cls._lock:
+            cls._entries[key] = sensor_list
+            cls._entries.move_to_end(key)
+            while len(cls._entries) > cls.MAX_ENTRIES:
+                cls._entries.popitem(last=False)
+        return sensor_list
+
+    @classmethod
+    def clear(cls) -> None:
+        """Remove all registered sensor lists"""
+        with cls._lock:
+            cls._entries.clear()
+
+
+HeaderInventoryEntry = namedtuple(
+    "HeaderInventoryEntry",
+    "header_info fp_binary_start cacheID mission_name fileopen_time",
+)
+
+
+class HeaderInventory(object):
+    """Persistent inventory of dbd file headers
+
+    Opening a dbd file requires its ASCII header to be parsed. As this
+    dominates the time it takes to open a large number of files with
+    MultiDBD, the header information of each file opened is stored in
+    an SQLite database in the cache directory, keyed by the path, size
+    and modification time of the file. When the same, unmodified, file
+    is opened again, the header is taken from the inventory, and the
+    file itself is not read at all.
+
+    The sensor list is not stored in the inventory, but taken from the
+    cache file, so that a file is looked up only when its cache file is
+    present.
+
+    The inventory is not used unless enabled, by setting
+    HeaderInventory.ENABLED to True. It is also not used for a cache
+    directory that cannot be written to.
+    """
+
+    ENABLED = False
+    FILENAME = "header_inventory.sqlite"
+
+    _connections = threading.local()
+
+    @classmethod
+    def _connect(cls, cacheDir: str) -> sqlite3.Connection | None:
+        """Returns the connection of this thread to the inventory in cacheDir
+
+        Returns None if the inventory cannot be used.
+        """
+        connections = cls._connections.__dict__.setdefault("connections", {})
+        path = os.path.abspath(os.path.join(cacheDir, cls.FILENAME))
+        if path not in connections:
+            connections[path] = None
+            # sqlite writes its journal next to the database.
+            if not os.access(cacheDir, os.W_OK) or (
+                os.path.exists(path) and not os.access(path, os.W_OK)
+            ):
+                logger.debug(f"The header inventory in {cacheDir} cannot be written.")
+                return None
+            try:
+                connection = sqlite3.connect(path, timeout=30)
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS headers ("
+                    "path TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, "
+                    "header_info TEXT, fp_binary_start INTEGER, cache_id TEXT, "
+                    "mission_name TEXT, fileopen_time INTEGER)"
+                )
+                connection.commit()
+            except sqlite3.Error as e:
+                logger.debug(f"The header inventory in {cacheDir} cannot be used ({e}).")
+                return None
+            connections[path] = connection
+        result: sqlite3.Connection | None = connections[path]
+        return result
+
+    @classmethod
+    def lookup(cls, cacheDir: str, filename: str) -> HeaderInventoryEntry | None:
+        """Looks up the header of a file
+
+        Parameters
+        ----------
+        cacheDir : str
+            path to the cache directory
+        filename : str
+            dbd filename
+
+        Returns
+        -------
+        HeaderInventoryEntry or None
+            the header information, or None if the file is not in the
+            inventory, or has been modified since it was stored.
+        """
+        connection = cls._connect(cacheDir)
+        if connection is None:
+            return None
+        try:
+            st = os.stat(filename)
+            row = connection.execute(
+                "SELECT header_info, fp_binary_start, cache_id, mission_name, "
+                "fileopen_time FROM headers WHERE path=? AND size=? AND mtime_ns=?",
+                (os.path.abspath(filename), st.st_size, st.st_mtime_ns),
+            ).fetchone()
+        except (OSError, sqlite3.Error) as e:
+            logger.debug(f"Could not look up the header of {filename} ({e}).")
+            return None
+        if row is None:
+            return None
+        return HeaderInventoryEntry(json.loads(row[0]), *row[1:])
+
+    @classmethod
+    def store(cls, cacheDir: str, filename: str, entry: HeaderInventoryEntry) -> None:
+        """Stores the header of a file
+
+        Parameters
+        ----------
+        cacheDir : str
+            path to the cache directory
+        filename : str
+            dbd filename
+        entry : HeaderInventoryEntry
+            the header information to store. The parameter_list of
+            the header is not stored.
+        """
+        connection = cls._connect(cacheDir)
+        if connection is None:
+            return
+        header_info = dict(entry.header_info)
+        header_info.pop("parameter_list", None)
+        try:
+            st = os.stat(filename)
+            with connection:
+                connection.execute(
+                    "INSERT OR REPLACE INTO headers VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        os.path.abspath(filename),
+                        st.st_size,
+                        st.st_mtime_ns,
+                        json.dumps(header_info),
+                        *entry[1:],
+                    ),
+                )
+        except (OSError, sqlite3.Error) as e:
+            logger.debug(f"Could not store the header of {filename} ({e}).")
+
+
 def _glob(pattern: str) -> list[str]:
     """Case-sensitive glob.
 
@@ -769,7 +1037,7 @@ class DBDHeader(object):
         fp.seek(0)
         try:
             result = self.parse(fp.readline())
-        except lz4.block.LZ4BlockError:
+        except dbdreader.decompress.DecompressionError:
             return DBD_ERROR_DECOMPRESSION_ERROR
         except UnicodeDecodeError:
             return DBD_ERROR_INVALID_DBD_FILE
@@ -855,6 +1123,13 @@ class DBD(object):
         value or arbitrarily old); only for debugging purposes one may
         want to have the initial data line read.
 
+    cycle_index : bool, default: False
+        if True, the position and time stamp of every cycle in the
+        file are indexed when the file is first read, and subsequent
+        reads visit the indexed cycles directly. The index is also
+        stored in the cache directory, and reused when the same
+        (unmodified) file is opened again. See get_cycle_index().
+
     """
 
     SKIP_INITIAL_LINE = True
@@ -864,6 +1139,7 @@ class DBD(object):
         filename: str,
         cacheDir: str | None = None,
         skip_initial_line: bool = True,
+        cycle_index: bool = False,
     ) -> None:
 
         self.fp: Any
@@ -871,21 +1147,31 @@ class DBD(object):
         self.vi: Any
         self.filename = filename
         self.skip_initial_line = skip_initial_line
+        self.cycle_index = cycle_index
+        self._cycle_index: tuple[Any, Any] | None = None
         logger.debug("Opening %s", filename)
         if cacheDir == None:
             self.cacheDir = DBDCache.CACHEDIR
         else:
             self.cacheDir = cacheDir
-        if dbdreader.decompress.is_compressed(filename):
-            with dbdreader.decompress.CompressedFile(filename) as self.fp:
-                self.headerInfo, parameterInfo, self.cacheFound, self.cacheID = (
-                    self._read_header(self.cacheDir)
-                )
+        self._fileopen_time: int | None = None
+        header = self._read_header_from_inventory()
+        if header is not None:
+            self.fp = None
+            self.headerInfo, parameterInfo, self.cacheFound, self.cacheID = header
         else:
-            with open(filename, "br") as self.fp:
-                self.headerInfo, parameterInfo, self.cacheFound, self.cacheID = (
-                    self._read_header(self.cacheDir)
-                )
+            if dbdreader.decompress.is_compressed(filename):
+                with dbdreader.decompress.CompressedFile(filename) as self.fp:
+                    self.headerInfo, parameterInfo, self.cacheFound, self.cacheID = (
+                        self._read_header(self.cacheDir)
+                    )
+            else:
+                with open(filename, "br") as self.fp:
+                    self.headerInfo, parameterInfo, self.cacheFound, self.cacheID = (
+                        self._read_header(self.cacheDir)
+                    )
+            if self.cacheFound and HeaderInventory.ENABLED:
+                self._store_header_in_inventory()
         # number of bytes each states section consists of:
         self.n_state_bytes = self.headerInfo["state_bytes_per_cycle"]
         # size of variables used
@@ -912,7 +1198,8 @@ class DBD(object):
 
     def close(self) -> Any:
         """Closes a DBD file"""
-        return self.fp.close()
+        if self.fp is not None:
+            return self.fp.close()
 
     def get(
         self,
@@ -922,6 +1209,9 @@ class DBD(object):
         return_nans: bool = False,
         max_values_to_read: int = -1,
         check_for_invalid_parameters: bool = True,
+        t_min: float | None = None,
+        t_max: float | None = None,
+        shared_time: bool = False,
     ) -> Any:
         """Returns time and parameter data for requested parameter
 
@@ -950,12 +1240,32 @@ class DBD(object):
         check_for_invalid_parameters : bool, optional
             if True returns empty arrays for parameters that are marked as invalid, instead of triggering an exception.
 
+        t_min : float or None, optional
+            if set, only data with time stamps of t_min (seconds) or later are returned.
+
+        t_max : float or None, optional
+            if set, only data with time stamps up to t_max (seconds) are
+            returned. Reading stops at the first time stamp past t_max.
+
+        shared_time : bool, optional
+            if True, all parameters are returned on a single time
+            axis, as one time vector and a matrix with a column for
+            each parameter, rather than a time vector per
+            parameter. Values that are not set are nan, as with
+            return_nans=True. return_nans and discardBadLatLon are
+            then ignored: bogus latitude and longitude values are not
+            discarded, as a row cannot be dropped for a single column.
+
 
         Returns
         -------
         tuple of (ndarray, ndarray) for each parameter requested.
             time vector (in seconds) and value vector
 
+        (ndarray, ndarray)
+            if shared_time is True: time vector (in seconds) and a
+            matrix of values (one row per time stamp, one column per parameter)
+
         Raises
         ------
              DbdError when the requested parameter(s) cannot be read.
@@ -970,6 +1280,16 @@ class DBD(object):
                 "Limiting the values to be read for multiple parameters potentially yields undefined behaviour.\n"
             )
 
+        if shared_time:
+            return self._get_table(
+                *parameters,
+                decimalLatLon=decimalLatLon,
+                discardBadLatLon=discardBadLatLon,
+                max_values_to_read=max_values_to_read,
+                check_for_invalid_parameters=check_for_invalid_parameters,
+                t_min=t_min,
+                t_max=t_max,
+            )
         timestamps, values = self._get(
             *parameters,
             decimalLatLon=decimalLatLon,
@@ -977,6 +1297,8 @@ class DBD(object):
             return_nans=return_nans,
             max_values_to_read=max_values_to_read,
             check_for_invalid_parameters=check_for_invalid_parameters,
+            t_min=t_min,
+            t_max=t_max,
         )
         r = [(t, v) for t, v in zip(timestamps, values)]
 
@@ -985,6 +1307,182 @@ class DBD(object):
         else:
             return r
 
+    def get_all(
+        self,
+        decimalLatLon: bool = True,
+        t_min: float | None = None,
+        t_max: float | None = None,
+    ) -> dict[str, Any]:
+        """Returns the data of all parameters in this file
+
+        All parameters are read in a single pass through the file, on
+        a shared time axis (see get() with shared_time=True). Bogus
+        latitude and longitude values are not discarded.
+
+        Parameters
+        ----------
+        decimalLatLon : bool, optional
+            If True (default), latitiude and longitude related parameters are converted to
+            decimal format, as opposed to nmea format.
+
+        t_min, t_max : float or None, optional
+            time window (seconds) to read, see get().
+
+        Returns
+        -------
+        dict of ndarray
+            a column of values for each parameter, keyed by parameter
+            name. All columns share the time axis, which is the column
+            of the time variable (m_present_time or
+            sci_m_present_time). The columns are views of a single
+            matrix of values.
+        """
+        _, values = self._get_table(
+            *self.parameterNames, decimalLatLon=decimalLatLon, t_min=t_min, t_max=t_max
+        )
+        return dict((p, values[:, k]) for k, p in enumerate(self.parameterNames))
+
+    def count_values(
+        self,
+        *parameters: str,
+        return_nans: bool = False,
+        t_min: float | None = None,
+        t_max: float | None = None,
+    ) -> list[int]:
+        """Returns the number of values get_into() writes for each parameter
+
+        The file is read without storing any values, so that output
+        arrays can be allocated once, for example to hold the data of
+        many files.
+
+        Parameters
+        ----------
+        *parameters: variable length list of str
+            parameter names
+
+        return_nans : bool, optional
+            see get().
+
+        t_min, t_max : float or None, optional
+            time window (seconds) to read, see get().
+
+        Returns
+        -------
+        list of int
+            the number of values for each parameter. Parameters that
+            are not in this file have no values.
+
+        Raises
+        ------
+             DbdError when the requested parameter(s) cannot be read.
+        """
+        valid_parameters, _, ti, idx = self._prepare_get(parameters)
+        vi = tuple(sorted(set(idx)))
+        error_no, counts = self._read(
+            _dbdreader.get_count,
+            ti,
+            vi,
+            int(return_nans),
+            int(self.skip_initial_line),
+            -1,
+            **self._reader_kwds(t_min, t_max),
+        )
+        if error_no:
+            raise self._read_error(error_no)
+        return [
+            counts[vi.index(self.parameterNames.index(p))] if p in valid_parameters else 0
+            for p in parameters
+        ]
+
+    def get_into(
+        self,
+        *parameters: str,
+        out: Any,
+        decimalLatLon: bool = True,
+        return_nans: bool = False,
+        t_min: float | None = None,
+        t_max: float | None = None,
+    ) -> list[int]:
+        """Reads parameters into arrays provided by the caller
+
+        As get(), but the time stamps and values are written straight
+        to the arrays in out, such as slices of arrays that are
+        preallocated to hold the data of many files, sized using
+        count_values(). No intermediate arrays are created.
+
+        Unlike get(), bogus latitude and longitude values are not
+        discarded (as with discardBadLatLon=False), as that would
+        change the number of values written from what count_values()
+        returns.
+
+        Parameters
+        ----------
+        *parameters: variable length list of str
+            parameter names
+
+        out : list of (ndarray, ndarray)
+            for each parameter a contiguous float64 array for the time
+            stamps and one for the values.
+
+        decimalLatLon : bool, optional
+            If True (default), latitiude and longitude related parameters are converted to
+            decimal format, as opposed to nmea format.
+
+        return_nans : bool, optional
+            see get().
+
+        t_min, t_max : float or None, optional
+            time window (seconds) to read, see get().
+
+        Returns
+        -------
+        list of int
+            the number of values of each parameter, as count_values().
+            Values that do not fit in the arrays are not written.
+
+        Raises
+        ------
+             DbdError when the requested parameter(s) cannot be read.
+        """
+        if len(out) != len(parameters):
+            raise ValueError("out should have a (time, value) pair of arrays for each parameter.")
+        valid_parameters, _, ti, _ = self._prepare_get(parameters)
+        # the reader expects the sensors sorted; a parameter requested
+        # more than once is read for each occurrence.
+        requested = sorted(
+            (self.parameterNames.index(p), k)
+            for k, p in enumerate(parameters)
+            if p in valid_parameters
+        )
+        vi = tuple(s for s, _ in requested)
+        error_no, counts = self._read(
+            _dbdreader.get_into,
+            ti,
+            vi,
+            int(return_nans),
+            int(self.skip_initial_line),
+            -1,
+            [out[k][0] for _, k in requested],
+            [out[k][1] for _, k in requested],
+            **self._reader_kwds(t_min, t_max),
+        )
+        if error_no:
+            raise self._read_error(error_no)
+        n_values = [0] * len(parameters)
+        for (_, k), n in zip(requested, counts):
+            n_values[k] = n
+            t, v = out[k]
+            n = min(n, len(t), len(v))
+            _, v_processed, _ = _postprocess_values(
+                parameters[k],
+                t[:n],
+                v[:n],
+                decimalLatLon=decimalLatLon,
+                return_nans=return_nans,
+            )
+            v[:n] = v_processed
+        return n_values
+
     def get_xy(
         self,
         parameter_x: str,
@@ -1097,13 +1595,32 @@ class DBD(object):
         """
         return parameter in self.parameterNames
 
+    def get_cycle_index(self) -> tuple[Any, Any]:
+        """Returns the index of the cycles in this file
+
+        The index is built on the first call, by walking through the
+        cycles once, and kept for subsequent calls. Once built, all
+        reads of this file use the index rather than walking through
+        the cycles again.
+
+        Returns
+        -------
+        (ndarray, ndarray)
+            byte offsets (int64) of each cycle in the (decompressed)
+            file and the value of the time variable in that cycle
+            (float64, nan if not set)
+        """
+        offsets, times = self._get_cycle_index()
+        return offsets.astype(numpy.int64), times
+
     # Private methods:
 
     def _get_fileopen_time(self) -> int:
-        datestr = self.headerInfo["fileopen_time"].replace("_", " ")
-        fmt = "%a %b %d %H:%M:%S %Y"
-        seconds = strptimeToEpoch(datestr, fmt)
-        return seconds
+        if self._fileopen_time is None:
+            datestr = self.headerInfo["fileopen_time"].replace("_", " ")
+            fmt = "%a %b %d %H:%M:%S %Y"
+            self._fileopen_time = strptimeToEpoch(datestr, fmt)
+        return self._fileopen_time
 
     def _set_timeVariable(self) -> str:
         if "m_present_time" in self.parameterNames:
@@ -1119,8 +1636,196 @@ class DBD(object):
         return_nans: bool = False,
         max_values_to_read: int = -1,
         check_for_invalid_parameters: bool = True,
+        t_min: float | None = None,
+        t_max: float | None = None,
     ) -> tuple[list[Any], list[Any]]:
         """returns time and parameter data for requested parameter"""
+        valid_parameters, missing_parameters, ti, idx = self._prepare_get(
+            parameters, check_for_invalid_parameters
+        )
+        idx_sorted = numpy.sort(idx)
+        vi = tuple(idx_sorted)
+        error_no, r = self._read(
+            _dbdreader.get,
+            ti,
+            vi,
+            int(return_nans),
+            int(self.skip_initial_line),
+            max_values_to_read,
+            **self._reader_kwds(t_min, t_max),
+        )
+        if error_no:
+            raise self._read_error(error_no)
+
+        number_valid_parameters = len(valid_parameters)
+        # map the contents of vi on timestamps and values, preserving the original order:
+        idx_reorderd = [vi.index(i) for i in idx]
+        # these are for good_parameters. The reader hands over contiguous
+        # float64 buffers, which are wrapped without copying:
+        timestamps = [numpy.asarray(r[i]) for i in idx_reorderd]
+        values = [numpy.asarray(r[number_valid_parameters + i]) for i in idx_reorderd]
+        # convert to decimal lat lon if applicable:
+        for i, p in enumerate(valid_parameters):
+            timestamps[i], values[i], _ = _postprocess_values(
+                p,
+                timestamps[i],
+                values[i],
+                decimalLatLon=decimalLatLon,
+                discardBadLatLon=discardBadLatLon,
+                return_nans=return_nans,
+            )
+        # if we have any invalid parameters, insert empty arrays in the right places, or full length nan vectors if return_nans is True
+        if return_nans:
+            n_timestamps = timestamps[0].shape[0]
+
+            def get_empty_array() -> Any:
+                return numpy.ones(n_timestamps) * numpy.nan
+
+        else:
+
+            def get_empty_array() -> Any:
+                return numpy.array([])
+
+        for missing_parameter in missing_parameters:
+            pos = parameters.index(missing_parameter)
+            timestamps.insert(pos, get_empty_array())
+            values.insert(pos, get_empty_array())
+        return timestamps, values
+
+    def _get_table(
+        self,
+        *parameters: str,
+        decimalLatLon: bool = True,
+        discardBadLatLon: bool = False,
+        max_values_to_read: int = -1,
+        check_for_invalid_parameters: bool = True,
+        t_min: float | None = None,
+        t_max: float | None = None,
+    ) -> tuple[Any, Any]:
+        """returns a time vector and a matrix with a column for each requested parameter"""
+        valid_parameters, _, ti, _ = self._prepare_get(
+            parameters, check_for_invalid_parameters
+        )
+        # parameters not in this file get a column of nans.
+        vi = tuple(
+            self.parameterNames.index(p) if p in valid_parameters else -1
+            for p in parameters
+        )
+        error_no, t, values = self._read(
+            _dbdreader.get_table,
+            ti,
+            vi,
+            int(self.skip_initial_line),
+            max_values_to_read,
+            **self._reader_kwds(t_min, t_max),
+        )
+        if error_no:
+            raise self._read_error(error_no)
+        t = numpy.asarray(t)
+        values = numpy.asarray(values)
+        for k, p in enumerate(parameters):
+            if vi[k] >= 0:
+                _, values[:, k], _ = _postprocess_values(
+                    p,
+                    t,
+                    values[:, k],
+                    decimalLatLon=decimalLatLon,
+                    discardBadLatLon=discardBadLatLon,
+                    return_nans=True,
+                )
+        return t, values
+
+    def _reader_kwds(self, t_min: float | None, t_max: float | None) -> dict[str, Any]:
+        """Returns the keywords for the binary reader for the cycle index (if used) and time window."""
+        if self.cycle_index or self._cycle_index is not None:
+            cycle_offsets, cycle_times = self._get_cycle_index()
+        else:
+            cycle_offsets = cycle_times = None
+        return dict(
+            cycle_offsets=cycle_offsets,
+            cycle_times=cycle_times,
+            t_min=-numpy.inf if t_min is None else t_min,
+            t_max=numpy.inf if t_max is None else t_max,
+        )
+
+    def _reader_filename(self) -> str:
+        """Returns the file for the binary reader to read.
+
+        This is the decompressed copy of a compressed file if a
+        decompressed file cache is in use (see
+        dbdreader.decompress.DecompressedFileCache), and the file itself
+        otherwise. Should the file fail to decompress, the reader reads
+        the file itself, and reports the error.
+        """
+        if not dbdreader.decompress.is_compressed(self.filename):
+            return self.filename
+        try:
+            cached_filename = dbdreader.decompress.DecompressedFileCache.lookup(
+                self.filename
+            )
+        except (OSError, dbdreader.decompress.DecompressionError):
+            cached_filename = None
+        return cached_filename or self.filename
+
+    def _read(self, reader: Callable[..., Any], *args: Any, **kwds: Any) -> Any:
+        """Calls reader, a function of the binary reader, for this file.
+
+        The layout of the file and the file to read (see
+        _reader_filename()) are passed, followed by args and kwds. A
+        decompressed copy in the cache may be evicted by another reader
+        after it has been looked up; the file is then decompressed
+        again and read once more.
+        """
+        filename = self._reader_filename()
+        result = reader(
+            self.n_state_bytes,
+            self.headerInfo["sensors_per_cycle"],
+            self.fp_binary_start,
+            self.byteSizes,
+            filename,
+            *args,
+            **kwds,
+        )
+        if self._evicted_from_cache(result[0], filename):
+            result = reader(
+                self.n_state_bytes,
+                self.headerInfo["sensors_per_cycle"],
+                self.fp_binary_start,
+                self.byteSizes,
+                self._reader_filename(),
+                *args,
+                **kwds,
+            )
+        return result
+
+    def _evicted_from_cache(self, error_no: int, filename: str) -> bool:
+        """Returns True if the binary reader failed with error_no because
+        filename, the decompressed copy of this file in the cache, has
+        been removed since it was looked up."""
+        return (
+            filename != self.filename
+            and dbdreader.decompress.DECOMPRESSION_ERROR_LIST[error_no]
+            == "ERROR_FILE_NOT_FOUND"
+        )
+
+    def _prepare_get(
+        self, parameters: tuple[str, ...], check_for_invalid_parameters: bool = True
+    ) -> tuple[list[str], list[str], int, list[int]]:
+        """Checks the requested parameters and looks up their sensor indices.
+
+        Returns
+        -------
+        (list of str, list of str, int, list of int)
+            parameters present in this file, parameters absent from
+            this file, the index of the time variable and the indices
+            of the present parameters (in the order requested).
+
+        Raises
+        ------
+            DbdError when a parameter is not a known sensor name (and
+            check_for_invalid_parameters is True), or when the time
+            variable is missing.
+        """
         invalid_parameters = self._get_valid_parameters(
             parameters, invert=True, global_scope=True
         )
@@ -1136,7 +1841,6 @@ class DBD(object):
 
         valid_parameters = self._get_valid_parameters(parameters)
         missing_parameters = self._get_valid_parameters(parameters, invert=True)
-        number_valid_parameters = len(valid_parameters)
         if not self.timeVariable in self.parameterNames:
             raise DbdError(DBD_ERROR_NO_TIME_VARIABLE)
 
@@ -1147,74 +1851,91 @@ class DBD(object):
             )
 
         ti = self.parameterNames.index(self.timeVariable)
-        idx: Any = [self.parameterNames.index(p) for p in valid_parameters]
-        idx_sorted = numpy.sort(idx)
-        vi = tuple(idx_sorted)
+        idx = [self.parameterNames.index(p) for p in valid_parameters]
         self.n_sensors = self.headerInfo["sensors_per_cycle"]
-        error_no, r = _dbdreader.get(
-            self.n_state_bytes,
-            self.n_sensors,
-            self.fp_binary_start,
-            self.byteSizes,
-            self.filename,
-            ti,
-            vi,
-            int(return_nans),
-            int(self.skip_initial_line),
-            max_values_to_read,
-        )
-        if error_no:
-            s = dbdreader.decompress.DECOMPRESSION_ERROR_LIST[error_no]
-            raise DbdError(
-                value=DBD_ERROR_READ_ERROR,
-                mesg=f"Decompression of {self.filename} failed with an '{s}' error.",
-                data=error_no,
-            )
+        return valid_parameters, missing_parameters, ti, idx
 
-        # map the contents of vi on timestamps and values, preserving the original order:
-        idx_reorderd = [vi.index(i) for i in idx]
-        # these are for good_parameters:
-        timestamps = [numpy.array(r[i]) for i in idx_reorderd]
-        values = [numpy.array(r[number_valid_parameters + i]) for i in idx_reorderd]
-        # convert to decimal lat lon if applicable:
-        for i, p in enumerate(valid_parameters):
-            if return_nans:
-                idx = numpy.where(numpy.isclose(values[i], 1e9))[0]
-                values[i][idx] = numpy.nan
-            if self._is_latlon_parameter(p):
-                if (
-                    discardBadLatLon and not return_nans
-                ):  # discards and return nans is not compatible.
-                    # p is either a latitude or longitude parameter. Check now which one it is.
-                    if "lat" in p:
-                        value_limit = 9000  # nmea style
-                    else:
-                        value_limit = 18000  # nmea style
-                    condition = numpy.logical_and(
-                        values[i] >= -value_limit, values[i] <= value_limit
-                    )
-                    timestamps[i], values[i] = numpy.compress(
-                        condition, (timestamps[i], values[i]), axis=1
-                    )
-                if decimalLatLon:
-                    values[i] = toDec(values[i])
-        # if we have any invalid parameters, insert empty arrays in the right places, or full length nan vectors if return_nans is True
-        if return_nans:
-            n_timestamps = timestamps[0].shape[0]
+    def _get_cycle_index(self) -> tuple[Any, Any]:
+        """Returns the cycle index as float64 arrays, as used by the binary reader.
 
-            def get_empty_array() -> Any:
-                return numpy.ones(n_timestamps) * numpy.nan
+        The index is looked up in memory, then (if cycle_index is set)
+        in the cache directory, and built otherwise.
+        """
+        if self._cycle_index is None:
+            if self.cycle_index:
+                self._cycle_index = self._load_cycle_index()
+            if self._cycle_index is None:
+                if not self.timeVariable in self.parameterNames:
+                    raise DbdError(DBD_ERROR_NO_TIME_VARIABLE)
+                error_no, offsets, times = self._read(
+                    _dbdreader.get_cycle_index,
+                    self.parameterNames.index(self.timeVariable),
+                )
+                if error_no:
+                    raise self._read_error(error_no)
+                self._cycle_index = (numpy.asarray(offsets), numpy.asarray(times))
+                if self.cycle_index:
+                    self._save_cycle_index()
+        return self._cycle_index
 
-        else:
+    def _cycle_index_filename(self) -> str | None:
+        """Returns the name of the file in the cache directory holding the cycle index.
 
-            def get_empty_array() -> Any:
-                return numpy.array([])
+        Returns None if there is no cache directory.
+        """
+        if self.cacheDir is None:
+            return None
+        digest = hashlib.sha1(os.path.abspath(self.filename).encode()).hexdigest()
+        return os.path.join(self.cacheDir, f"{digest}.cix")
+
+    def _file_signature(self) -> Any:
+        """Returns the size and modification time of the file, used to validate a stored cycle index."""
+        st = os.stat(self.filename)
+        return numpy.array([st.st_size, st.st_mtime_ns], dtype=numpy.int64)
+
+    def _load_cycle_index(self) -> tuple[Any, Any] | None:
+        """Reads the cycle index from the cache directory, if present and up to date."""
+        filename = self._cycle_index_filename()
+        if filename is None:
+            return None
+        try:
+            with numpy.load(filename) as index:
+                if not numpy.array_equal(index["signature"], self._file_signature()):
+                    return None
+                return (index["offsets"], index["times"])
+        except (OSError, KeyError, ValueError):
+            return None
 
-        for missing_parameter in missing_parameters:
-            idx = parameters.index(missing_parameter)
-            timestamps.insert(idx, get_empty_array())
-            values.insert(idx, get_empty_array())
-        return timestamps, values
+    def _save_cycle_index(self) -> None:
+        """Writes the cycle index to the cache directory.
+
+        The index is written to a temporary file first, and then
+        renamed, so that concurrent readers never see a partial index.
+        """
+        assert self._cycle_index is not None
+        offsets, times = self._cycle_index
+        filename = self._cycle_index_filename()
+        if filename is None:
+            return
+        try:
+            with tempfile.NamedTemporaryFile(
+                dir=self.cacheDir, suffix=".tmp", delete=False
+            ) as fp:
+                numpy.savez(
+                    fp, offsets=offsets, times=times, signature=self._file_signature()
+                )
+            os.replace(fp.name, filename)
+        except OSError as e:
+            logger.warning(f"Could not store the cycle index of {self.filename} ({e}).")
+
+    def _read_error(self, error_no: int) -> DbdError:
+        """Returns the exception to raise for a non-zero error number of the binary reader."""
+        s = dbdreader.decompress.DECOMPRESSION_ERROR_LIST[error_no]
+        return DbdError(
+            value=DBD_ERROR_READ_ERROR,
+            mesg=f"Decompression of {self.filename} failed with an '{s}' error.",
+            data=error_no,
+        )
 
     def _get_sync(
         self,
@@ -1303,17 +2024,20 @@ class DBD(object):
         parameter: list[tuple[int, str, str]] = []
         if dbdheader.factored == 1:
             # read sensorlist from cache
-            if os.path.exists(cacheFilename):
-                fpCache: Any = open(cacheFilename, "br")
-                parameter = dbdheader.read_cache(fpCache)
-                fpCache.close()
-            else:
+            try:
+                sensor_list = SensorListRegistry.get(cacheFilename, dbdheader)
+            except FileNotFoundError:
                 cacheFound = False
+            else:
+                parameter = list(sensor_list.parameters)
+                dbdheader.info["parameter_list"] = list(
+                    sensor_list.parameter_names
+                )
         else:  # no need to check for factored==None; the value has been set for sure.
             # read sensorlist from same file and copy
             if not os.path.exists(cacheFilename):
                 # only write, when not existing.
-                fpCache = open(cacheFilename, "w")
+                fpCache: Any = open(cacheFilename, "w")
                 parameter = dbdheader.read_cache(self.fp, fpCache)
                 fpCache.close()
             else:
@@ -1323,6 +2047,48 @@ class DBD(object):
         # binary part of the file
         return (dbdheader.info, parameter, cacheFound, cacheID)
 
+    def _read_header_from_inventory(
+        self,
+    ) -> tuple[dict[str, Any], list[tuple[int, str, str]], bool, str] | None:
+        """Returns the header as _read_header() does, if found in the header inventory.
+
+        Returns None if the inventory is disabled, the file is not in
+        the inventory, or its cache file is not present.
+        """
+        if not HeaderInventory.ENABLED or self.cacheDir is None:
+            return None
+        entry = HeaderInventory.lookup(self.cacheDir, self.filename)
+        if entry is None:
+            return None
+        dbdheader = DBDHeader()
+        dbdheader.info = entry.header_info
+        cacheFilename = os.path.join(self.cacheDir, entry.cacheID + ".cac")
+        try:
+            sensor_list = SensorListRegistry.get(cacheFilename, dbdheader)
+        except FileNotFoundError:
+            return None
+        dbdheader.info["parameter_list"] = list(sensor_list.parameter_names)
+        self.fp_binary_start = entry.fp_binary_start
+        self._fileopen_time = entry.fileopen_time
+        return (dbdheader.info, list(sensor_list.parameters), True, entry.cacheID)
+
+    def _store_header_in_inventory(self) -> None:
+        """Stores the header of this file in the header inventory."""
+        if self.cacheDir is None:
+            return
+        try:
+            fileopen_time: int | None = self.get_fileopen_time()
+        except (KeyError, ValueError):
+            fileopen_time = None
+        entry = HeaderInventoryEntry(
+            self.headerInfo,
+            self.fp_binary_start,
+            self.cacheID,
+            self.headerInfo.get("mission_name"),
+            fileopen_time,
+        )
+        HeaderInventory.store(self.cacheDir, self.filename, entry)
+
     def _get_by_read_per_byte(self, parameter: Any) -> list[Any]:
         """method that reads the file byte by byte and processes
         accordingly. As opposed to read the whole file in memory and do the
@@ -1486,6 +2252,12 @@ class MultiDBD(object):
     skip_initial_line: bool (default: True)
         If True, the first data line in each dbd file (and friends) is not read.
 
+    n_threads: int (default: 1)
+        Number of threads used to read the files of a get() request. If
+        larger than 1, files are decoded concurrently by a thread pool
+        (the C extension releases the GIL while decoding) and the
+        results are merged in file order. The default reads the files
+        one at a time.
 
 
     Notes
@@ -1516,8 +2288,10 @@ class MultiDBD(object):
         missions: list[str] = [],
         max_files: int | None = None,
         skip_initial_line: bool = True,
+        n_threads: int = 1,
     ) -> None:
 
+        self.n_threads = n_threads
         self._ignore_cache: list[DBD] = (
             []
         )  # list of files that should be ignored because out of set time limits
@@ -1586,6 +2360,7 @@ class MultiDBD(object):
         include_source: bool = False,
         max_values_to_read: int = -1,
         continue_on_reading_error: bool = False,
+        shared_time: bool = False,
     ) -> Any:
         """Returns time and value tuple(s) for requested parameter(s)
 
@@ -1624,6 +2399,16 @@ class MultiDBD(object):
         continue_on_reading_error : bool, optional
             if True, an exception will be raised when a file cannot be read. Otherwise the file will be ignored.
 
+        shared_time : bool, optional
+            if True, all parameters are returned on a single time
+            axis, as one time vector and a matrix with a column for
+            each parameter (see DBD.get()). All parameters must then
+            come from the same type of file (engineering or science).
+            return_nans and discardBadLatLon are ignored, as with
+            DBD.get().
+            If include_source is True, the list of references has an
+            element for each row.
+
         Returns
         -------
         (ndarray, ndarray) or
@@ -1633,6 +2418,10 @@ class MultiDBD(object):
             for a single parameter, for a single parameter, including source file list, for multiple parameters,
             for multiple parameters, including source file list, respectively.
 
+        (ndarray, ndarray) or ((ndarray, ndarray), list)
+            if shared_time is True: time vector and matrix of values,
+            without and with source file list, respectively.
+
         .. versionchanged:: 0.5.5 For a single parameter request, the number of values to be read can be limited.
 
         .. versionadded:: 0.5.9 Added option (continue_on_reading_error) to control the behaviour when an error is encountered whilst reading a compressed file.
@@ -1683,6 +2472,27 @@ class MultiDBD(object):
                 positions.append(("eng", len(eng_variables)))
                 eng_variables.append(p)
 
+        if shared_time:
+            file_types = set(target for target, _ in positions)
+            if len(file_types) > 1:
+                raise ValueError(
+                    "A shared time axis requires all parameters to come from the same type of file (engineering or science).\n"
+                )
+            if file_types:
+                ft = file_types.pop()
+            else:
+                # none of the parameters has data.
+                ft = "eng" if self.dbds["eng"] else "sci"
+            return self._table_worker(
+                ft,
+                *parameters,
+                decimalLatLon=decimalLatLon,
+                discardBadLatLon=discardBadLatLon,
+                include_source=include_source,
+                max_values_to_read=max_values_to_read,
+                continue_on_reading_error=continue_on_reading_error,
+            )
+
         kwds = dict(
             decimalLatLon=decimalLatLon,
             discardBadLatLon=discardBadLatLon,
@@ -1710,6 +2520,65 @@ class MultiDBD(object):
         else:
             return r
 
+    def get_all(
+        self,
+        decimalLatLon: bool = True,
+        include_source: bool = False,
+        continue_on_reading_error: bool = False,
+    ) -> dict[str, Any]:
+        """Returns the data of all parameters, for each type of file
+
+        Each file is read in a single pass, on a shared time axis (see
+        get() with shared_time=True). Engineering and science files
+        have their own time axis, and are returned separately. Bogus
+        latitude and longitude values are not discarded.
+
+        Parameters
+        ----------
+        decimalLatLon : bool, optional
+            If True (default), latitiude and longitude related parameters are converted to
+            decimal format, as opposed to nmea format.
+
+        include_source : bool, optional
+            If True, the key "source" is added to the columns of each
+            file type, listing for each row the DBD object it
+            originates from.
+
+        continue_on_reading_error : bool, optional
+            if True, an exception will be raised when a file cannot be read. Otherwise the file will be ignored.
+
+        Returns
+        -------
+        dict of dict of ndarray
+            for the file types "eng" and/or "sci", a column of values
+            for each parameter, keyed by parameter name. The columns
+            of a file type share the time axis, which is the column
+            of its time variable (m_present_time or
+            sci_m_present_time). Parameters that are missing from some
+            files are nan for their rows.
+        """
+        r: dict[str, Any] = {}
+        for ft, parameters in self.parameterNames.items():
+            if not parameters:
+                continue
+            data = self._table_worker(
+                ft,
+                *parameters,
+                decimalLatLon=decimalLatLon,
+                discardBadLatLon=False,
+                include_source=include_source,
+                max_values_to_read=-1,
+                continue_on_reading_error=continue_on_reading_error,
+            )
+            if include_source:
+                (_, values), srcs = data
+            else:
+                _, values = data
+            r[ft] = dict((p, values[:, k]) for k, p in enumerate(parameters))
+            if include_source:
+                r[ft]["source"] = srcs
+        return r
+
     def _get_valid_parameters(
         self, parameters: Any, invert: bool = False, global_scope: bool = False
     ) -> list[str]:
@@ -2397,6 +3266,185 @@ class MultiDBD(object):
         parameter_names.sort()
         return parameter_names
 
+    def _get_descriptors(
+        self, dbds: list[DBD], p: tuple[str, ...]
+    ) -> list[tuple[Any, ...]] | None:
+        """Returns the descriptors for _dbdreader.get_many() for the parameters p.
+
+        Returns None if not every file contains all parameters and the
+        time variable; such requests need the per-file handling of
+        DBD._get(). The sensor indices are looked up once per cache
+        file, as all files sharing a cache file have the same layout.
+        """
+        layouts: dict[str, Any] = {}
+        descriptors = []
+        for i in dbds:
+            if i.cacheID not in layouts:
+                names = set(i.parameterNames)
+                if i.timeVariable in names and names.issuperset(p):
+                    ti = i.parameterNames.index(i.timeVariable)
+                    vi = tuple(i.parameterNames.index(_p) for _p in p)
+                    layouts[i.cacheID] = (ti, vi)
+                else:
+                    layouts[i.cacheID] = None
+            layout = layouts[i.cacheID]
+            if layout is None:
+                return None
+            ti, vi = layout
+            descriptors.append(
+                (
+                    i.n_state_bytes,
+                    i.headerInfo["sensors_per_cycle"],
+                    i.fp_binary_start,
+                    i.byteSizes,
+                    i._reader_filename(),
+                    ti,
+                    vi,
+                    int(i.skip_initial_line),
+                )
+            )
+        return descriptors
+
+    def _get_many(
+        self,
+        dbds: list[DBD],
+        descriptors: list[tuple[Any, ...]],
+        p: tuple[str, ...],
+        include_source: bool = False,
+        continue_on_reading_error: bool = False,
+        decimalLatLon: bool = True,
+        discardBadLatLon: bool = True,
+        return_nans: bool = False,
+        max_values_to_read: int = -1,
+        check_for_invalid_parameters: bool = True,
+    ) -> list[Any]:
+        """Reads parameters p from all dbds with a single call to _dbdreader.get_many().
+
+        Returns the same data structure as _worker().
+        """
+        error_nos, r, offsets = _dbdreader.get_many(
+            descriptors, int(return_nans), max_values_to_read
+        )
+        if any(
+            i._evicted_from_cache(error_no, descriptor[4])
+            for i, error_no, descriptor in zip(dbds, error_nos, descriptors)
+        ):
+            # decompressed copies were evicted from the cache by another
+            # reader; decompress them again and read once more.
+            descriptors = [
+                descriptor[:4] + (i._reader_filename(),) + descriptor[5:]
+                for i, descriptor in zip(dbds, descriptors)
+            ]
+            error_nos, r, offsets = _dbdreader.get_many(
+                descriptors, int(return_nans), max_values_to_read
+            )
+        for i, error_no in zip(dbds, error_nos):
+            if error_no:
+                e = i._read_error(error_no)
+                if continue_on_reading_error:
+                    logger.warning(
+                        f"Reading from {i.filename} returned an error ({e.data})."
+                    )
+                else:
+                    raise e
+        if all(error_nos):
+            # nothing has been added, so all files should have returned nothing:
+            raise DbdError(DBD_ERROR_NO_VALID_PARAMETERS, "")
+        nv = len(p)
+        data_arrays: list[Any] = []
+        for k, _p in enumerate(p):
+            t, v, condition = _postprocess_values(
+                _p,
+                numpy.asarray(r[k]),
+                numpy.asarray(r[nv + k]),
+                decimalLatLon=decimalLatLon,
+                discardBadLatLon=discardBadLatLon,
+                return_nans=return_nans,
+            )
+            if not include_source:
+                data_arrays.append((t, v))
+                continue
+            # source of each data point, from the per-file offsets.
+            src_idx = numpy.repeat(numpy.arange(len(dbds)), numpy.diff(offsets[k]))
+            if condition is not None:
+                src_idx = src_idx[condition]
+            data_arrays.append(((t, v), [dbds[j] for j in src_idx]))
+        return data_arrays
+
+    def _readers(
+        self,
+        dbds: list[DBD],
+        p: tuple[str, ...],
+        kwds: dict[str, Any],
+        method: str = "_get",
+    ) -> Iterator[Callable[[], Any]]:
+        """Yields for each dbd, in order, a callable that returns the result of its _get() (or other read) method.
+
+        If self.n_threads > 1, all files are submitted to a thread pool
+        up front, and the callables wait for their respective
+        results. Otherwise, each file is read only when its callable
+        is invoked, so that a caller can stop early (max_values_to_read)
+        or change kwds for subsequent files.
+        """
+        if self.n_threads > 1 and kwds["max_values_to_read"] <= 0:
+            executor = ThreadPoolExecutor(max_workers=self.n_threads)
+            try:
+                futures = [
+                    executor.submit(getattr(i, method), *p, **kwds) for i in dbds
+                ]
+                for future in futures:
+                    yield future.result
+            finally:
+                executor.shutdown(wait=True, cancel_futures=True)
+        else:
+            for i in dbds:
+                yield partial(getattr(i, method), *p, **kwds)
+
+    def _table_worker(
+        self,
+        ft: str,
+        *p: str,
+        include_source: bool = False,
+        continue_on_reading_error: bool = False,
+        **kwds: Any,
+    ) -> Any:
+        """Reads parameters p from the files of type ft on a shared time axis.
+
+        Returns a time vector and matrix of values, stacked for all
+        files, optionally with the list of source files for each row.
+        """
+        dbds = [i for i in self.dbds[ft] if i not in self._ignore_cache]
+        # parameters absent from a file are returned as nans.
+        kwds["check_for_invalid_parameters"] = False
+        ts: list[Any] = []
+        values: list[Any] = []
+        srcs: list[Any] = []
+        rows_read_sofar = 0
+        for i, read in zip(dbds, self._readers(dbds, p, kwds, method="_get_table")):
+            try:
+                t, v = read()
+            except DbdError as e:
+                if e.value == DBD_ERROR_READ_ERROR and continue_on_reading_error:
+                    logger.warning(
+                        f"Reading from {i.filename} returned an error ({e.data})."
+                    )
+                    continue
+                raise e
+            ts.append(t)
+            values.append(v)
+            if include_source:
+                srcs += [i] * len(t)
+            if kwds["max_values_to_read"] > 0:
+                rows_read_sofar += len(t)
+                if rows_read_sofar >= kwds["max_values_to_read"]:
+                    break
+        if not ts:
+            raise DbdError(DBD_ERROR_NO_VALID_PARAMETERS, "")
+        r = (numpy.hstack(ts), numpy.vstack(values))
+        if include_source:
+            return r, srcs
+        return r
+
     def _worker(self, ft: str, *p: str, **kwds: Any) -> list[Any]:
         try:
             include_source = kwds.pop("include_source")
@@ -2407,15 +3455,27 @@ class MultiDBD(object):
         except KeyError:
             continue_on_reading_error = False
 
+        dbds = [i for i in self.dbds[ft] if i not in self._ignore_cache]
+        if self.n_threads <= 1:
+            descriptors = self._get_descriptors(dbds, p)
+            if descriptors:
+                # All files have all parameters: read them in one go.
+                return self._get_many(
+                    dbds,
+                    descriptors,
+                    p,
+                    include_source=include_source,
+                    continue_on_reading_error=continue_on_reading_error,
+                    **kwds,
+                )
+
         data: dict[str, list[Any]] = dict([(k, []) for k in p])
         srcs: dict[str, list[Any]] = dict([(k, []) for k in p])
         error_mesgs: list[Any] = []
         time_values_read_sofar = 0
-        for i in self.dbds[ft]:
-            if i in self._ignore_cache:
-                continue
+        for i, read in zip(dbds, self._readers(dbds, p, kwds)):
             try:
-                t, v = i._get(*p, **kwds)
+                t, v = read()
             except DbdError as e:
                 # ignore only the no_data_to_interpolate_to error
                 # as the file is probably (close to) empty
@@ -1,17 +1,60 @@
+import hashlib
 import os
+import shutil
+import tempfile
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO as ioBytesIO
+from re import fullmatch as re_fullmatch
 from re import search as re_match
-from typing import Any, BinaryIO, Iterator, Literal
-
-import lz4.block  # type: ignore[import-untyped]
+from typing import Any, BinaryIO, Callable, Iterator, Literal
 
 DECOMPRESSION_ERROR_LIST = [
     "NO_ERROR",
     "ERROR_UNEXPECTED_END_OF_FILE",
     "ERROR_FILE_NOT_FOUND",
     "ERROR_FAILED_TO_WRITE_BASE_FILE",
+    "ERROR_BUFFER_TOO_SMALL",
 ]
 
+# The LZ4 decoder of the C extension is used if available, unless the
+# pure python implementation is forced (see dbdreader.py). Otherwise
+# the lz4 package is used.
+_c_decompress_blocks: Callable[[Any], tuple[int, bytes | None]] | None = None
+_c_decompress_blocks_into: Callable[[Any, Any], tuple[int, int]] | None = None
+if os.environ.get("DBDREADER_C_EXTENSION") != "0":
+    try:
+        from _dbdreader import decompress_blocks as _c_decompress_blocks  # type: ignore[import-not-found,no-redef]
+        from _dbdreader import decompress_blocks_into as _c_decompress_blocks_into  # type: ignore[no-redef]
+    except ImportError:
+        pass
+if _c_decompress_blocks is None:
+    import lz4.block  # type: ignore[import-untyped]
+
+
+class DecompressionError(Exception):
+    """Raised when a compressed file cannot be decompressed"""
+
+
+def _decompress_lz4_block(data: bytes | memoryview) -> bytes:
+    # Decompresses a single LZ4 block (without its size field) using
+    # the lz4 package, which releases the GIL.
+    try:
+        b: bytes = lz4.block.decompress(data, Decompressor.CHUNKSIZE)
+    except lz4.block.LZ4BlockError as e:
+        raise DecompressionError(str(e)) from e
+    return b
+
+
+def _decompress_c_blocks(data: bytes | memoryview) -> bytes:
+    # Decompresses a sequence of blocks, each preceded by its size field,
+    # using the C extension.
+    assert _c_decompress_blocks is not None
+    errorno, b = _c_decompress_blocks(data)
+    if errorno != 0 or b is None:
+        raise DecompressionError(DECOMPRESSION_ERROR_LIST[errorno])
+    return b
+
 
 class Decompressor:
     """Class to decompress glider files
@@ -38,6 +81,8 @@ class Decompressor:
     ENDIANESS: Literal["big"] = "big"
     COMPRESSION_FACTOR = 10
     CHUNKSIZE = 1024 * 32
+    BLOCKS_PER_THREAD = 16
+    MAX_THREADS = 8
 
     def __init__(
         self, filename: str | None = None, fp: BinaryIO | None = None
@@ -68,7 +113,10 @@ class Decompressor:
         b: bytes | None
         if sb:
             size = int.from_bytes(sb, Decompressor.ENDIANESS)
-            b = lz4.block.decompress(fp.read(size), Decompressor.CHUNKSIZE)
+            if _c_decompress_blocks is not None:
+                b = _decompress_c_blocks(sb + fp.read(size))
+            else:
+                b = _decompress_lz4_block(fp.read(size))
         else:
             b = None
         return b
@@ -103,9 +151,62 @@ class Decompressor:
             yield block
             counter += counter_increment
 
+    def block_index(self, data: bytes | memoryview) -> list[tuple[int, int]]:
+        """Finds the blocks in compressed data
+
+        Only the size fields of the blocks are read.
+
+        Parameters
+        ----------
+        data : bytes or memoryview
+            compressed data, as read from a compressed file.
+
+        Returns
+        -------
+        list of (int, int):
+            offset and size of each compressed block in data.
+        """
+        index = []
+        position = 0
+        while position < len(data):
+            sb = data[position : position + Decompressor.SIZEFIELDSIZE]
+            size = int.from_bytes(sb, Decompressor.ENDIANESS)
+            position += Decompressor.SIZEFIELDSIZE
+            index.append((position, size))
+            position += size
+        return index
+
+    def _decompress_all_blocks(self, fp: BinaryIO | None = None) -> bytes:
+        fp = fp or self.fp
+        if fp is None:
+            raise ValueError(
+                "Supply a file handler or use this class within a context manager"
+            )
+        if _c_decompress_blocks is not None:
+            return _decompress_c_blocks(fp.read())
+        data = memoryview(fp.read())
+        index = self.block_index(data)
+        n_threads = min(
+            len(index) // Decompressor.BLOCKS_PER_THREAD,
+            os.cpu_count() or 1,
+            Decompressor.MAX_THREADS,
+        )
+
+        def decompress_block(block: tuple[int, int]) -> bytes:
+            offset, size = block
+            return _decompress_lz4_block(data[offset : offset + size])
+
+        if n_threads > 1:
+            # lz4 releases the GIL while decompressing a block.
+            with ThreadPoolExecutor(max_workers=n_threads) as executor:
+                return b"".join(executor.map(decompress_block, index))
+        return b"".join([decompress_block(block) for block in index])
+
     def decompress(self, fp: BinaryIO | None = None) -> bytes:
         """Decompresses a an entire file (in memory)
 
+        Large files are decompressed by several threads.
+
         Parameters
         ----------
         fp : file descriptor or None
@@ -116,15 +217,78 @@ class Decompressor:
         bytes:
             decompressed file data as bytes
         """
+        return self._decompress_all_blocks(fp)
+
+    def decompress_into(
+        self, buffer: bytearray, fp: BinaryIO | None = None
+    ) -> memoryview:
+        """Decompresses an entire file into a buffer
+
+        The blocks are decoded one after another into buffer, which is
+        grown as needed to hold all blocks. The buffer is not shrunk,
+        so that it can be reused for other files without reallocating
+        it. The decoder of the C extension writes each block straight
+        into buffer. The lz4 package cannot decode into a given buffer,
+        so without the C extension each block is decoded into a
+        temporary of at most CHUNKSIZE bytes, which is then copied.
+
+        Parameters
+        ----------
+        buffer : bytearray
+            buffer to write the decompressed data into.
+        fp : file descriptor or None
+            file descriptor to use. If None (default), the file descriptor assigned by the constructor is used.
+
+        Returns
+        -------
+        memoryview:
+            view of the decompressed data, which can be passed to
+            numpy.frombuffer without copying.
+        """
         fp = fp or self.fp
         if fp is None:
             raise ValueError(
                 "Supply a file handler or use this class within a context manager"
             )
-        data = b""
-        for block in self.decompressed_blocks(fp=fp):
-            data += block
-        return data
+        if _c_decompress_blocks_into is not None:
+            compressed = fp.read()
+            errorno, size = _c_decompress_blocks_into(compressed, buffer)
+            if DECOMPRESSION_ERROR_LIST[errorno] == "ERROR_BUFFER_TOO_SMALL":
+                buffer.extend(bytes(size - len(buffer)))
+                errorno, size = _c_decompress_blocks_into(compressed, buffer)
+            if errorno != 0:
+                raise DecompressionError(DECOMPRESSION_ERROR_LIST[errorno])
+            return memoryview(buffer)[:size]
+        data = memoryview(fp.read())
+        index = self.block_index(data)
+        # each block decompresses to at most CHUNKSIZE bytes.
+        capacity = len(index) * Decompressor.CHUNKSIZE
+        if capacity > len(buffer):
+            buffer.extend(bytes(capacity - len(buffer)))
+        n_threads = min(
+            len(index) // Decompressor.BLOCKS_PER_THREAD,
+            os.cpu_count() or 1,
+            Decompressor.MAX_THREADS,
+        )
+
+        def decompress_block(block: tuple[int, int]) -> bytes:
+            offset, size = block
+            return _decompress_lz4_block(data[offset : offset + size])
+
+        def copy_blocks(blocks: Iterator[bytes]) -> int:
+            size = 0
+            for block in blocks:
+                buffer[size : size + len(block)] = block
+                size += len(block)
+            return size
+
+        if n_threads > 1:
+            # lz4 releases the GIL while decompressing a block.
+            with ThreadPoolExecutor(max_workers=n_threads) as executor:
+                size = copy_blocks(executor.map(decompress_block, index))
+        else:
+            size = copy_blocks(map(decompress_block, index))
+        return memoryview(buffer)[:size]
 
 
 class FileDecompressor:
@@ -159,6 +323,10 @@ class FileDecompressor:
     def decompress(self, filename: str) -> str:
         """Decompresses a file
 
+        If a decompressed file cache is in use (see
+        DecompressedFileCache), the decompressed copy in the cache is
+        used.
+
         Parameters
         ----------
         filename : str
@@ -171,17 +339,333 @@ class FileDecompressor:
 
         """
         output_filename = self._generate_filename_for_output(filename)
-        with Decompressor(filename) as d, open(output_filename, "wb") as fp_out:
-            for block in d.decompressed_blocks():
-                fp_out.write(block)
+        cached_filename = DecompressedFileCache.lookup(filename)
+        fp_in: BinaryIO | None = None
+        if cached_filename is not None:
+            try:
+                fp_in = open(cached_filename, "rb")
+            except FileNotFoundError:
+                # evicted by another reader since the lookup.
+                pass
+        with open(output_filename, "wb") as fp_out:
+            if fp_in is not None:
+                with fp_in:
+                    shutil.copyfileobj(fp_in, fp_out)
+            else:
+                with Decompressor(filename) as d:
+                    for block in d.decompressed_blocks():
+                        fp_out.write(block)
         return output_filename
 
 
+class DecompressedFileCache:
+    """Cache of decompressed glider data files
+
+    Every read of a compressed file decompresses it in full. When a
+    cache directory is set, compressed files are decompressed once
+    into this directory, and subsequent reads, by either binary reader
+    and by FileDecompressor, use the decompressed copy. Entries are
+    keyed by the path, size and modification time of the compressed
+    file, so that a file that has changed is decompressed again. When
+    the cache grows beyond max_size bytes, the least recently used
+    files are removed.
+
+    The cache is not used unless a cache directory is set.
+
+    Examples
+    --------
+
+    >>> DecompressedFileCache.set_cachedir("/tmp/dbdreader", max_size=2**30)
+
+    >>> DecompressedFileCache.set_cachedir(None) # stops using the cache.
+    """
+
+    CACHEDIR: str | None = None
+    MAX_SIZE: int = 2**30
+    # names of the files in the cache: the sha1 key and an extension
+    ENTRY_PATTERN = r"[0-9a-f]{40}\.\w{3}"
+
+    @classmethod
+    def set_cachedir(cls, path: str | None, max_size: int | None = None) -> None:
+        """Sets the cache directory
+
+        Parameters
+        ----------
+        path : str or None
+            path to the cache directory, which is created if
+            needed. If None, the cache is not used.
+
+        max_size : int or None
+            maximum size of the cache in bytes. If None, the current
+            setting (default 1 GiB) is kept.
+        """
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+        cls.CACHEDIR = path
+        if max_size is not None:
+            cls.MAX_SIZE = max_size
+
+    @classmethod
+    def lookup(cls, filename: str) -> str | None:
+        """Returns the decompressed copy of a compressed file in the cache
+
+        The file is decompressed into the cache if it is not there yet.
+
+        Parameters
+        ----------
+        filename : str
+            (compressed) filename
+
+        Returns
+        -------
+        str or None
+            name of the decompressed file, or None if no cache is used.
+
+        Raises
+        ------
+            DecompressionError (or OSError) if the file cannot be
+            decompressed (or read).
+        """
+        if cls.CACHEDIR is None:
+            return None
+        st = os.stat(filename)
+        key = hashlib.sha1(
+            f"{os.path.abspath(filename)}:{st.st_size}:{st.st_mtime_ns}".encode()
+        ).hexdigest()
+        _, ext = os.path.splitext(FileDecompressor()._generate_filename_for_output(filename))
+        cached_filename = os.path.join(cls.CACHEDIR, key + ext)
+        try:
+            os.utime(cached_filename)  # marks it as recently used
+            return cached_filename
+        except FileNotFoundError:
+            pass
+        fd, tmp_filename = tempfile.mkstemp(dir=cls.CACHEDIR, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as fp_out, Decompressor(filename) as d:
+                for block in d.decompressed_blocks():
+                    fp_out.write(block)
+            # no reader ever sees a partially written file.
+            os.replace(tmp_filename, cached_filename)
+        except BaseException:
+            os.unlink(tmp_filename)
+            raise
+        cls._evict(keep=cached_filename)
+        return cached_filename
+
+    @classmethod
+    def _evict(cls, keep: str) -> None:
+        """Removes the least recently used files until the cache fits in MAX_SIZE.
+
+        Only files written by the cache are considered, so other files
+        in the cache directory are left alone.
+        """
+        assert cls.CACHEDIR is not None
+        entries = []
+        for entry in os.scandir(cls.CACHEDIR):
+            if entry.is_file() and re_fullmatch(cls.ENTRY_PATTERN, entry.name):
+                st = entry.stat()
+                entries.append((st.st_mtime_ns, st.st_size, entry.path))
+        size = sum(e[1] for e in entries)
+        for _, entry_size, path in sorted(entries):
+            if size <= cls.MAX_SIZE:
+                break
+            if path == keep:
+                continue
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass  # removed by another process
+            size -= entry_size
+
+
 def decompress_file(filename: str) -> str:
     """Decompreses a glider data file and writes the normal binary file."""
     return FileDecompressor().decompress(filename)
 
 
+def decompress_files(
+    filenames: list[str],
+    n_workers: int | None = None,
+    skip_if_up_to_date: bool = True,
+) -> list[str | Exception]:
+    """Decompresses glider data files and writes the normal binary files.
+
+    The files are decompressed by a pool of threads.
+
+    Parameters
+    ----------
+    filenames : list of str
+        (compressed) filenames
+    n_workers : int or None
+        number of threads. If None (default), the number of CPUs is used.
+    skip_if_up_to_date : bool
+        if True (default), a file is not decompressed if its
+        decompressed file exists and is not older than the compressed
+        file.
+
+    Returns
+    -------
+    list of str or Exception:
+        for each file, the uncompressed filename, or the exception
+        raised when the file could not be decompressed.
+    """
+    file_decompressor = FileDecompressor()
+
+    def decompress(filename: str) -> str | Exception:
+        try:
+            if skip_if_up_to_date:
+                output_filename = file_decompressor._generate_filename_for_output(filename)
+                try:
+                    if os.path.getmtime(output_filename) >= os.path.getmtime(filename):
+                        return output_filename
+                except FileNotFoundError:
+                    pass
+            return file_decompressor.decompress(filename)
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=n_workers or os.cpu_count()) as executor:
+        return list(executor.map(decompress, filenames))
+
+
+class Compressor:
+    """Class to compress glider files
+
+    Data are compressed in the format written by the gliders: blocks of
+    at most CHUNKSIZE bytes are compressed into LZ4 blocks, each of
+    which is preceded by its size (2 bytes, big endian). Large data are
+    compressed by several threads.
+
+    Parameters
+    ----------
+    high_compression : bool
+        if True, the (slower) high compression mode of LZ4 is used. The
+        data are decompressed equally fast.
+
+    >>> data = Compressor().compress(data)
+    """
+
+    BLOCKS_PER_THREAD = 16
+    MAX_THREADS = 8
+
+    def __init__(self, high_compression: bool = False) -> None:
+        self.high_compression = high_compression
+
+    def _compress_block(self, block: bytes | memoryview) -> bytes:
+        # lz4 is a dependency even if the C extension decompresses.
+        import lz4.block
+
+        mode = "high_compression" if self.high_compression else "default"
+        b: bytes = lz4.block.compress(block, mode=mode, store_size=False)
+        return len(b).to_bytes(Decompressor.SIZEFIELDSIZE, Decompressor.ENDIANESS) + b
+
+    def compressed_blocks(self, data: bytes | memoryview) -> Iterator[bytes]:
+        """Generator that returns compressed data blocks
+
+        Parameters
+        ----------
+        data : bytes or memoryview
+            data to compress
+
+        Yields
+        ------
+        bytes:
+             compressed data block, preceded by its size.
+        """
+        data = memoryview(data)
+        blocks = [
+            data[i : i + Decompressor.CHUNKSIZE]
+            for i in range(0, len(data), Decompressor.CHUNKSIZE)
+        ]
+        n_threads = min(
+            len(blocks) // Compressor.BLOCKS_PER_THREAD,
+            os.cpu_count() or 1,
+            Compressor.MAX_THREADS,
+        )
+        if n_threads > 1:
+            # lz4 releases the GIL while compressing a block.
+            with ThreadPoolExecutor(max_workers=n_threads) as executor:
+                yield from executor.map(self._compress_block, blocks)
+        else:
+            for block in blocks:
+                yield self._compress_block(block)
+
+    def compress(self, data: bytes | memoryview) -> bytes:
+        """Compresses data (in memory)
+
+        Parameters
+        ----------
+        data : bytes or memoryview
+            data to compress
+
+        Returns
+        -------
+        bytes:
+            compressed data as bytes
+        """
+        return b"".join(self.compressed_blocks(data))
+
+
+class FileCompressor:
+    """Class that provides an easy way to compress a glider data file
+    into a file as written by the gliders.
+
+    The factual compressing is done by the compress method.
+
+    Example
+    -------
+
+    >>> FileCompressor().compress("01600000.dbd")
+
+    which would result in the writing of a compressed file 01600000.dcd.
+
+    """
+
+    def __init__(self, high_compression: bool = False) -> None:
+        self.compressor = Compressor(high_compression)
+
+    def _generate_filename_for_output(self, filename: str) -> str:
+        base, ext = os.path.splitext(filename)
+        if len(ext) != 4:
+            raise ValueError("Unhandled file extension.")
+        if ext.endswith("lg"):
+            s = "cg"
+        elif ext.endswith("bd"):
+            s = "cd"
+        elif ext.endswith("ac"):
+            s = "cc"
+        else:
+            raise ValueError("Unhandled file extension.")
+        return "".join((base, ext[:-2], s))
+
+    def compress(self, filename: str) -> str:
+        """Compresses a file
+
+        Parameters
+        ----------
+        filename : str
+            (uncompressed) filename
+
+        Returns
+        -------
+        str:
+            compressed filename
+
+        """
+        output_filename = self._generate_filename_for_output(filename)
+        with open(filename, "rb") as fp_in:
+            data = fp_in.read()
+        with open(output_filename, "wb") as fp_out:
+            for block in self.compressor.compressed_blocks(data):
+                fp_out.write(block)
+        return output_filename
+
+
+def compress_file(filename: str, high_compression: bool = False) -> str:
+    """Compresses a glider data file and writes the compressed file."""
+    return FileCompressor(high_compression).compress(filename)
+
+
 def is_compressed(filename: str) -> bool:
     """Checks whether a filename indicates an lz4-compressed glider data file.
 
@@ -260,11 +744,16 @@ class BytesIORW:
 class CompressedFile:
     """Class to access a compressed file, providing a method
 
-    readline() that returns a decompressed line of data. The compressed
-    file is read block by block, as long as needed.
+    readline() that returns a decompressed line of data, and methods
+    read(), seek() and tell() that work on the decompressed data.
 
-    The main reason for the class is to be able to read the header of a compressed
-    glider data file.
+    Blocks are decompressed only when data in them is read. The
+    position of every block that has been decompressed is kept, so
+    that any block can be decompressed again later on, without
+    decompressing the blocks before it. Only the MAX_CACHED_BLOCKS
+    most recently used blocks are kept in memory. Reading the header of
+    a compressed glider data file therefore decompresses the first
+    block or two only.
 
     Parameters
     ----------
@@ -273,20 +762,95 @@ class CompressedFile:
         be used within a context manager, which opens the file.
     """
 
+    MAX_CACHED_BLOCKS = 4
+
     def __init__(self, filename: str) -> None:
         self.filename = filename
         self.decompressor = Decompressor()
-        self.bytesIO: BytesIORW | None = None
 
     def __enter__(self, *p: Any, **kwds: Any) -> "CompressedFile":
         self.fp = open(self.filename, "rb")
-        source = self.decompressor.decompressed_blocks(fp=self.fp)
-        self.bytesIO = BytesIORW(source)
+        # (compressed offset, compressed size) and decompressed start of
+        # each block found so far.
+        self._blocks: list[tuple[int, int]] = []
+        self._starts: list[int] = [0]
+        self._next_block = 0  # compressed offset of the next block to find
+        self._at_end = False
+        self._cache: dict[int, bytes] = {}
+        self._position = 0
         return self
 
     def __exit__(self, *p: Any, **kwds: Any) -> None:
         self.fp.close()
 
+    def _find_next_block(self) -> bool:
+        # Decompresses the block after the last one found, to learn
+        # where the block after it starts in the decompressed data.
+        if self._at_end:
+            return False
+        self.fp.seek(self._next_block)
+        sb = self.fp.read(Decompressor.SIZEFIELDSIZE)
+        if not sb:
+            self._at_end = True
+            return False
+        size = int.from_bytes(sb, Decompressor.ENDIANESS)
+        self._blocks.append((self._next_block + Decompressor.SIZEFIELDSIZE, size))
+        self._next_block += Decompressor.SIZEFIELDSIZE + size
+        block = self._block(len(self._blocks) - 1)
+        self._starts.append(self._starts[-1] + len(block))
+        return True
+
+    def _block(self, i: int) -> bytes:
+        # Returns decompressed block i, from the cache if possible.
+        try:
+            block = self._cache.pop(i)
+        except KeyError:
+            offset, size = self._blocks[i]
+            if _c_decompress_blocks is not None:
+                self.fp.seek(offset - Decompressor.SIZEFIELDSIZE)
+                block = _decompress_c_blocks(self.fp.read(Decompressor.SIZEFIELDSIZE + size))
+            else:
+                self.fp.seek(offset)
+                block = _decompress_lz4_block(self.fp.read(size))
+            if len(self._cache) >= CompressedFile.MAX_CACHED_BLOCKS:
+                del self._cache[next(iter(self._cache))]  # least recently used
+        self._cache[i] = block
+        return block
+
+    def _locate(self, position: int) -> int:
+        # Returns the index of the block holding position, or the
+        # number of blocks if position is at or beyond the end of file.
+        while position >= self._starts[-1] and self._find_next_block():
+            pass
+        return bisect_right(self._starts, position) - 1
+
+    def read(self, size: int = -1) -> bytes:
+        """Reads and decompresses data from the file.
+
+        Parameters
+        ----------
+        size : int
+            number of bytes to read. If negative (default), the file is
+            read to the end.
+
+        Returns
+        -------
+        bytes
+            decompressed data; fewer than size bytes at the end of file.
+        """
+        chunks = []
+        while size != 0:
+            i = self._locate(self._position)
+            if i >= len(self._blocks):
+                break
+            block = self._block(i)
+            j = self._position - self._starts[i]
+            chunk = block[j:] if size < 0 else block[j : j + size]
+            chunks.append(chunk)
+            self._position += len(chunk)
+            size -= len(chunk) if size > 0 else 0
+        return b"".join(chunks)
+
     def readline(self) -> bytes:
         """Reads and decompresses a single line from the file.
 
@@ -295,9 +859,20 @@ class CompressedFile:
         bytes
             a single decompressed line, or an empty bytes object at end of file.
         """
-        assert self.bytesIO is not None
-        line = self.bytesIO.readline()
-        return line
+        chunks = []
+        while True:
+            i = self._locate(self._position)
+            if i >= len(self._blocks):
+                break
+            block = self._block(i)
+            j = self._position - self._starts[i]
+            k = block.find(b"\n", j)
+            chunk = block[j:] if k == -1 else block[j : k + 1]
+            chunks.append(chunk)
+            self._position += len(chunk)
+            if k != -1:
+                break
+        return b"".join(chunks)
 
     def readlines(self) -> Iterator[bytes]:
         """Generator that reads and decompresses the file line by line.
@@ -313,26 +888,41 @@ class CompressedFile:
                 break
             yield line
 
-    def seek(self, offset: int) -> int:
-        """Sets the read position in the (decompressed, buffered) data.
+    def seek(self, offset: int, whence: int = 0) -> int:
+        """Sets the read position in the decompressed data.
 
         Parameters
         ----------
         offset : int
-            absolute byte position to seek to.
+            byte position to seek to.
+        whence : int
+            0 (default): relative to the start of the data, 1: relative
+            to the current position, 2: relative to the end of the
+            data, which requires the whole file to be decompressed
+            once.
+
+        Returns
+        -------
+        int
+            the new absolute position.
         """
-        assert self.bytesIO is not None
-        return self.bytesIO.bytesIO.seek(offset)
+        if whence == 1:
+            offset += self._position
+        elif whence == 2:
+            while self._find_next_block():
+                pass
+            offset += self._starts[-1]
+        self._position = max(offset, 0)
+        return self._position
 
     def tell(self) -> int:
-        """Returns the current read position in the (decompressed, buffered) data.
+        """Returns the current read position in the decompressed data.
 
         Returns
         -------
         int
         """
-        assert self.bytesIO is not None
-        return self.bytesIO.bytesIO.tell()
+        return self._position
 
     def close(self) -> None:
         """Closes the underlying compressed file."""
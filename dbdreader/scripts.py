@@ -87,6 +87,7 @@ def dbdrename():
     parser.add_argument('-x', '--decompress', action='store_true', help='Decompresses LZ4 comrpessed files.')
     parser.add_argument('-X', '--decompressAndRemoveCompressed', action='store_true', help='Decompresses LZ4 comrpessed files, and removes the compressed file')
     parser.add_argument('-d', '--doNotChangeNameFormat', action='store_true', help='Does not change the filename format. (Only useful in combination with -x or -X)')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='Number of files to decompress in parallel. (Only useful in combination with -x or -X)')
 
 
 
@@ -96,6 +97,7 @@ def dbdrename():
     if args.doNotChangeNameFormat:
         args.s=False
 
+    to_decompress = []
     for i in args.filenames:
         if not os.path.exists(i):
             print(f"{i} does not exist. Ignoring.")
@@ -154,19 +156,24 @@ def dbdrename():
                 if R!=0:
                     raise ValueError("Could not execute %s"%(command))
                 if args.decompress or args.decompressAndRemoveCompressed:
-                    try:
-                        target = dbdreader.decompress.decompress_file(new_filename)
-                    except Exception as e:
-                        msg = e
-                    else:
-                        if args.decompressAndRemoveCompressed:
-                            os.unlink(new_filename)
-                            msg = f"{msg} {target}"
-                        else:
-                            msg = f"{msg} {target}/{new_filename}"
+                    # decompressed below, all files at once
+                    to_decompress.append((msg, new_filename))
                 else:
                     msg = f"{msg} {target}"
-                print(msg)
+                    print(msg)
+
+    targets = dbdreader.decompress.decompress_files([f for _, f in to_decompress],
+                                                    n_workers=args.jobs,
+                                                    skip_if_up_to_date=False)
+    for (msg, new_filename), target in zip(to_decompress, targets):
+        if isinstance(target, Exception):
+            msg = target
+        elif args.decompressAndRemoveCompressed:
+            os.unlink(new_filename)
+            msg = f"{msg} {target}"
+        else:
+            msg = f"{msg} {target}/{new_filename}"
+        print(msg)
 
 
 ''' =====================================================================================================
@@ -2,10 +2,19 @@
 #include <stdlib.h>
 #include <string.h>
 #include <math.h>
+#ifndef _WIN32
+#include <fcntl.h>
+#include <unistd.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#endif
 
 #include "dbdreader.h"
 #include "decompress.h"
 
+/* increment (bytes) by which a buffer grows when reading a stream */
+#define READ_BLOCKSIZE (1024*1024)
+
 /*
   bswap_ = functions for swapping the byte-order of shorts, floats and doubles
 */
@@ -16,28 +25,81 @@ static float bswap_f(float val);
 
 static double bswap_d(double val);
 
-static unsigned char read_known_cycle(FILE *fd);
+static int map_file(const char *filename, dbd_buffer_t *buffer);
 
-static int read_state_bytes(int *vi,
-			    int nvt,
-			    int *lookup,
-			    file_info_t FileInfo,
+static int read_stream_into_buffer(FILE *fp, dbd_buffer_t *buffer);
+
+static unsigned char read_known_cycle(const unsigned char *known_cycle);
+
+/* Tables to decode the state bytes of a cycle for the variables vi
+   (sorted), with one lookup per state byte and one per variable. */
+typedef struct {
+  int n_state_bytes;
+  unsigned char *chunk_lut; /* [n_state_bytes][256]: number of data bytes
+			       of the updated sensors of a state byte */
+  int nv;
+  int *byte_position;       /* state byte holding each variable */
+  signed char *field_lut;   /* [nv][256]: offset of the variable within the
+			       data of its state byte if updated, -1 if
+			       same and -2 if not set */
+} state_decoder_t;
+
+static state_decoder_t *new_state_decoder(int *vi, int nv, file_info_t FileInfo);
+
+static void free_state_decoder(state_decoder_t *decoder);
+
+static int read_state_bytes(const unsigned char *state_bytes,
+			    state_decoder_t *decoder,
 			    signed *offsets,
 			    unsigned *chunksize);
 
-static void get_by_read_per_byte(int ti,
-				 int *vi,
-				 int nv,
-				 file_info_t FileInfo,
-				 int return_nans,
-				 double ***data,
-				 int *ndata,
-				 int skip_initial_line,
-				 int max_values_to_read);
-
-static double extract_sensor_value(unsigned char *buf,
+static void get_from_buffer(int ti,
+			    int *vi,
+			    int nv,
+			    file_info_t FileInfo,
+			    int return_nans,
+			    double ***data,
+			    int *ndata,
+			    int skip_initial_line,
+			    int max_values_to_read,
+			    double t_min,
+			    double t_max,
+			    table_t *table,
+			    int *columns,
+			    int *capacity);
+
+static int *insert_time_index(int ti, int *vi, int nv, int *nti);
+
+static void add_table_row(table_t *table,
+			  double t,
+			  double *row_values,
+			  int *columns,
+			  int nv);
+
+static int first_cycle_in_window(file_info_t FileInfo, double t_min);
+
+static int valid_cycle_index(file_info_t FileInfo);
+
+static void seed_last_updates(int k0,
+			      int nv,
+			      state_decoder_t *decoder,
+			      file_info_t FileInfo,
+			      const unsigned char **last_update);
+
+static double extract_sensor_value(const unsigned char *buf,
 				   int bs, unsigned char flip);
 
+static int buffer_holds(const dbd_buffer_t *buffer, size_t pos, size_t n);
+
+static const unsigned char *buffer_range(const dbd_buffer_t *buffer, size_t pos, size_t n);
+
+static void extract_pending(int nv,
+			    const unsigned char **last_update,
+			    int *pending,
+			    unsigned *byteSizes,
+			    unsigned char flip,
+			    double *memory_result);
+
 static void add_to_array(double t,
 			 double x,
 			 double **r,
@@ -47,27 +109,83 @@ static void add_to_array(double t,
 
 /* Public functions */
 
-FILE *open_dbd_file(char *filename, int* errorno)
+/* Opens filename for reading. If stream is set, a compressed file is
+   decompressed a block at a time as it is read, rather than as a
+   whole, which requires the file to be read from start to end. */
+int open_dbd_file(char *filename, dbd_buffer_t *buffer, int stream)
 {
-  FILE *fd;
+  int errorno=NO_ERROR;
+  dbd_stream_t *s;
+
+  buffer->data=NULL;
+  buffer->size=0;
+  buffer->is_mapped=0;
+  buffer->stream=NULL;
 
   const int compressed = is_file_compressed(filename);
 
-  if (compressed){
-    fd=fopen_compressed_file(filename, errorno);
+  if (compressed && stream){
+    s=(dbd_stream_t *)malloc(sizeof(dbd_stream_t));
+    if (s==NULL){
+      printf("Memory fault!\n");
+      exit(1);
+    }
+    s->blocks=open_block_stream(filename, &errorno);
+    s->data=NULL;
+    s->start=0;
+    s->size=0;
+    s->capacity=0;
+    s->errorno=NO_ERROR;
+    if (s->blocks==NULL)
+      free(s);
+    else
+      buffer->stream=s;
+  }
+  else if (compressed){
+    errorno=decompress_file_to_buffer(filename, &buffer->data, &buffer->size);
   }
   else{
-    fd=fopen(filename,"rb");
-    if (fd==NULL){
-      *errorno=ERROR_FILE_NOT_FOUND;
-    }
+    errorno=map_file(filename, buffer);
   }
-  return(fd);
+  return errorno;
 }
 
-void close_dbd_file(FILE *fd)
+/* Releases the buffer. Returns the error, if any, that occurred while
+   decompressing a streamed file. */
+int close_dbd_file(dbd_buffer_t *buffer)
 {
-  fclose(fd);
+  int errorno=NO_ERROR;
+  size_t n_read;
+
+  if (buffer->stream!=NULL){
+    /* a file that is not read to the end is checked for errors
+       nevertheless, as when it is decompressed as a whole. */
+    if (buffer->stream->capacity<CHUNKSIZE){
+      free(buffer->stream->data);
+      buffer->stream->data=(unsigned char *)malloc(CHUNKSIZE);
+      buffer->stream->capacity=CHUNKSIZE;
+    }
+    while ((buffer->stream->errorno==NO_ERROR) && (buffer->stream->data!=NULL)){
+      buffer->stream->errorno=read_block(buffer->stream->blocks, buffer->stream->data, &n_read);
+      if (n_read==0)
+	break;
+    }
+    errorno=buffer->stream->errorno;
+    close_block_stream(buffer->stream->blocks);
+    free(buffer->stream->data);
+    free(buffer->stream);
+  }
+#ifndef _WIN32
+  if (buffer->is_mapped)
+    munmap(buffer->data, buffer->size);
+  else
+#endif
+    free(buffer->data);
+  buffer->data=NULL;
+  buffer->size=0;
+  buffer->is_mapped=0;
+  buffer->stream=NULL;
+  return errorno;
 }
 
 double ***get_variable(int ti,
@@ -77,7 +195,9 @@ double ***get_variable(int ti,
 		       int return_nans,
 		       int *ndata,
 		       int skip_initial_line,
-		       int max_values_to_read)
+		       int max_values_to_read,
+		       double t_min,
+		       double t_max)
 {
   int i,j;
   double ***data;
@@ -86,7 +206,6 @@ double ***get_variable(int ti,
   int nti;
 
   nvt=nv+1;
-  vit=(int *)malloc(nvt*sizeof(int));
 
   /*create an array of pointers of nv layers, 2 rows, BLOCKSIZE columns*/
   data=(double ***)malloc(nv*sizeof(double **));
@@ -102,24 +221,164 @@ double ***get_variable(int ti,
     exit(1);
   }
 
-  /* insert ti in vi such that vi remains sorted. */
-  for(i=0;i<nv;i++){
-    if(vi[i]>ti){
-      break;
-    }
-    vit[i]=vi[i];
-  }
-  vit[i]=ti; /*inserts ti*/
-  nti=i; /* ti is the nti'th variable */
-  i++;
-  for(i=i;i<nv+1;i++){
-    vit[i]=vi[i-1];
-  }
-  get_by_read_per_byte(nti,vit,nvt,FileInfo,return_nans,data,ndata, skip_initial_line, max_values_to_read);
+  vit=insert_time_index(ti, vi, nv, &nti);
+  get_from_buffer(nti,vit,nvt,FileInfo,return_nans,data,ndata, skip_initial_line, max_values_to_read,
+		  t_min, t_max, NULL, NULL, NULL);
   free(vit);
   return(data);
 }
 
+/* Counts the number of values get_variable() would return for each of
+   the variables vi (sorted), without storing them, so that a caller
+   can allocate its output arrays once. The counts are returned in
+   ndata. */
+void count_variable(int ti,
+		    int *vi,
+		    int nv,
+		    file_info_t FileInfo,
+		    int return_nans,
+		    int *ndata,
+		    int skip_initial_line,
+		    int max_values_to_read,
+		    double t_min,
+		    double t_max)
+{
+  int *vit;
+  int nti;
+
+  vit=insert_time_index(ti, vi, nv, &nti);
+  get_from_buffer(nti,vit,nv+1,FileInfo,return_nans,NULL,ndata, skip_initial_line, max_values_to_read,
+		  t_min, t_max, NULL, NULL, NULL);
+  free(vit);
+}
+
+/* As get_variable(), but writes the time stamps and values of variable
+   vi[i] to the caller-provided arrays data[i][0] and data[i][1], which
+   hold room for capacity[i] values each. Values that do not fit are
+   counted in ndata, but not written. */
+void get_variable_into(int ti,
+		       int *vi,
+		       int nv,
+		       file_info_t FileInfo,
+		       int return_nans,
+		       double ***data,
+		       int *capacity,
+		       int *ndata,
+		       int skip_initial_line,
+		       int max_values_to_read,
+		       double t_min,
+		       double t_max)
+{
+  int *vit;
+  int nti;
+
+  vit=insert_time_index(ti, vi, nv, &nti);
+  get_from_buffer(nti,vit,nv+1,FileInfo,return_nans,data,ndata, skip_initial_line, max_values_to_read,
+		  t_min, t_max, NULL, NULL, capacity);
+  free(vit);
+}
+
+/* Reads the variables vi (sorted) into a table with one row per cycle
+   and a single time column. columns[i] is the column of the table to
+   which variable vi[i] is written; columns of the table that no
+   variable is written to are NaN. Values that are not set are
+   FILLVALUE, as for get_variable() with return_nans set. The caller
+   sets table->n_columns, and frees table->t and table->values. */
+int get_table(int ti,
+	      int *vi,
+	      int *columns,
+	      int nv,
+	      file_info_t FileInfo,
+	      int skip_initial_line,
+	      int max_values_to_read,
+	      double t_min,
+	      double t_max,
+	      table_t *table)
+{
+  int i;
+  int *vit;
+  int *columnst;
+  int nti;
+
+  vit=insert_time_index(ti, vi, nv, &nti);
+  /* the time variable itself is not written to a column */
+  columnst=(int *)malloc((nv+1)*sizeof(int));
+  for(i=0;i<nv+1;i++)
+    columnst[i]=(i<nti)? columns[i] : ((i==nti)? -1 : columns[i-1]);
+
+  table->n_rows=0;
+  table->capacity=BLOCKSIZE;
+  table->t=(double *)malloc(table->capacity*sizeof(double));
+  table->values=(double *)malloc((size_t) table->capacity*table->n_columns*sizeof(double));
+  if ((table->t==NULL) || ((table->values==NULL) && (table->n_columns>0))){
+    printf("Memory fault!\n");
+    exit(1);
+  }
+  get_from_buffer(nti,vit,nv+1,FileInfo,1,NULL,NULL, skip_initial_line, max_values_to_read,
+		  t_min, t_max, table, columnst, NULL);
+  free(vit);
+  free(columnst);
+  return 0;
+}
+
+/* Walks the chain of cycles once and records for each cycle the
+   position of its state bytes (index[0]) and the value of the time
+   variable ti (index[1]). Time values are carried forward when not
+   updated, and NaN when not set. */
+double **get_cycle_index(int ti,
+			 file_info_t FileInfo,
+			 int *n_cycles)
+{
+  double **index;
+  state_decoder_t *decoder;
+  signed offset;
+  unsigned chunksize;
+  double t;
+  double t_last=NAN;
+  const unsigned char *cycle;
+  size_t n_state_bytes=(size_t) FileInfo.n_state_bytes;
+  size_t pos;
+  unsigned char flip;
+
+  index=(double **)malloc(2*sizeof(double *));
+  if (index==NULL){
+    printf("Memory fault!\n");
+    exit(1);
+  }
+  index[0]=(double *)malloc(BLOCKSIZE*sizeof(double));
+  index[1]=(double *)malloc(BLOCKSIZE*sizeof(double));
+  *n_cycles=0;
+  if (FileInfo.bin_offset<0)
+    return(index);
+  cycle=buffer_range(&FileInfo.buffer, (size_t) FileInfo.bin_offset, 17);
+  if (cycle==NULL)
+    return(index);
+
+  decoder=new_state_decoder(&ti, 1, FileInfo);
+  flip=read_known_cycle(cycle);
+  pos=(size_t) FileInfo.bin_offset+17;
+  while ((cycle=buffer_range(&FileInfo.buffer, pos, n_state_bytes))!=NULL){
+    read_state_bytes(cycle,decoder,&offset,&chunksize);
+    cycle=buffer_range(&FileInfo.buffer, pos, n_state_bytes+chunksize);
+    if (cycle==NULL)
+      break; /* truncated cycle at the end of the file */
+    if (offset>=0){
+      t=extract_sensor_value(cycle+n_state_bytes+offset,
+			     FileInfo.byteSizes[ti], flip);
+      t_last=t;
+    }
+    else if (offset==-1)
+      t=t_last;
+    else
+      t=NAN;
+    add_to_array((double) pos, t, index, *n_cycles);
+    *n_cycles+=1;
+    pos+=n_state_bytes+chunksize+1;
+  }
+  free_state_decoder(decoder);
+  return(index);
+}
+
 
 /*   PRIVATE FUNCTIONS  */
 
@@ -156,30 +415,92 @@ static double bswap_d(double val) {
     return retVal;
 }
 
-static unsigned char read_known_cycle(FILE *fd)
+/* Maps the file into memory, hinting the kernel that it is read
+   sequentially. Where this is not possible (Windows, empty files, file
+   systems without mmap support), the file is read into a heap buffer
+   instead. */
+static int map_file(const char *filename, dbd_buffer_t *buffer)
+{
+  FILE *fp;
+  int errorno;
+#ifndef _WIN32
+  int fd;
+  struct stat st;
+  void *p;
+
+  fd=open(filename, O_RDONLY);
+  if (fd<0)
+    return ERROR_FILE_NOT_FOUND;
+  if ((fstat(fd, &st)==0) && (st.st_size>0)){
+    p=mmap(NULL, (size_t) st.st_size, PROT_READ, MAP_PRIVATE, fd, 0);
+    if (p!=MAP_FAILED){
+#ifdef POSIX_MADV_SEQUENTIAL
+      posix_madvise(p, (size_t) st.st_size, POSIX_MADV_SEQUENTIAL);
+#endif
+      close(fd);
+      buffer->data=(unsigned char *)p;
+      buffer->size=(size_t) st.st_size;
+      buffer->is_mapped=1;
+      return NO_ERROR;
+    }
+  }
+  close(fd);
+#endif
+  fp=fopen(filename,"rb");
+  if (fp==NULL)
+    return ERROR_FILE_NOT_FOUND;
+  errorno=read_stream_into_buffer(fp, buffer);
+  fclose(fp);
+  return errorno;
+}
+
+/* Reads fp from its current position until the end into a heap buffer. */
+static int read_stream_into_buffer(FILE *fp, dbd_buffer_t *buffer)
+{
+  size_t capacity=0;
+  size_t n;
+  unsigned char *tmp;
+
+  buffer->data=NULL;
+  buffer->size=0;
+  buffer->is_mapped=0;
+  while (1){
+    if (buffer->size==capacity){
+      capacity+=READ_BLOCKSIZE;
+      tmp=(unsigned char *)realloc(buffer->data, capacity);
+      if (tmp==NULL){
+	printf("Memory fault!\n");
+	exit(1);
+      }
+      buffer->data=tmp;
+    }
+    n=fread(buffer->data+buffer->size, 1, capacity-buffer->size, fp);
+    if (n==0)
+      break;
+    buffer->size+=n;
+  }
+  return NO_ERROR;
+}
+
+static unsigned char read_known_cycle(const unsigned char *known_cycle)
 {
   // the first 2 bytes are:
   // s                  Cycle Tag (this is an ASCII s char).
   // a                  One byte integer.
   // but just skip over them
-  int pos = ftell(fd);
-  fseek(fd, pos + 2, 0);
 
   // followed by, the value we want to check for:
   // 0x1234             Two byte integer.
   // which is 4660
   unsigned short two_byte_int;
-  fread((void*)(&two_byte_int), sizeof(two_byte_int), 1, fd);
-
+  memcpy(&two_byte_int, known_cycle+2, sizeof(two_byte_int));
 
   // the next 12 bytes are:
   //     123.456            Four byte float.
   //     123456789.12345    Eight byte double.
-  // but by this point we already know the byte order, so just skip the bytes
-  // After this, there is always 'd' (hex 64), before the state bytes begin. So
-  // Skip 12 + 1 bytes in total.
-  pos = ftell(fd);
-  fseek(fd, pos + 13, 0);
+  // but by this point we already know the byte order, so these are not
+  // needed. After this, there is always 'd' (hex 64), before the state
+  // bytes begin, so the known cycle is 17 bytes in total.
   // if we can successfully read the value, the glider byte order == host order
   if (two_byte_int == 4660) {
     return 0;
@@ -188,15 +509,102 @@ static unsigned char read_known_cycle(FILE *fd)
   return 1;
 }
 
-static void get_by_read_per_byte(int nti,
-				 int *vi,
-				 int nv,
-				 file_info_t FileInfo,
-				 int return_nans,
-				 double ***result,
-				 int *ndata,
-				 int skip_initial_line,
-				 int max_values_to_read)
+/* Builds the tables to decode the state bytes for the variables vi
+   (sorted). Each state byte holds the fields of fields_per_byte
+   sensors, most significant bits first. The number of sensors need not
+   be a multiple of fields_per_byte, so the last state byte can contain
+   padding slots that do not map to a real sensor. These are ignored:
+   their bits are not guaranteed to be zero. */
+static state_decoder_t *new_state_decoder(int *vi, int nv, file_info_t FileInfo)
+{
+  state_decoder_t *decoder;
+  const int fields_per_byte=bits_per_byte/bits_per_field;
+  int sb, c, fld, field, sensor, slot;
+  int i;
+  int size;
+
+  decoder=(state_decoder_t *)malloc(sizeof(state_decoder_t));
+  decoder->n_state_bytes=FileInfo.n_state_bytes;
+  decoder->nv=nv;
+  decoder->chunk_lut=(unsigned char *)malloc((size_t) FileInfo.n_state_bytes*256);
+  decoder->byte_position=(int *)malloc((nv>0? nv : 1)*sizeof(int));
+  decoder->field_lut=(signed char *)malloc((size_t) (nv>0? nv : 1)*256);
+  if ((decoder->chunk_lut==NULL) || (decoder->byte_position==NULL) ||
+      (decoder->field_lut==NULL)){
+    printf("Memory fault!\n");
+    exit(1);
+  }
+  for(sb=0;sb<FileInfo.n_state_bytes;sb++){
+    for(c=0;c<256;c++){
+      size=0;
+      for(fld=0;fld<fields_per_byte;fld++){
+	sensor=sb*fields_per_byte+fld;
+	if (sensor>=FileInfo.n_sensors)
+	  break;
+	field=(c>>(bits_per_byte-bits_per_field*(fld+1))) & mask;
+	if (field==UPDATED)
+	  size+=FileInfo.byteSizes[sensor];
+      }
+      decoder->chunk_lut[sb*256+c]=(unsigned char) size;
+    }
+  }
+  for(i=0;i<nv;i++){
+    if ((vi[i]<0) || (vi[i]>=FileInfo.n_sensors)){
+      /* not a sensor of this file; never found */
+      decoder->byte_position[i]=FileInfo.n_state_bytes;
+      continue;
+    }
+    sb=vi[i]/fields_per_byte;
+    slot=vi[i]%fields_per_byte;
+    decoder->byte_position[i]=sb;
+    for(c=0;c<256;c++){
+      field=(c>>(bits_per_byte-bits_per_field*(slot+1))) & mask;
+      if (field==UPDATED){
+	/* data of the updated sensors before this one in the same byte */
+	size=0;
+	for(fld=0;fld<slot;fld++){
+	  if (((c>>(bits_per_byte-bits_per_field*(fld+1))) & mask)==UPDATED)
+	    size+=FileInfo.byteSizes[sb*fields_per_byte+fld];
+	}
+	decoder->field_lut[i*256+c]=(signed char) size;
+      }
+      else if (field==SAME)
+	decoder->field_lut[i*256+c]=-1;
+      else
+	decoder->field_lut[i*256+c]=-2;
+    }
+  }
+  return decoder;
+}
+
+static void free_state_decoder(state_decoder_t *decoder)
+{
+  free(decoder->chunk_lut);
+  free(decoder->byte_position);
+  free(decoder->field_lut);
+  free(decoder);
+}
+
+/* Reads the variables vi (sorted, including the time variable at
+   position nti). Values are written to table if not NULL. Otherwise
+   they are appended to the growable arrays result, or, if capacity is
+   not NULL, to the fixed size arrays result that hold room for
+   capacity[j] values each. If both table and result are NULL, the
+   values are only counted in ndata. */
+static void get_from_buffer(int nti,
+			    int *vi,
+			    int nv,
+			    file_info_t FileInfo,
+			    int return_nans,
+			    double ***result,
+			    int *ndata,
+			    int skip_initial_line,
+			    int max_values_to_read,
+			    double t_min,
+			    double t_max,
+			    table_t *table,
+			    int *columns,
+			    int *capacity)
 {
 
   unsigned chunksize;
@@ -204,104 +612,169 @@ static void get_by_read_per_byte(int nti,
   unsigned *byteSizes;
 
   int r;
-  int fp_end, fp_current;
   int i,j;
 
   double *read_result;
   double *memory_result;
-  int *lookup;
-  unsigned char *chunk;
-  unsigned max_chunksize;
+  const unsigned char **last_update; /* where each variable was last updated */
+  int *pending;                      /* last update not extracted yet */
+  state_decoder_t *decoder;
+  const unsigned char *cycle;
+  const unsigned char *chunk;
+  size_t n_state_bytes=(size_t) FileInfo.n_state_bytes;
+  unsigned char flip;
+  size_t pos;
+  int k=0;
+  double t;
+  int windowed=(t_min>-INFINITY) || (t_max<INFINITY);
 
   int min_offset_value;
   int write_data = !skip_initial_line; // 0: only first line is not output; 1: all lines are output
+  const int count_only = (table==NULL) && (result==NULL);
 
   if (return_nans==1)
     min_offset_value=-2; // include the notfound/samevalue/update
   else
     min_offset_value=-1; // include samevalue/update
 
+  /* setting for variables AND time:*/
+  if (ndata!=NULL){
+    for(i=0;i<nv-1;++i){ /* no time */
+      ndata[i]=0;
+    }
+  }
+
+  /* the binary data start with the known cycle of 17 bytes */
+  if (FileInfo.bin_offset<0)
+    return;
+  cycle=buffer_range(&FileInfo.buffer, (size_t) FileInfo.bin_offset, 17);
+  if (cycle==NULL)
+    return;
+  /* extract byte order from known cycle */
+  flip=read_known_cycle(cycle);
+
   byteSizes=(unsigned *)malloc(nv*sizeof(unsigned));
   offsets=(signed *)malloc(nv*sizeof(signed));
   read_result=(double *)malloc(nv*sizeof(double));
   memory_result=(double *)malloc(nv*sizeof(double));
+  last_update=(const unsigned char **)malloc(nv*sizeof(unsigned char *));
+  pending=(int *)malloc(nv*sizeof(int));
 
-  /* build O(1) reverse-lookup: sensor index -> position in vi (-1 if not requested).
-     Size covers all state byte slots (n_state_bytes * 4), which may exceed n_sensors
-     when the last byte is not fully used. */
-  int n_sensor_slots = FileInfo.n_state_bytes * (bits_per_byte / bits_per_field);
-  lookup=(int *)malloc(n_sensor_slots*sizeof(int));
-  for(i=0;i<n_sensor_slots;++i)
-    lookup[i]=-1;
-  for(i=0;i<nv;++i)
-    lookup[vi[i]]=i;
-
-  /* preallocate a chunk buffer large enough for a fully-updated cycle */
-  max_chunksize=0;
-  for(i=0;i<FileInfo.n_sensors;++i)
-    max_chunksize+=FileInfo.byteSizes[i];
-  chunk=(unsigned char *)malloc(max_chunksize*sizeof(unsigned char));
+  decoder=new_state_decoder(vi, nv, FileInfo);
 
-  /* setting for variables AND time:*/
-  for(i=0;i<nv-1;++i){ /* no time */
-    ndata[i]=0;
-  }
   for(i=0;i<nv;++i){
     j=vi[i];
     byteSizes[i]=FileInfo.byteSizes[j];
     offsets[i]=0;
+    last_update[i]=NULL;
+    pending[i]=0;
   }
 
-  /* look up the end of the file: */
-  fseek(FileInfo.fd,0,2);
-  fp_end=ftell(FileInfo.fd);
-
-  /* start where binary data begin: */
-  fseek(FileInfo.fd,
-  	FileInfo.bin_offset,0);
-
-  /* extract byte order from known cycle */
-  unsigned char flip = read_known_cycle(FileInfo.fd);
+  if ((FileInfo.cycle_offsets!=NULL) && !valid_cycle_index(FileInfo)){
+    /* a stale or corrupt index: follow the chain of cycles instead */
+    FileInfo.cycle_offsets=NULL;
+    FileInfo.cycle_times=NULL;
+  }
+  if ((FileInfo.cycle_offsets!=NULL) && (FileInfo.cycle_times!=NULL) && (t_min>-INFINITY)){
+    /* jump to the first cycle of the time window. Values that are not
+       updated there are carried forward from before the window. */
+    k=first_cycle_in_window(FileInfo, t_min);
+    if (k>0){
+      seed_last_updates(k, nv, decoder, FileInfo, last_update);
+      for(i=0;i<nv;++i)
+	pending[i]=(last_update[i]!=NULL);
+      write_data=1; // the initial line lies before the window.
+    }
+  }
 
+  /* start where the cycles begin. Each cycle consists of the state
+     bytes, the data of the updated sensors and a 'd' separator. */
+  pos=(size_t) FileInfo.bin_offset+17;
   while (1){
-    r=read_state_bytes(vi,nv,lookup,FileInfo,offsets,&chunksize);
-    fp_current=ftell(FileInfo.fd);
-
-    /* read the entire data section of this cycle in one call */
-    if (chunksize>0)
-      fread(chunk, 1, chunksize, FileInfo.fd);
+    if (FileInfo.cycle_offsets!=NULL){
+      /* jump straight to the next cycle of the index */
+      if (k>=FileInfo.n_cycles)
+	break;
+      if ((FileInfo.cycle_times!=NULL) && (FileInfo.cycle_times[k]>t_max))
+	break; /* the index tells us we are past the time window */
+      pos=(size_t) FileInfo.cycle_offsets[k++];
+    }
+    /* A streamed file holds only a window of the data. When the
+       window moves on, the values still pointed to are extracted. */
+    if (!buffer_holds(&FileInfo.buffer, pos, n_state_bytes))
+      extract_pending(nv, last_update, pending, byteSizes, flip, memory_result);
+    cycle=buffer_range(&FileInfo.buffer, pos, n_state_bytes);
+    if (cycle==NULL)
+      break; /* reached end of the file */
+    r=read_state_bytes(cycle,decoder,offsets,&chunksize);
+    if (!buffer_holds(&FileInfo.buffer, pos, n_state_bytes+chunksize))
+      extract_pending(nv, last_update, pending, byteSizes, flip, memory_result);
+    cycle=buffer_range(&FileInfo.buffer, pos, n_state_bytes+chunksize);
+    if (cycle==NULL)
+      break; /* truncated cycle at the end of the file */
+    chunk=cycle+n_state_bytes;
 
     if (r>=1) {
-      /* we found (some of) the values we want to read (at least 1) */
-
+      /* we found (some of) the values we want to read (at least 1).
+	 Only note where updated values are; they are extracted when
+	 they are needed, so that cycles outside the time window are
+	 cheap. */
       for(i=0; i<nv; i++){
 	if (offsets[i]>=0){
-	  /* found an updated value: extract from in-memory chunk */
-	  read_result[i]=extract_sensor_value(chunk+offsets[i],
-					      byteSizes[i], flip);
-	  memory_result[i]=read_result[i];
+	  last_update[i]=chunk+offsets[i];
+	  pending[i]=1;
 	}
-	else if (offsets[i]==-1){
-	  /*update value with previous value*/
-	  read_result[i]=memory_result[i];
-	}
-	else if (offsets[i]==-2){
-	  /* parameter is not found
-	     This will happen only when read_state_bytes is set to return nans
-	  */
-	  read_result[i]=FILLVALUE;
+      }
+      if (offsets[nti]==-2)
+	t=FILLVALUE;
+      else {
+	if (pending[nti]){
+	  memory_result[nti]=extract_sensor_value(last_update[nti], byteSizes[nti], flip);
+	  pending[nti]=0;
 	}
+	t=memory_result[nti];
       }
 
+      if (t>t_max)
+	break; /* past the time window */
+
       if (write_data){
-	for(i=0; i<nv; i++){
-	  if ((offsets[i]>=min_offset_value) && (i!=nti)){// && isfinite(read_result[i])){
-	    j=i-(int)(i>nti);
-	    /* add read_result to result */
-	    add_to_array(read_result[nti],
-			 read_result[i],
-			 result[j],ndata[j]);
-	    ndata[j]+=1;
+	if ((!windowed) || (t>=t_min)){
+	  for(i=0; i<nv; i++){
+	    if (offsets[i]==-2){
+	      /* parameter is not found
+		 This will happen only when read_state_bytes is set to return nans
+	      */
+	      read_result[i]=FILLVALUE;
+	      continue;
+	    }
+	    if (pending[i] && !count_only){
+	      /* extract the last update straight from the buffer */
+	      memory_result[i]=extract_sensor_value(last_update[i], byteSizes[i], flip);
+	      pending[i]=0;
+	    }
+	    /* updated value or previous value */
+	    read_result[i]=memory_result[i];
+	  }
+	  if (table!=NULL){
+	    add_table_row(table, t, read_result, columns, nv);
+	  }
+	  else for(i=0; i<nv; i++){
+	    if ((offsets[i]>=min_offset_value) && (i!=nti)){// && isfinite(read_result[i])){
+	      j=i-(int)(i>nti);
+	      /* add read_result to result */
+	      if (capacity!=NULL){
+		if (ndata[j]<capacity[j]){
+		  result[j][0][ndata[j]]=t;
+		  result[j][1][ndata[j]]=read_result[i];
+		}
+	      }
+	      else if (!count_only)
+		add_to_array(t,
+			     read_result[i],
+			     result[j],ndata[j]);
+	      ndata[j]+=1;
+	    }
 	  }
 	}
       }
@@ -310,111 +783,271 @@ static void get_by_read_per_byte(int nti,
       }
     }
     /* jump to the next state block */
-    fp_current+=chunksize+1;
-    if (fp_current >= fp_end){
-      break; /* reached end of the file */
-    }
-    if ((max_values_to_read>0) && (ndata[0] >= max_values_to_read)) // we check the first value only and rely on checks upstream.
+    pos+=n_state_bytes+chunksize+1;
+    if ((max_values_to_read>0) &&
+	(((table!=NULL)? table->n_rows : ndata[0]) >= max_values_to_read)) // we check the first value only and rely on checks upstream.
     	break;
-    fseek(FileInfo.fd,fp_current,0);
   }
   free(byteSizes);
   free(offsets);
   free(read_result);
   free(memory_result);
-  free(lookup);
-  free(chunk);
+  free(last_update);
+  free(pending);
+  free_state_decoder(decoder);
 }
 
-static int read_state_bytes(int *vi,
-			    int nvt,
-			    int *lookup,
-			    file_info_t FileInfo,
-			    signed *offsets,
-			    unsigned *chunksize)
+/* Returns a copy of vi (sorted) with ti inserted such that it remains
+   sorted, and sets nti to the position of ti. */
+static int *insert_time_index(int ti, int *vi, int nv, int *nti)
 {
+  int i;
+  int *vit;
 
-  static int bitshift;
-  static int fields_per_byte;
-  int sb,fld,field;
-  int nsb=FileInfo.n_state_bytes;
-  int c;
-  int variable_index;
-  int variable_counter;
-  int idx;
+  vit=(int *)malloc((nv+1)*sizeof(int));
+  for(i=0;i<nv;i++){
+    if(vi[i]>ti){
+      break;
+    }
+    vit[i]=vi[i];
+  }
+  vit[i]=ti; /*inserts ti*/
+  *nti=i; /* ti is the nti'th variable */
+  i++;
+  for(i=i;i<nv+1;i++){
+    vit[i]=vi[i-1];
+  }
+  return vit;
+}
+
+/* Appends a row with time stamp t to the table, growing it when
+   needed. Variable i (of nv) goes into column columns[i], unless that
+   is negative. */
+static void add_table_row(table_t *table,
+			  double t,
+			  double *row_values,
+			  int *columns,
+			  int nv)
+{
+  int i;
+  double *row;
 
-  bitshift=bits_per_byte - bits_per_field;
-  fields_per_byte=bits_per_byte/bits_per_field;
+  if (table->n_rows==table->capacity){
+    table->capacity*=2;
+    table->t=(double *)realloc(table->t, table->capacity*sizeof(double));
+    table->values=(double *)realloc(table->values,
+				    (size_t) table->capacity*table->n_columns*sizeof(double));
+    if ((table->t==NULL) || ((table->values==NULL) && (table->n_columns>0))){
+      printf("Memory fault!\n");
+      exit(1);
+    }
+  }
+  table->t[table->n_rows]=t;
+  row=table->values+(size_t) table->n_rows*table->n_columns;
+  for(i=0;i<table->n_columns;i++)
+    row[i]=NAN;
+  for(i=0;i<nv;i++){
+    if (columns[i]>=0)
+      row[columns[i]]=row_values[i];
+  }
+  table->n_rows+=1;
+}
 
-  *chunksize=0;
+/* Returns the index of the first cycle with a time stamp of t_min or
+   later, according to the cycle index, or n_cycles if there is none. */
+static int first_cycle_in_window(file_info_t FileInfo, double t_min)
+{
+  int k;
 
-  variable_index=0;
-  variable_counter=0;
-  for(sb=0;sb<nvt;sb++){
-      offsets[sb]=-2; /* defaults to not found*/
+  for(k=0; k<FileInfo.n_cycles; ++k){
+    if (FileInfo.cycle_times[k]>=t_min)
+      break;
   }
-  for (sb=0;sb<nsb; sb++){
-    c=getc(FileInfo.fd);
-    for (fld=0;fld<fields_per_byte;fld++){
-      /* The number of sensors need not be a multiple of fields_per_byte, so the
-	 last state byte can contain padding slots (variable_index >= n_sensors)
-	 that do not map to a real sensor.  These must be skipped: their bits are
-	 not guaranteed to be zero, and if such a slot decodes to UPDATED we would
-	 read FileInfo.byteSizes (sized n_sensors) out of bounds and inflate
-	 chunksize, overflowing the fixed-size chunk buffer in the caller. */
-      if (variable_index >= FileInfo.n_sensors)
-	break;
-      field=(c>>bitshift) & mask;
-      c<<=bits_per_field;
-      if (field == UPDATED) {
-	idx=lookup[variable_index];
-	if (idx!=-1){
-	  /* the update value is one of the wanted variables
-	     so record its position */
-	  offsets[idx]=*chunksize;
-	  variable_counter+=1;
-	}
-	*chunksize+=FileInfo.byteSizes[variable_index];
+  return k;
+}
+
+/* Returns whether the cycle index fits the file: the offsets should
+   increase, lie in the binary data, and each follow a 'd' separator
+   that ends the cycle before. */
+static int valid_cycle_index(file_info_t FileInfo)
+{
+  const dbd_buffer_t *buffer=&FileInfo.buffer;
+  double first=(double) FileInfo.bin_offset+17;
+  double last=(double) buffer->size-FileInfo.n_state_bytes;
+  double previous=-1;
+  double x;
+  int k;
+
+  if (buffer->stream!=NULL)
+    return 0; /* the index requires the whole file in memory */
+  for(k=0; k<FileInfo.n_cycles; ++k){
+    x=FileInfo.cycle_offsets[k];
+    if (!(x>=first && x<=last && x>previous && x==floor(x)))
+      return 0;
+    if (buffer->data[(size_t) x-1]!='d')
+      return 0;
+    previous=x;
+  }
+  return 1;
+}
+
+/* Walks the indexed cycles before cycle k0 backwards, and records for
+   each variable in vi where it was last updated (NULL if never). */
+static void seed_last_updates(int k0,
+			      int nv,
+			      state_decoder_t *decoder,
+			      file_info_t FileInfo,
+			      const unsigned char **last_update)
+{
+  signed *offsets;
+  unsigned chunksize;
+  size_t pos;
+  size_t n_state_bytes=(size_t) FileInfo.n_state_bytes;
+  int n_found=0;
+  int i, k;
+
+  offsets=(signed *)malloc(nv*sizeof(signed));
+  for(k=k0-1; (k>=0) && (n_found<nv); --k){
+    pos=(size_t) FileInfo.cycle_offsets[k];
+    read_state_bytes(FileInfo.buffer.data+pos,decoder,offsets,&chunksize);
+    if (pos+n_state_bytes+chunksize > FileInfo.buffer.size)
+      continue; /* truncated cycle at the end of the file */
+    for(i=0; i<nv; i++){
+      if ((last_update[i]==NULL) && (offsets[i]>=0)){
+	last_update[i]=FileInfo.buffer.data+pos+n_state_bytes+offsets[i];
+	n_found+=1;
       }
-      else if (field==SAME) {
-	idx=lookup[variable_index];
-	if (idx!=-1){
-	  /* this variable is asked for but has an old value.
-	     Therefore it is not being read. Offset marked -1*/
-	  offsets[idx]=-1;
-	  variable_counter+=1;
+    }
+  }
+  free(offsets);
+}
+
+/* Returns whether bytes pos..pos+n-1 of the file are in the buffer. */
+static int buffer_holds(const dbd_buffer_t *buffer, size_t pos, size_t n)
+{
+  const dbd_stream_t *s=buffer->stream;
+
+  if (s==NULL)
+    return pos+n <= buffer->size;
+  return (pos>=s->start) && (pos+n <= s->start+s->size);
+}
+
+/* Returns a pointer to bytes pos..pos+n-1 of the file, or NULL if the
+   file ends before. If a streamed file does not hold these bytes, the
+   data before pos are dropped and blocks are decompressed until it
+   does. This invalidates pointers into the buffer obtained before, and
+   requires pos never to decrease. */
+static const unsigned char *buffer_range(const dbd_buffer_t *buffer, size_t pos, size_t n)
+{
+  dbd_stream_t *s=buffer->stream;
+  size_t keep;
+  size_t skip;
+  size_t n_read;
+  unsigned char *tmp;
+
+  if (s==NULL)
+    return (pos+n <= buffer->size)? buffer->data+pos : NULL;
+  if (!buffer_holds(buffer, pos, n)){
+    if (pos<s->start)
+      return NULL; /* the data have gone already */
+    /* drop what has been read */
+    keep=0;
+    skip=0;
+    if (pos < s->start+s->size){
+      keep=s->start+s->size-pos;
+      memmove(s->data, s->data+(pos-s->start), keep);
+    }
+    else
+      skip=pos-(s->start+s->size); /* not decompressed yet */
+    s->start=pos;
+    s->size=keep;
+    while (s->size<n){
+      if (s->errorno!=NO_ERROR)
+	return NULL;
+      if (s->size+CHUNKSIZE > s->capacity){
+	tmp=(unsigned char *)realloc(s->data, s->size+CHUNKSIZE);
+	if (tmp==NULL){
+	  printf("Memory fault!\n");
+	  exit(1);
 	}
+	s->data=tmp;
+	s->capacity=s->size+CHUNKSIZE;
       }
-      else if (field==NOTSET) {
-	idx=lookup[variable_index];
-	if (idx!=-1){
-	  /* this variable is asked for but has no value set.
-	     Therefore it is not being read. Offset marked -2*/
-	  offsets[idx]=-2;
-	  variable_counter+=1;
+      s->errorno=read_block(s->blocks, s->data+s->size, &n_read);
+      if (n_read==0)
+	return NULL; /* end of the file (or error) */
+      if (skip>0){
+	/* the block starts before pos */
+	if (n_read<=skip){
+	  skip-=n_read;
+	  continue;
 	}
+	memmove(s->data, s->data+skip, n_read-skip);
+	n_read-=skip;
+	skip=0;
       }
-      variable_index+=1;
+      s->size+=n_read;
     }
   }
-  /* If a variable index appears more than once in vi (e.g. when m_present_time
-     is requested explicitly, or when the same parameter appears in both the
-     sci and eng parameter lists), the lookup table stores only the LAST
-     position for each duplicate.  That means offsets[last] receives the
-     correct value while earlier positions stay at -2.  Propagate the correct
-     value backwards so every occurrence of the duplicate gets a valid offset.
-     vi is in ascending order, so identical entries are always neighbours. */
-  if (nvt>1){
-    for(int i=nvt-2; i>=0; --i){
-      if (vi[i]==vi[i+1])
-	offsets[i]=offsets[i+1];
+  return s->data+(pos-s->start);
+}
+
+/* Extracts the values of the variables that are updated in cycles
+   that have been visited, but not extracted yet. */
+static void extract_pending(int nv,
+			    const unsigned char **last_update,
+			    int *pending,
+			    unsigned *byteSizes,
+			    unsigned char flip,
+			    double *memory_result)
+{
+  int i;
+
+  for(i=0; i<nv; i++){
+    if (pending[i]){
+      memory_result[i]=extract_sensor_value(last_update[i], byteSizes[i], flip);
+      pending[i]=0;
+    }
+  }
+}
+
+/* Decodes the state bytes of a cycle. For each variable of the decoder,
+   offsets receives the position of its value in the data of the cycle
+   if updated, -1 if it has the same value as before and -2 if it is not
+   set. chunksize receives the size of the data of the cycle. */
+static int read_state_bytes(const unsigned char *state_bytes,
+			    state_decoder_t *decoder,
+			    signed *offsets,
+			    unsigned *chunksize)
+{
+  int sb;
+  int c;
+  int i=0;
+  int field_offset;
+  int variable_counter=0;
+  unsigned size=0;
+  const int nsb=decoder->n_state_bytes;
+  const int nv=decoder->nv;
+
+  for (sb=0;sb<nsb; sb++){
+    c=state_bytes[sb];
+    /* variables are sorted, so the ones in this byte are next in line */
+    for(; (i<nv) && (decoder->byte_position[i]==sb); i++){
+      field_offset=decoder->field_lut[i*256+c];
+      offsets[i]=(field_offset>=0)? (signed) size+field_offset : field_offset;
+      if (field_offset!=-2)
+	variable_counter+=1;
     }
+    size+=decoder->chunk_lut[sb*256+c];
   }
+  for(; i<nv; i++)
+    offsets[i]=-2; /* not a sensor of this file */
+  *chunksize=size;
   /*return the number of variables found. */
   return (variable_counter);
 }
 
-static double extract_sensor_value(unsigned char *buf,
+static double extract_sensor_value(const unsigned char *buf,
 				   int bs, unsigned char flip)
 {
   signed char   sc;
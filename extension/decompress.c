@@ -1,21 +1,21 @@
 #include <assert.h>
 #include <stdint.h>
+#ifndef _WIN32
+#include <pthread.h>
+#include <unistd.h>
+#endif
 #include "decompress.h"
 
 // private function declarations
-static int write_compressed_file_to_memory(const char *filename, FILE* fpmem);
-
-static size_t get_block_size(FILE* fp);
-
 static size_t get_file_size(FILE* fp);
 
-static int decompress_block(size_t* decompressed_size, char* data, FILE* fp);
+static int index_blocks(block_index_t* index);
 
-static FILE* fopen_compressed_file_fmemopen(const char* filename, int* errorno);
+static void decode_block_range(block_index_t* index, size_t first, size_t last);
 
-static FILE* fopen_compressed_file_fopen(const char* filename, int* errorno);
+static int decode_blocks(block_index_t* index);
 
-static void get_filename_base(const char* filename, char*filename_base);
+static size_t pack_blocks(block_index_t* index);
 
 static void get_filename_ext(const char *filename, char* extension);
 
@@ -26,215 +26,329 @@ static void get_filename_ext(const char *filename, char* extension);
 const int is_file_compressed(const char *filename)
 {
   int return_value;
-  char* ext = (char*) malloc(4);
+  char* ext = (char*) malloc(strlen(filename)+1);
   get_filename_ext(filename, ext);
-  return_value = (int) (ext[1]=='c');
+  return_value = (int) (ext[0]!='\0' && ext[1]=='c');
   free(ext);
   return return_value;
 }
 
 
-FILE* fopen_compressed_file(const char* filename, int* errorno){
+/* Opens filename to be decompressed block by block with
+   read_block(). Returns NULL (and sets errorno) if the file cannot be
+   opened. */
+block_stream_t* open_block_stream(const char* filename, int* errorno)
+{
+  block_stream_t* stream;
+  FILE* fp;
+
+  *errorno=NO_ERROR;
+  fp = fopen(filename, "rb");
+  if (fp==NULL){
+    *errorno=ERROR_FILE_NOT_FOUND;
+    return NULL;
+  }
+  stream=(block_stream_t*) malloc(sizeof(block_stream_t));
+  if (stream==NULL){
+    printf("Memory fault!\n");
+    exit(1);
+  }
+  stream->fp=fp;
+  stream->compressed_size=get_file_size(fp);
+  stream->position=0;
+  return stream;
+}
 
-  FILE* fpmem;
-#ifdef __linux__
-  fpmem = fopen_compressed_file_fmemopen(filename, errorno);
-#elif _WIN32
-  fpmem = fopen_compressed_file_fopen(filename, errorno);
-#else
-  fpmem = fopen_compressed_file_fopen(filename, errorno);
-#endif
-  return fpmem;
-  
+
+/* Decodes the next block of stream into dst, which has room for
+   CHUNKSIZE bytes, and sets *n to the number of bytes decoded (0 at the
+   end of the file). Returns NO_ERROR, or ERROR_UNEXPECTED_END_OF_FILE
+   if the file is truncated or the block is corrupt. */
+int read_block(block_stream_t* stream, unsigned char* dst, size_t* n)
+{
+  uint8_t b[SIZEFIELDSIZE];
+  size_t block_size;
+  int decompressed_block_size;
+
+  *n=0;
+  if (stream->position>=stream->compressed_size)
+    return NO_ERROR;
+  if (fread(b, 1, SIZEFIELDSIZE, stream->fp)!=SIZEFIELDSIZE)
+    return ERROR_UNEXPECTED_END_OF_FILE;
+  block_size=(b[0]<<8) + b[1];
+  if (fread(stream->compressed, 1, block_size, stream->fp)!=block_size)
+    return ERROR_UNEXPECTED_END_OF_FILE; /* stream ended unexpectedly */
+  stream->position+=SIZEFIELDSIZE+block_size;
+  decompressed_block_size=LZ4_decompress_safe_partial((const char*) stream->compressed,
+						      (char*) dst, (int) block_size,
+						      CHUNKSIZE, CHUNKSIZE);
+  if (decompressed_block_size<0)
+    return ERROR_UNEXPECTED_END_OF_FILE; /* corrupt block */
+  *n=(size_t) decompressed_block_size;
+  return NO_ERROR;
 }
 
 
-/* private functions */
+void close_block_stream(block_stream_t* stream)
+{
+  if (stream==NULL)
+    return;
+  fclose(stream->fp);
+  free(stream);
+}
 
-static FILE* fopen_compressed_file_fopen(const char* filename, int* errorno){
-
-  char* base;
-  char* extension_decompressed;
-  char* extension;
-
-  *errorno = NO_ERROR;
-  
-  base = (char*) malloc(strlen(filename));
-  get_filename_base(filename, base);
-
-  extension = (char*) malloc(4);
-  get_filename_ext(filename, extension);
-
-  extension_decompressed = (char*) malloc(strlen(extension));
-
-  extension_decompressed = strcpy(extension_decompressed, extension);
-  extension_decompressed[1] = 'b';
-  // We know for sure that base is long enought to be added by 4
-  // characters, as we stripped them before.
-  base = strcat(base, ".");
-  base = strcat(base, extension_decompressed);
-
-  // Try to open the file, in case it has been written already:
-  FILE* fpmem;
-  fpmem = fopen(base, "rb");
-  if (fpmem==NULL) {
-    /* opening of decompressed file failed, assume it is not there,
-       and so we write it now. */
-    fpmem = fopen(base, "wb");
-    if (fpmem!=NULL){
-      size_t uncompressed_file_size;
-      *errorno = write_compressed_file_to_memory(filename, fpmem);
-      fclose(fpmem);
-      if (*errorno == NO_ERROR){
-	/* Writing was successfull, now reopen the file for reading.*/
-	fpmem = fopen(base, "rb");
-      }
-      else{
-	/* Decompression failed partway through, so the base file on
-	   disk is incomplete/corrupt. Remove it -- otherwise a later
-	   call would find this partial file, mistake it for a
-	   complete, previously-decompressed file, and silently return
-	   truncated data instead of re-reporting the error. */
-	remove(base);
-	fpmem=NULL;
-      }
-    }
-    else {
-      /* Could not create the base file for writing. This is fatal. */
-      *errorno = ERROR_FAILED_TO_WRITE_BASE_FILE;
+
+/* Decompresses compressed_size bytes of compressed data (a sequence of
+   blocks, each preceded by its size) into a heap buffer. The size
+   fields of the blocks are read first, so that each block can be
+   decoded by LZ4 straight into its own CHUNKSIZE slot of the output
+   buffer. Large files are decoded by several threads. On success
+   *data (to be freed by the caller) holds *size bytes of decompressed
+   data. On failure *data is NULL. */
+int decompress_data_to_buffer(const unsigned char* compressed, size_t compressed_size,
+			      unsigned char** data, size_t* size)
+{
+  block_index_t index;
+  int errorno;
+
+  *data=NULL;
+  *size=0;
+  index.compressed=compressed;
+  index.compressed_size=compressed_size;
+  errorno=index_blocks(&index);
+  if (errorno==NO_ERROR){
+    /* room for at least one byte, so that an empty file gives a buffer too */
+    *data=(unsigned char*) malloc(index.n_blocks*CHUNKSIZE+1);
+    if (*data==NULL){
+      printf("Memory fault!\n");
+      exit(1);
     }
+    index.output=*data;
+    errorno=decode_blocks(&index);
+  }
+  if (errorno==NO_ERROR)
+    *size=pack_blocks(&index);
+  else{
+    free(*data);
+    *data=NULL;
   }
-  /* else: the decompressed file already exists on disk (written by
-     a previous call), so just use it as-is -- fpmem is already open
-     for reading and *errorno is NO_ERROR. */
-  /* Here fpmem is either NULL (and all failed, or it points to the
-     decompressed file.*/
-  free(extension_decompressed);
-  free(extension);
-  free(base);
-  return fpmem;
+  free(index.offset);
+  free(index.decoded_size);
+  return errorno;
 }
 
 
-static void get_filename_ext(const char *filename, char* extension)
+/* As decompress_data_to_buffer(), but decodes into output, which holds
+   capacity bytes. If that is less than the number of blocks times
+   CHUNKSIZE, nothing is decoded, ERROR_BUFFER_TOO_SMALL is returned and
+   *size is set to the capacity needed. */
+int decompress_data_into(const unsigned char* compressed, size_t compressed_size,
+			 unsigned char* output, size_t capacity, size_t* size)
 {
-  const char *dot = strrchr(filename, '.');
-  if(!dot || dot == filename){
-    extension[0]='\0';
+  block_index_t index;
+  int errorno;
+
+  *size=0;
+  index.compressed=compressed;
+  index.compressed_size=compressed_size;
+  errorno=index_blocks(&index);
+  if ((errorno==NO_ERROR) && (index.n_blocks*CHUNKSIZE>capacity)){
+    *size=index.n_blocks*CHUNKSIZE;
+    errorno=ERROR_BUFFER_TOO_SMALL;
   }
-  else{
-    dot+=1;
-    extension = strcpy(extension, dot);
+  if (errorno==NO_ERROR){
+    index.output=output;
+    errorno=decode_blocks(&index);
   }
+  if (errorno==NO_ERROR)
+    *size=pack_blocks(&index);
+  free(index.offset);
+  free(index.decoded_size);
+  return errorno;
 }
 
 
-static void get_filename_base(const char *filename, char* filename_base)
+/* Decompresses filename into a heap buffer, see
+   decompress_data_to_buffer(). */
+int decompress_file_to_buffer(const char* filename, unsigned char** data, size_t* size)
 {
-  filename_base = strcpy(filename_base, filename);
-  const char *dot = strrchr(filename_base, '.');
-  if(dot && dot != filename_base){
-    int offset =  dot - filename_base;
-    filename_base[offset]='\0';
+  FILE* fp;
+  unsigned char* compressed;
+  size_t compressed_size;
+  int errorno;
+
+  *data=NULL;
+  *size=0;
+  fp = fopen(filename, "rb");
+  if (fp==NULL)
+    return ERROR_FILE_NOT_FOUND;
+  compressed_size=get_file_size(fp);
+  compressed=(unsigned char*) malloc(compressed_size+1);
+  if (compressed==NULL){
+    printf("Memory fault!\n");
+    exit(1);
   }
+  if (fread(compressed, 1, compressed_size, fp)!=compressed_size)
+    errorno=ERROR_UNEXPECTED_END_OF_FILE;
+  else
+    errorno=decompress_data_to_buffer(compressed, compressed_size, data, size);
+  fclose(fp);
+  free(compressed);
+  return errorno;
 }
 
-static FILE* fopen_compressed_file_fmemopen(const char* filename, int* errorno){
-
-  size_t uncompressed_file_size;
 
-  FILE* fpmem;
-  
-  // We provide a large enough space, but using append mode, gives
-  // control to fmemopen to update the size of its internal buffer as
-  // it needs.
-  fpmem = fmemopen(NULL, MAX_IN_MEMORY_FILE_SIZE, "a+");
-  *errorno = write_compressed_file_to_memory(filename, fpmem);
-  return fpmem;
-  
-}
+/* private functions */
 
-static int write_compressed_file_to_memory(const char *filename, FILE* fpmem)
+/* Finds the blocks of the compressed data in index->compressed, reading
+   the size fields only. */
+static int index_blocks(block_index_t* index)
 {
-    FILE* fp;
-    size_t decompressed_block_size;
-    size_t compressed_file_size;
-    size_t file_size = 0;
-    size_t current_position;
-    int errorno = 0;
-    size_t number_of_blocks_read = 0;
-    fp = fopen(filename, "rb");
-    if (fp==NULL){
-    }
-    else{
-        compressed_file_size = get_file_size(fp);
-        char data[CHUNKSIZE];
-        while((current_position=ftell(fp))<compressed_file_size){
-	  errorno = decompress_block(&decompressed_block_size, data, fp);
-	  if (errorno != NO_ERROR){
-	    break;
-	  }
-	  number_of_blocks_read++;
-	  file_size+= decompressed_block_size;
-	  for(size_t i=0; i< decompressed_block_size; ++i){
-	    fwrite(&(data[i]), 1, 1, fpmem);
-	  }
-        }
+  size_t position=0;
+  size_t block_size;
+  size_t capacity=0;
+  const unsigned char* b;
+
+  index->n_blocks=0;
+  index->offset=NULL;
+  index->decoded_size=NULL;
+  while (position<index->compressed_size){
+    if (position+SIZEFIELDSIZE>index->compressed_size)
+      return ERROR_UNEXPECTED_END_OF_FILE;
+    b=index->compressed+position;
+    block_size=(b[0]<<8) + b[1];
+    position+=SIZEFIELDSIZE;
+    if (position+block_size>index->compressed_size)
+      return ERROR_UNEXPECTED_END_OF_FILE; /* stream ended unexpectedly */
+    if (index->n_blocks==capacity){
+      capacity=(capacity>0)? 2*capacity : 64;
+      index->offset=(size_t*) realloc(index->offset, capacity*sizeof(size_t));
+      index->decoded_size=(int*) realloc(index->decoded_size, capacity*sizeof(int));
+      if ((index->offset==NULL) || (index->decoded_size==NULL)){
+	printf("Memory fault!\n");
+	exit(1);
+      }
     }
-    fclose(fp);
-    rewind(fpmem);
-    //printf("write_compress_file_to_memory: number of compression blocks processed: %d.\n", number_of_blocks_read);    
-    return errorno;
+    index->offset[index->n_blocks++]=position;
+    position+=block_size;
+  }
+  return NO_ERROR;
 }
 
 
-static size_t get_block_size(FILE* fp){
-
-    uint16_t size=0;
-    uint8_t b[2];
-    size_t bytes_read;
-    
-    bytes_read = fread(&b, sizeof(b), 1, fp);
-    if(bytes_read==0)
-      size = 0;
-    else
-      size = (b[0]<<8) + b[1];
-    return size;
+/* Decodes the blocks first to last-1 of index into their slots. */
+static void decode_block_range(block_index_t* index, size_t first, size_t last)
+{
+  size_t i;
+  size_t end;
+
+  for (i=first; i<last; i++){
+    end=(i+1<index->n_blocks)? index->offset[i+1]-SIZEFIELDSIZE : index->compressed_size;
+    index->decoded_size[i]=LZ4_decompress_safe_partial((const char*) index->compressed+index->offset[i],
+							(char*) index->output+i*CHUNKSIZE,
+							(int) (end-index->offset[i]),
+							CHUNKSIZE, CHUNKSIZE);
+  }
 }
 
-static size_t get_file_size(FILE* fp)
+
+#ifndef _WIN32
+typedef struct {
+  block_index_t* index;
+  size_t first;
+  size_t last;
+} block_range_t;
+
+static void* decode_block_range_thread(void* arg)
 {
-    size_t current_position = ftell(fp);
-    fseek(fp, 0, 2);
-    size_t file_size = ftell(fp);
-    fseek(fp, current_position, 0);
-    return file_size;
+  block_range_t* range=(block_range_t*) arg;
+  decode_block_range(range->index, range->first, range->last);
+  return NULL;
 }
+#endif
+
 
-static int decompress_block(size_t* decompressed_size, char* data, FILE* fp)
+/* Decodes all blocks of index, using up to MAX_THREADS threads for
+   files of at least BLOCKS_PER_THREAD blocks per thread. */
+static int decode_blocks(block_index_t* index)
 {
-  size_t block_size;
-  char* buffer;
-  int errorno=NO_ERROR;
-  
-  block_size = get_block_size(fp);
-  buffer = (char*) malloc(sizeof(char)*block_size);
-  for(size_t i=0; i<block_size; ++i){
-    if (fread(&(buffer[i]), sizeof(char), 1, fp)==0){
-      /* stream ended unexpectedly */
-      errorno=ERROR_UNEXPECTED_END_OF_FILE;
-      break;
+  size_t i;
+  size_t n_threads=1;
+#ifndef _WIN32
+  pthread_t threads[MAX_THREADS];
+  block_range_t ranges[MAX_THREADS];
+  size_t n_started=0;
+  long n_cpus=sysconf(_SC_NPROCESSORS_ONLN);
+
+  n_threads=index->n_blocks/BLOCKS_PER_THREAD;
+  if ((long) n_threads>n_cpus)
+    n_threads=(size_t) n_cpus;
+  if (n_threads>MAX_THREADS)
+    n_threads=MAX_THREADS;
+  if (n_threads>1){
+    /* the calling thread decodes the first range itself. */
+    for (i=0; i<n_threads; i++){
+      ranges[i].index=index;
+      ranges[i].first=i*index->n_blocks/n_threads;
+      ranges[i].last=(i+1)*index->n_blocks/n_threads;
+    }
+    for (i=1; i<n_threads; i++){
+      if (pthread_create(&threads[i], NULL, decode_block_range_thread, &ranges[i])!=0)
+	break;
+      n_started++;
     }
+    decode_block_range(index, ranges[0].first, ranges[0].last);
+    /* ranges for which no thread could be started are decoded here */
+    if (n_started+1<n_threads)
+      decode_block_range(index, ranges[n_started+1].first, index->n_blocks);
+    for (i=1; i<=n_started; i++)
+      pthread_join(threads[i], NULL);
   }
-  if (errorno==NO_ERROR){
-    *decompressed_size = LZ4_decompress_safe_partial (buffer, data, block_size, CHUNKSIZE, CHUNKSIZE);
+#endif
+  if (n_threads<=1)
+    decode_block_range(index, 0, index->n_blocks);
+  for (i=0; i<index->n_blocks; i++){
+    if (index->decoded_size[i]<0)
+      return ERROR_UNEXPECTED_END_OF_FILE; /* corrupt block */
   }
-  else {
-    *decompressed_size=0;
+  return NO_ERROR;
+}
+
+
+
+/* Closes the gaps left in index->output by blocks shorter than
+   CHUNKSIZE and returns the number of bytes decoded. */
+static size_t pack_blocks(block_index_t* index)
+{
+  size_t i;
+  size_t size=0;
+
+  for (i=0; i<index->n_blocks; i++){
+    if (size!=i*CHUNKSIZE)
+      memmove(index->output+size, index->output+i*CHUNKSIZE, index->decoded_size[i]);
+    size+=index->decoded_size[i];
   }
-  free(buffer);
-  return errorno;
+  return size;
 }
 
+static void get_filename_ext(const char *filename, char* extension)
+{
+  const char *dot = strrchr(filename, '.');
+  if(!dot || dot == filename){
+    extension[0]='\0';
+  }
+  else{
+    dot+=1;
+    extension = strcpy(extension, dot);
+  }
+}
 
 
+static size_t get_file_size(FILE* fp)
+{
+    size_t current_position = ftell(fp);
+    fseek(fp, 0, 2);
+    size_t file_size = ftell(fp);
+    fseek(fp, current_position, 0);
+    return file_size;
+}
@@ -27,17 +27,61 @@ typedef union {
 } to_float_t;
 
 
+struct block_stream_s;
+
+/* A compressed file that is decompressed while it is read. Only a
+   window of the decompressed data is held: data[0] is byte start of
+   the file, and the window holds size bytes. */
+typedef struct {
+  struct block_stream_s *blocks;
+  unsigned char *data;
+  size_t start;
+  size_t size;
+  size_t capacity;
+  int errorno;      /* error decompressing the file */
+} dbd_stream_t;
+
+/* The (decompressed) contents of a data file. For uncompressed files
+   data is a read-only memory map of the file where supported,
+   otherwise it is a heap buffer. Compressed files are either
+   decompressed into a heap buffer, or, if stream is not NULL, a block
+   at a time as the reader moves through the file. */
 typedef struct {
-  FILE *fd;
+  unsigned char *data;
+  size_t size;
+  int is_mapped;
+  dbd_stream_t *stream;
+} dbd_buffer_t;
+
+/* cycle_offsets, if not NULL, holds the positions of the state bytes
+   of n_cycles cycles (as produced by get_cycle_index). The reader then
+   visits these cycles instead of following the chain of cycles from
+   the start of the binary data. cycle_times, if not NULL, holds the
+   time stamps of these cycles, which lets the reader jump to a time
+   window. */
+typedef struct {
+  dbd_buffer_t buffer;
   long bin_offset;
   int n_state_bytes;
   int n_sensors;
   int *byteSizes;
+  const double *cycle_offsets;
+  const double *cycle_times;
+  int n_cycles;
 } file_info_t;
 
+/* Rows of values that share one time stamp, as read by get_table(). */
+typedef struct {
+  double *t;        /* time stamp of each row */
+  double *values;   /* n_rows x n_columns values, row major */
+  int n_columns;
+  int n_rows;
+  int capacity;     /* number of rows allocated */
+} table_t;
+
 
-FILE *open_dbd_file(char *filename, int* errorno);
-void close_dbd_file(FILE *fd);
+int open_dbd_file(char *filename, dbd_buffer_t *buffer, int stream);
+int close_dbd_file(dbd_buffer_t *buffer);
 double ***get_variable(int ti,
 		       int *vi,
 		       int nv,
@@ -45,7 +89,44 @@ double ***get_variable(int ti,
 		       int return_nans,
 		       int *n_data,
 		       int skip_initial_line,
-		       int max_values_to_read);
+		       int max_values_to_read,
+		       double t_min,
+		       double t_max);
+void count_variable(int ti,
+		    int *vi,
+		    int nv,
+		    file_info_t FileInfo,
+		    int return_nans,
+		    int *ndata,
+		    int skip_initial_line,
+		    int max_values_to_read,
+		    double t_min,
+		    double t_max);
+void get_variable_into(int ti,
+		       int *vi,
+		       int nv,
+		       file_info_t FileInfo,
+		       int return_nans,
+		       double ***data,
+		       int *capacity,
+		       int *ndata,
+		       int skip_initial_line,
+		       int max_values_to_read,
+		       double t_min,
+		       double t_max);
+int get_table(int ti,
+	      int *vi,
+	      int *columns,
+	      int nv,
+	      file_info_t FileInfo,
+	      int skip_initial_line,
+	      int max_values_to_read,
+	      double t_min,
+	      double t_max,
+	      table_t *table);
+double **get_cycle_index(int ti,
+			 file_info_t FileInfo,
+			 int *n_cycles);
 
 
 #endif
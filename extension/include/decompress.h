@@ -6,13 +6,17 @@
 #include <string.h>
 #include <lz4.h>
 
-#define CHUNKSIZE 1024*32
-#define MAX_IN_MEMORY_FILE_SIZE 1024*1024*1024
+#define CHUNKSIZE (1024*32)
+#define SIZEFIELDSIZE 2
+#define MAX_BLOCK_SIZE 65535 /* the size field of a block holds 2 bytes */
+#define MAX_THREADS 8
+#define BLOCKS_PER_THREAD 16 /* smaller files are decoded by one thread */
 
 #define NO_ERROR 0
 #define ERROR_UNEXPECTED_END_OF_FILE 1
 #define ERROR_FILE_NOT_FOUND 2
 #define ERROR_FAILED_TO_WRITE_BASE_FILE 3
+#define ERROR_BUFFER_TOO_SMALL 4
 
 
 /* Returns 0/1 if filename is compressed.
@@ -22,7 +26,53 @@
 const int is_file_compressed(const char *filename);
 
 
-FILE* fopen_compressed_file(const char* filename, int* errorno);
+/* A compressed file, decoded one block at a time. */
+typedef struct block_stream_s {
+  FILE* fp;
+  size_t compressed_size;
+  size_t position;  /* of the next block in the compressed file */
+  unsigned char compressed[MAX_BLOCK_SIZE];
+} block_stream_t;
+
+
+/* The blocks of a compressed file held in memory. Block i starts at
+ * compressed+offset[i] and is decoded into output+i*CHUNKSIZE.
+ */
+typedef struct {
+  const unsigned char* compressed;
+  size_t compressed_size;
+  size_t n_blocks;
+  size_t* offset;
+  int* decoded_size;  /* bytes decoded, or < 0 if the block is corrupt */
+  unsigned char* output;
+} block_index_t;
+
+
+block_stream_t* open_block_stream(const char* filename, int* errorno);
+
+/* Decodes the next block into dst (room for CHUNKSIZE bytes). *n is 0
+ * at the end of the file.
+ */
+int read_block(block_stream_t* stream, unsigned char* dst, size_t* n);
+
+void close_block_stream(block_stream_t* stream);
+
+/* Decompresses filename into a heap buffer (*data, *size bytes), to be
+ * freed by the caller. Returns NO_ERROR on success.
+ */
+int decompress_file_to_buffer(const char* filename, unsigned char** data, size_t* size);
+
+/* As decompress_file_to_buffer(), for compressed data held in memory.
+ */
+int decompress_data_to_buffer(const unsigned char* compressed, size_t compressed_size,
+			      unsigned char** data, size_t* size);
+
+/* As decompress_data_to_buffer(), decoding into output (capacity
+ * bytes). Returns ERROR_BUFFER_TOO_SMALL, with *size the capacity
+ * needed, if output cannot hold all blocks.
+ */
+int decompress_data_into(const unsigned char* compressed, size_t compressed_size,
+			 unsigned char* output, size_t capacity, size_t* size);
 
 
 #endif
@@ -1,14 +1,190 @@
 #include "Python.h"
 #include <stdlib.h>
+#include <string.h>
+#include <math.h>
 #include "dbdreader.h"
 #include "decompress.h"
 
 static char py_get_doc[]="to do";
 
+/* Float64Buffer: a minimal object that takes ownership of a malloc'ed
+   array of doubles and exposes it through the buffer protocol (format
+   "d"), so that numpy.asarray() can wrap the data produced by the
+   reader without boxing every value in a PyFloat or copying it.  The
+   array is freed when the last reference to the object goes away.
+   The array is either a vector, or a row major matrix (ndim=2). */
+
+typedef struct {
+  PyObject_HEAD
+  double *data;
+  int ndim;
+  Py_ssize_t shape[2];
+  Py_ssize_t strides[2];
+} Float64Buffer;
+
+static void
+Float64Buffer_dealloc(Float64Buffer *self)
+{
+  free(self->data);
+  Py_TYPE(self)->tp_free((PyObject *) self);
+}
+
+static int
+Float64Buffer_getbuffer(Float64Buffer *self, Py_buffer *view, int flags)
+{
+  view->obj = (PyObject *) self;
+  Py_INCREF(self);
+  view->buf = (void *) self->data;
+  view->len = self->shape[0] * (Py_ssize_t) sizeof(double);
+  if (self->ndim==2)
+    view->len *= self->shape[1];
+  view->readonly = 0;
+  view->itemsize = sizeof(double);
+  view->format = (flags & PyBUF_FORMAT) ? "d" : NULL;
+  view->ndim = self->ndim;
+  view->shape = (flags & PyBUF_ND) ? self->shape : NULL;
+  view->strides = ((flags & PyBUF_STRIDES) == PyBUF_STRIDES) ? self->strides : NULL;
+  view->suboffsets = NULL;
+  view->internal = NULL;
+  return 0;
+}
+
+static Py_ssize_t
+Float64Buffer_length(Float64Buffer *self)
+{
+  return self->shape[0];
+}
+
+static PyBufferProcs Float64Buffer_as_buffer = {
+  (getbufferproc) Float64Buffer_getbuffer,
+  (releasebufferproc) NULL
+};
+
+static PySequenceMethods Float64Buffer_as_sequence = {
+  .sq_length = (lenfunc) Float64Buffer_length,
+};
+
+static PyTypeObject Float64BufferType = {
+  PyVarObject_HEAD_INIT(NULL, 0)
+  .tp_name = "_dbdreader.Float64Buffer",
+  .tp_doc = "Contiguous float64 data owned by the reader (buffer protocol).",
+  .tp_basicsize = sizeof(Float64Buffer),
+  .tp_itemsize = 0,
+  .tp_flags = Py_TPFLAGS_DEFAULT,
+  .tp_dealloc = (destructor) Float64Buffer_dealloc,
+  .tp_as_buffer = &Float64Buffer_as_buffer,
+  .tp_as_sequence = &Float64Buffer_as_sequence,
+};
+
+/* Wraps data (n doubles) in a Float64Buffer. Ownership of data is
+   transferred to the new object; on failure data is freed and NULL is
+   returned. */
 static PyObject *
+new_float64_buffer(double *data, Py_ssize_t n)
+{
+  Float64Buffer *self;
+  double *trimmed;
 
+  /* give back the unused part of the last block allocated by the reader */
+  if (n>0){
+    trimmed=(double *)realloc(data, n*sizeof(double));
+    if (trimmed!=NULL)
+      data=trimmed;
+  }
+  self = PyObject_New(Float64Buffer, &Float64BufferType);
+  if (self==NULL){
+    free(data);
+    return NULL;
+  }
+  self->data = data;
+  self->ndim = 1;
+  self->shape[0] = n;
+  self->strides[0] = sizeof(double);
+  return (PyObject *) self;
+}
 
-py_get(PyObject *self, PyObject *args)
+/* As new_float64_buffer(), for a row major matrix of n_rows x n_columns. */
+static PyObject *
+new_float64_matrix(double *data, Py_ssize_t n_rows, Py_ssize_t n_columns)
+{
+  Float64Buffer *self;
+
+  self = (Float64Buffer *) new_float64_buffer(data, n_rows*n_columns);
+  if (self==NULL)
+    return NULL;
+  self->ndim = 2;
+  self->shape[0] = n_rows;
+  self->shape[1] = n_columns;
+  self->strides[0] = n_columns * (Py_ssize_t) sizeof(double);
+  self->strides[1] = sizeof(double);
+  return (PyObject *) self;
+}
+
+/* Gets a view on obj, which must be a contiguous buffer of doubles,
+   such as the cycle offsets and times returned by get_cycle_index().
+   flags may add PyBUF_WRITABLE for output buffers. The view must be
+   released by the caller when the reading is done. Returns 0 on
+   success, -1 (with a python exception set) on failure. */
+static int get_float64_view(PyObject *obj, Py_buffer *view, const char *name, int flags)
+{
+  if (PyObject_GetBuffer(obj, view, PyBUF_C_CONTIGUOUS | PyBUF_FORMAT | flags) < 0)
+    return -1;
+  if ((view->itemsize!=sizeof(double)) ||
+      ((strcmp(view->format, "d")!=0) && (strcmp(view->format, "@d")!=0) &&
+       (strcmp(view->format, "=d")!=0))){
+    PyBuffer_Release(view);
+    PyErr_Format(PyExc_TypeError, "%s must be a contiguous float64 buffer", name);
+    return -1;
+  }
+  return 0;
+}
+
+/* Points FileInfo at the optional cycle index (cycleOffsets and
+   cycleTimes may be Py_None). The views must be released with
+   release_cycle_index() when the reading is done. Returns 0 on
+   success, -1 (with a python exception set) on failure. */
+static int get_cycle_index_views(PyObject *cycleOffsets, PyObject *cycleTimes,
+				 Py_buffer *offsetsView, Py_buffer *timesView,
+				 file_info_t *FileInfo)
+{
+  FileInfo->cycle_offsets=NULL;
+  FileInfo->cycle_times=NULL;
+  FileInfo->n_cycles=0;
+  if (cycleOffsets==Py_None)
+    return 0;
+  if (get_float64_view(cycleOffsets, offsetsView, "cycle_offsets", 0)<0)
+    return -1;
+  if (cycleTimes!=Py_None){
+    if (get_float64_view(cycleTimes, timesView, "cycle_times", 0)<0){
+      PyBuffer_Release(offsetsView);
+      return -1;
+    }
+    if (timesView->len!=offsetsView->len){
+      PyBuffer_Release(offsetsView);
+      PyBuffer_Release(timesView);
+      PyErr_SetString(PyExc_ValueError, "cycle_offsets and cycle_times differ in length");
+      return -1;
+    }
+    FileInfo->cycle_times=(const double *) timesView->buf;
+  }
+  FileInfo->cycle_offsets=(const double *) offsetsView->buf;
+  FileInfo->n_cycles=(int) (offsetsView->len/offsetsView->itemsize);
+  return 0;
+}
+
+static void release_cycle_index(Py_buffer *offsetsView, Py_buffer *timesView,
+				file_info_t *FileInfo)
+{
+  if (FileInfo->cycle_offsets!=NULL)
+    PyBuffer_Release(offsetsView);
+  if (FileInfo->cycle_times!=NULL)
+    PyBuffer_Release(timesView);
+}
+
+static PyObject *
+
+
+py_get(PyObject *self, PyObject *args, PyObject *kwds)
 {
   file_info_t FileInfo; /*FileInfo, see python code */
   double ***data;       /*three d data array        */
@@ -23,16 +199,26 @@ py_get(PyObject *self, PyObject *args)
   int bs;               /*byte syze (counter) */
   char *filename;         
   PyObject *containerList;  /* list with [ti,vi] for each parameter */
-  PyObject *tiList, *viList;
   PyObject *tmp;
   int return_nans;       /* int flagging to return nans in the array or not.*/
   int skip_initial_line; /* int flagging to read or not the initial data line. Default should be not -> skip_initial_line=1 */
   int max_values_to_read;
+  PyObject *cycleOffsets=Py_None; /* optional cycle index positions */
+  PyObject *cycleTimes=Py_None;   /* optional cycle index time stamps */
+  Py_buffer offsetsView;
+  Py_buffer timesView;
+  double t_min=-INFINITY;         /* time window to read */
+  double t_max=INFINITY;
+  static char *kwlist[]={"n_state_bytes", "n_sensors", "bin_offset", "byte_sizes",
+			 "filename", "ti", "vi", "return_nans", "skip_initial_line",
+			 "max_values_to_read", "cycle_offsets", "cycle_times",
+			 "t_min", "t_max", NULL};
 
-  int i,j,k;
+  int i,j;
   int errorno = 0;
+  int stream_errorno;
   
-  if (!PyArg_ParseTuple(args,"iilOsiOiii:get",
+  if (!PyArg_ParseTupleAndKeywords(args,kwds,"iilOsiOiii|OOdd:get",kwlist,
 			&n_state_bytes,
 			&n_sensors,
 			&bin_offset,
@@ -42,20 +228,16 @@ py_get(PyObject *self, PyObject *args)
 			&viTuple,
 			&return_nans,
 			&skip_initial_line,
-			&max_values_to_read))
+			&max_values_to_read,
+			&cycleOffsets,
+			&cycleTimes,
+			&t_min,
+			&t_max))
     {
       return NULL;
     }
-  /* New feature of science files in glider firemware 11.0 -- 11.4 is that they can be corrupted. Let's
-     see if we can open the file at all... */
-  FileInfo.fd=open_dbd_file(filename, &errorno);
-  if (errorno != 0){
-    PyObject* empty_list = PyList_New(0);
-    PyObject* result = Py_BuildValue("(iN)", errorno, empty_list);
-    return result;
-  }
-  /* All seems well, lets try to read the file. */
-
+  if (get_cycle_index_views(cycleOffsets, cycleTimes, &offsetsView, &timesView, &FileInfo)<0)
+    return NULL;
   FileInfo.byteSizes=(int*)malloc(n_sensors*sizeof(int));
 
   for(i=0;i<n_sensors;i++){
@@ -71,40 +253,821 @@ py_get(PyObject *self, PyObject *args)
   FileInfo.bin_offset=bin_offset;
   FileInfo.n_state_bytes=n_state_bytes;
   FileInfo.n_sensors=n_sensors;
-  data=get_variable(ti,vi,nv,FileInfo,return_nans,ndata, skip_initial_line, max_values_to_read);
-  close_dbd_file(FileInfo.fd);
-  /* good, got the data, now populate the lists */
+  data=NULL;
+  /* From here on no python objects are touched until the data have
+     been read, so other threads can run while we are decoding. */
+  Py_BEGIN_ALLOW_THREADS
+  /* New feature of science files in glider firemware 11.0 -- 11.4 is that they can be corrupted. Let's
+     see if we can open the file at all... */
+  /* Compressed files are decompressed while they are read, unless
+     the cycle index is used to jump around in the file. */
+  errorno=open_dbd_file(filename, &FileInfo.buffer, FileInfo.cycle_offsets==NULL);
+  if (errorno == 0){
+    /* All seems well, lets try to read the file. */
+    data=get_variable(ti,vi,nv,FileInfo,return_nans,ndata, skip_initial_line, max_values_to_read,
+		      t_min, t_max);
+  }
+  stream_errorno=close_dbd_file(&FileInfo.buffer);
+  if (errorno == 0)
+    errorno=stream_errorno;
+  Py_END_ALLOW_THREADS
+  release_cycle_index(&offsetsView, &timesView, &FileInfo);
+  if (errorno != 0){
+    for(i=0;(data!=NULL) && (i<nv);i++){
+      free(data[i][0]);
+      free(data[i][1]);
+      free(data[i]);
+    }
+    free(data);
+    free(FileInfo.byteSizes);
+    free(ndata);
+    free(vi);
+    PyObject* empty_list = PyList_New(0);
+    PyObject* result = Py_BuildValue("(iN)", errorno, empty_list);
+    return result;
+  }
+  /* good, got the data. Hand the arrays over to Float64Buffer objects,
+     which take ownership, so the data are not copied again. */
   containerList=PyList_New(2*nv);/* exclude time */
   for(i=0;i<nv;i++){
-    tiList=PyList_New(ndata[i]);
-    viList=PyList_New(ndata[i]);
-    for(k=0;k<ndata[i];k++){
-      tmp=PyFloat_FromDouble(data[i][0][k]);
-      PyList_SetItem(tiList,k,tmp);
-      tmp=PyFloat_FromDouble(data[i][1][k]);
-      PyList_SetItem(viList,k,tmp);
+    for(j=0;j<2;++j){
+      if (containerList==NULL){
+	free(data[i][j]); /* an earlier step failed, just clean up. */
+	continue;
+      }
+      tmp=new_float64_buffer(data[i][j], ndata[i]); /* frees data[i][j] on failure */
+      if (tmp==NULL){
+	Py_CLEAR(containerList);
+	continue;
+      }
+      PyList_SetItem(containerList,j*nv+i,tmp);
     }
-    PyList_SetItem(containerList,i,tiList);
-    PyList_SetItem(containerList,nv+i,viList);
+    free(data[i]);
   }
   /* clean up dynamically allocated memory blocks */
   free(FileInfo.byteSizes);
   free(ndata);
   free(vi);
+  free(data);
+  if (containerList==NULL)
+    return NULL;
+  return Py_BuildValue("iN",0, containerList); // return errorcode 0, and the list.
+}
 
-  for(i=0;i<nv;++i){
-    for(j=0;j<2;++j){
-      free(data[i][j]);
+
+static char py_get_count_doc[]=
+  "get_count(n_state_bytes, n_sensors, bin_offset, byte_sizes, filename, ti, vi,\n"
+  "          return_nans, skip_initial_line, max_values_to_read,\n"
+  "          cycle_offsets=None, cycle_times=None, t_min=-inf, t_max=inf)\n\n"
+  "Returns (error_no, counts): the number of values get() returns for\n"
+  "each of the sensors vi (sorted), without storing the values.";
+
+static char py_get_into_doc[]=
+  "get_into(n_state_bytes, n_sensors, bin_offset, byte_sizes, filename, ti, vi,\n"
+  "         return_nans, skip_initial_line, max_values_to_read, t_buffers,\n"
+  "         v_buffers, cycle_offsets=None, cycle_times=None, t_min=-inf,\n"
+  "         t_max=inf)\n\n"
+  "As get(), but writes the time stamps and values of each of the sensors\n"
+  "vi (sorted) to the writable, contiguous float64 buffers in t_buffers\n"
+  "and v_buffers, such as slices of preallocated numpy arrays. Returns\n"
+  "(error_no, counts), as get_count(); values beyond the length of a\n"
+  "buffer are counted, but not written.";
+
+/* Implements get_count() (t_buffers is NULL) and get_into(). */
+static PyObject *
+get_into(PyObject *args, PyObject *kwds, int count_only)
+{
+  file_info_t FileInfo;
+  int ti, *vi, nv;
+  long bin_offset;
+  PyObject *byteSizes;
+  PyObject *viTuple;
+  char *filename;
+  int return_nans;
+  int skip_initial_line;
+  int max_values_to_read;
+  PyObject *tBuffers=NULL;
+  PyObject *vBuffers=NULL;
+  PyObject *cycleOffsets=Py_None;
+  PyObject *cycleTimes=Py_None;
+  Py_buffer offsetsView;
+  Py_buffer timesView;
+  Py_buffer *views=NULL;  /* t and v view of each sensor */
+  double ***data=NULL;
+  int *capacity=NULL;
+  int *ndata;
+  double t_min=-INFINITY;
+  double t_max=INFINITY;
+  static char *count_kwlist[]={"n_state_bytes", "n_sensors", "bin_offset", "byte_sizes",
+			       "filename", "ti", "vi", "return_nans", "skip_initial_line",
+			       "max_values_to_read", "cycle_offsets", "cycle_times",
+			       "t_min", "t_max", NULL};
+  static char *into_kwlist[]={"n_state_bytes", "n_sensors", "bin_offset", "byte_sizes",
+			      "filename", "ti", "vi", "return_nans", "skip_initial_line",
+			      "max_values_to_read", "t_buffers", "v_buffers", "cycle_offsets",
+			      "cycle_times", "t_min", "t_max", NULL};
+  PyObject *counts;
+  PyObject *buffer;
+  int i, j;
+  int n_views=0;
+  int errorno = 0;
+  int stream_errorno;
+
+  if (count_only){
+    if (!PyArg_ParseTupleAndKeywords(args,kwds,"iilOsiOiii|OOdd:get_count",count_kwlist,
+				     &FileInfo.n_state_bytes, &FileInfo.n_sensors,
+				     &bin_offset, &byteSizes, &filename, &ti, &viTuple,
+				     &return_nans, &skip_initial_line, &max_values_to_read,
+				     &cycleOffsets, &cycleTimes, &t_min, &t_max))
+      return NULL;
+  }
+  else {
+    if (!PyArg_ParseTupleAndKeywords(args,kwds,"iilOsiOiiiOO|OOdd:get_into",into_kwlist,
+				     &FileInfo.n_state_bytes, &FileInfo.n_sensors,
+				     &bin_offset, &byteSizes, &filename, &ti, &viTuple,
+				     &return_nans, &skip_initial_line, &max_values_to_read,
+				     &tBuffers, &vBuffers,
+				     &cycleOffsets, &cycleTimes, &t_min, &t_max))
+      return NULL;
+  }
+  nv=(int)PyTuple_Size(viTuple);
+  if (nv<0)
+    return NULL;
+  if (!count_only){
+    if ((PySequence_Size(tBuffers)!=nv) || (PySequence_Size(vBuffers)!=nv)){
+      PyErr_SetString(PyExc_ValueError,
+		      "get_into: t_buffers and v_buffers should have a buffer for each sensor.");
+      return NULL;
+    }
+    /* views[2*i] and views[2*i+1]: time and value buffer of sensor i */
+    views=(Py_buffer *)malloc(2*(nv>0? nv : 1)*sizeof(Py_buffer));
+    data=(double ***)malloc((nv>0? nv : 1)*sizeof(double **));
+    capacity=(int*)malloc((nv>0? nv : 1)*sizeof(int));
+    for(i=0;i<nv;i++)
+      data[i]=(double **)malloc(2*sizeof(double *));
+    for(i=0;i<2*nv;i++){
+      buffer=PySequence_GetItem((i%2)? vBuffers : tBuffers, i/2);
+      if ((buffer==NULL) ||
+	  (get_float64_view(buffer, &views[i], (i%2)? "v_buffers" : "t_buffers",
+			    PyBUF_WRITABLE)<0)){
+	Py_XDECREF(buffer);
+	break;
+      }
+      Py_DECREF(buffer);
+      data[i/2][i%2]=(double *)views[i].buf;
+      n_views++;
     }
+    for(i=0;i<nv && n_views==2*nv;i++){
+      capacity[i]=(int)(views[2*i].len/views[2*i].itemsize);
+      if (views[2*i+1].len/views[2*i+1].itemsize < capacity[i])
+	capacity[i]=(int)(views[2*i+1].len/views[2*i+1].itemsize);
+    }
+  }
+  if ((!count_only && (n_views!=2*nv)) ||
+      (get_cycle_index_views(cycleOffsets, cycleTimes, &offsetsView, &timesView, &FileInfo)<0)){
+    for(i=0;i<n_views;i++)
+      PyBuffer_Release(&views[i]);
+    for(i=0;(data!=NULL) && (i<nv);i++)
+      free(data[i]);
+    free(data);
+    free(capacity);
+    free(views);
+    return NULL;
+  }
+  FileInfo.bin_offset=bin_offset;
+  FileInfo.byteSizes=(int*)malloc(FileInfo.n_sensors*sizeof(int));
+  for(i=0;i<FileInfo.n_sensors;i++){
+    FileInfo.byteSizes[i]=(int)PyLong_AsLong(PyTuple_GetItem(byteSizes,i));
+  }
+  vi=(int*)malloc((nv>0? nv : 1)*sizeof(int));
+  for(i=0;i<nv;i++){
+    vi[i]=(int)PyLong_AsLong(PyTuple_GetItem(viTuple,i));
+  }
+  ndata=(int*)calloc((nv>0? nv : 1), sizeof(int));
+  Py_BEGIN_ALLOW_THREADS
+  errorno=open_dbd_file(filename, &FileInfo.buffer, FileInfo.cycle_offsets==NULL);
+  if (errorno == 0){
+    if (count_only)
+      count_variable(ti, vi, nv, FileInfo, return_nans, ndata, skip_initial_line,
+		     max_values_to_read, t_min, t_max);
+    else
+      get_variable_into(ti, vi, nv, FileInfo, return_nans, data, capacity, ndata,
+			skip_initial_line, max_values_to_read, t_min, t_max);
+  }
+  stream_errorno=close_dbd_file(&FileInfo.buffer);
+  if (errorno == 0)
+    errorno=stream_errorno;
+  Py_END_ALLOW_THREADS
+  release_cycle_index(&offsetsView, &timesView, &FileInfo);
+  for(i=0;i<n_views;i++)
+    PyBuffer_Release(&views[i]);
+  for(i=0;(data!=NULL) && (i<nv);i++)
     free(data[i]);
+  free(data);
+  free(capacity);
+  free(views);
+  free(FileInfo.byteSizes);
+  free(vi);
+  if (errorno != 0){
+    free(ndata);
+    return Py_BuildValue("(iO)", errorno, Py_None);
+  }
+  counts=PyTuple_New(nv);
+  for(j=0;(counts!=NULL) && (j<nv);j++)
+    PyTuple_SET_ITEM(counts, j, PyLong_FromLong(ndata[j]));
+  free(ndata);
+  if (counts==NULL)
+    return NULL;
+  return Py_BuildValue("(iN)", 0, counts);
+}
+
+static PyObject *
+py_get_count(PyObject *self, PyObject *args, PyObject *kwds)
+{
+  return get_into(args, kwds, 1);
+}
+
+static PyObject *
+py_get_into(PyObject *self, PyObject *args, PyObject *kwds)
+{
+  return get_into(args, kwds, 0);
+}
+
+
+static char py_get_table_doc[]=
+  "get_table(n_state_bytes, n_sensors, bin_offset, byte_sizes, filename, ti, vi,\n"
+  "          skip_initial_line, max_values_to_read, cycle_offsets=None,\n"
+  "          cycle_times=None, t_min=-inf, t_max=inf)\n\n"
+  "Reads the sensors vi (in any order) with a single, shared time axis.\n"
+  "Returns (error_no, t, values): the time stamps of n cycles and a\n"
+  "Float64Buffer matrix of n x len(vi) values, row major. Values that are\n"
+  "not set are 1e9, as for get() with return_nans set. Columns for which\n"
+  "vi holds -1 (sensors that are not in the file) are NaN.";
+
+static PyObject *
+py_get_table(PyObject *self, PyObject *args, PyObject *kwds)
+{
+  file_info_t FileInfo;
+  table_t table;
+  int ti;
+  int *vi;             /* sensors to read, sorted */
+  int *columns;        /* columns[i]: column of vi[i] in the table */
+  int nv;              /* number of sensors to read */
+  int n_columns;
+  long bin_offset;
+  PyObject *byteSizes;
+  PyObject *viTuple;
+  char *filename;
+  int skip_initial_line;
+  int max_values_to_read;
+  PyObject *cycleOffsets=Py_None;
+  PyObject *cycleTimes=Py_None;
+  Py_buffer offsetsView;
+  Py_buffer timesView;
+  double t_min=-INFINITY;
+  double t_max=INFINITY;
+  PyObject *t;
+  PyObject *values;
+  static char *kwlist[]={"n_state_bytes", "n_sensors", "bin_offset", "byte_sizes",
+			 "filename", "ti", "vi", "skip_initial_line", "max_values_to_read",
+			 "cycle_offsets", "cycle_times", "t_min", "t_max", NULL};
+  int i, j, sensor;
+  int errorno = 0;
+  int stream_errorno;
+
+  if (!PyArg_ParseTupleAndKeywords(args,kwds,"iilOsiOii|OOdd:get_table",kwlist,
+				   &FileInfo.n_state_bytes,
+				   &FileInfo.n_sensors,
+				   &bin_offset,
+				   &byteSizes,
+				   &filename,
+				   &ti,
+				   &viTuple,
+				   &skip_initial_line,
+				   &max_values_to_read,
+				   &cycleOffsets,
+				   &cycleTimes,
+				   &t_min,
+				   &t_max))
+    {
+      return NULL;
+    }
+  FileInfo.bin_offset=bin_offset;
+  n_columns=(int)PyTuple_Size(viTuple);
+  if (n_columns<0)
+    return NULL;
+  if (get_cycle_index_views(cycleOffsets, cycleTimes, &offsetsView, &timesView, &FileInfo)<0)
+    return NULL;
+  FileInfo.byteSizes=(int*)malloc(FileInfo.n_sensors*sizeof(int));
+  for(i=0;i<FileInfo.n_sensors;i++){
+    FileInfo.byteSizes[i]=(int)PyLong_AsLong(PyTuple_GetItem(byteSizes,i));
+  }
+  /* collect the sensors present in the file, sorted as required by the
+     reader, and remember which column each belongs to. */
+  vi=(int*)malloc((n_columns+1)*sizeof(int));
+  columns=(int*)malloc((n_columns+1)*sizeof(int));
+  nv=0;
+  for(i=0;i<n_columns;i++){
+    sensor=(int)PyLong_AsLong(PyTuple_GetItem(viTuple,i));
+    if (sensor<0)
+      continue;
+    for(j=nv; (j>0) && (vi[j-1]>sensor); j--){
+      vi[j]=vi[j-1];
+      columns[j]=columns[j-1];
+    }
+    vi[j]=sensor;
+    columns[j]=i;
+    nv++;
+  }
+  table.n_columns=n_columns;
+  table.t=NULL;
+  table.values=NULL;
+  table.n_rows=0;
+  Py_BEGIN_ALLOW_THREADS
+  errorno=open_dbd_file(filename, &FileInfo.buffer, FileInfo.cycle_offsets==NULL);
+  if (errorno == 0){
+    get_table(ti, vi, columns, nv, FileInfo, skip_initial_line, max_values_to_read,
+	      t_min, t_max, &table);
+  }
+  stream_errorno=close_dbd_file(&FileInfo.buffer);
+  if (errorno == 0)
+    errorno=stream_errorno;
+  Py_END_ALLOW_THREADS
+  release_cycle_index(&offsetsView, &timesView, &FileInfo);
+  free(FileInfo.byteSizes);
+  free(vi);
+  free(columns);
+  if (errorno != 0){
+    free(table.t);
+    free(table.values);
+    return Py_BuildValue("(iOO)", errorno, Py_None, Py_None);
+  }
+  t=new_float64_buffer(table.t, table.n_rows); /* takes ownership */
+  values=new_float64_matrix(table.values, table.n_rows, table.n_columns);
+  if ((t==NULL) || (values==NULL)){
+    Py_XDECREF(t);
+    Py_XDECREF(values);
+    return NULL;
+  }
+  return Py_BuildValue("(iNN)", 0, t, values);
+}
+
+
+static char py_get_cycle_index_doc[]=
+  "get_cycle_index(n_state_bytes, n_sensors, bin_offset, byte_sizes, filename, ti)\n\n"
+  "Walks the cycles of a file once and returns (error_no, offsets, times):\n"
+  "the position of the state bytes of each cycle and the value of the\n"
+  "time variable ti in that cycle (carried forward if not updated, NaN\n"
+  "if not set), both as Float64Buffer objects. offsets can be passed to\n"
+  "get() to visit the cycles without following the chain of cycles.";
+
+static PyObject *
+py_get_cycle_index(PyObject *self, PyObject *args)
+{
+  file_info_t FileInfo;
+  double **index;
+  int n_cycles;
+  int ti;
+  long bin_offset;
+  PyObject *byteSizes;
+  char *filename;
+  PyObject *offsets;
+  PyObject *times;
+  int i;
+  int errorno = 0;
+  int stream_errorno;
+
+  if (!PyArg_ParseTuple(args,"iilOsi:get_cycle_index",
+			&FileInfo.n_state_bytes,
+			&FileInfo.n_sensors,
+			&bin_offset,
+			&byteSizes,
+			&filename,
+			&ti))
+    {
+      return NULL;
+    }
+  FileInfo.bin_offset=bin_offset;
+  FileInfo.cycle_offsets=NULL;
+  FileInfo.cycle_times=NULL;
+  FileInfo.n_cycles=0;
+  FileInfo.byteSizes=(int*)malloc(FileInfo.n_sensors*sizeof(int));
+  for(i=0;i<FileInfo.n_sensors;i++){
+    FileInfo.byteSizes[i]=(int)PyLong_AsLong(PyTuple_GetItem(byteSizes,i));
+  }
+  index=NULL;
+  Py_BEGIN_ALLOW_THREADS
+  errorno=open_dbd_file(filename, &FileInfo.buffer, 1);
+  if (errorno == 0){
+    index=get_cycle_index(ti, FileInfo, &n_cycles);
+  }
+  stream_errorno=close_dbd_file(&FileInfo.buffer);
+  if (errorno == 0)
+    errorno=stream_errorno;
+  Py_END_ALLOW_THREADS
+  free(FileInfo.byteSizes);
+  if (errorno != 0){
+    if (index!=NULL){
+      free(index[0]);
+      free(index[1]);
+      free(index);
+    }
+    return Py_BuildValue("(iOO)", errorno, Py_None, Py_None);
+  }
+  offsets=new_float64_buffer(index[0], n_cycles); /* takes ownership */
+  times=new_float64_buffer(index[1], n_cycles);
+  free(index);
+  if ((offsets==NULL) || (times==NULL)){
+    Py_XDECREF(offsets);
+    Py_XDECREF(times);
+    return NULL;
+  }
+  return Py_BuildValue("(iNN)", 0, offsets, times);
+}
+
+
+static char py_get_many_doc[]=
+  "get_many(descriptors, return_nans, max_values_to_read)\n\n"
+  "Reads the same parameters from a list of files in one call.\n\n"
+  "Each descriptor is a tuple (n_state_bytes, n_sensors, bin_offset,\n"
+  "byte_sizes, filename, ti, vi, skip_initial_line), where vi holds the\n"
+  "sensor index of each requested parameter in the caller's order (the\n"
+  "same number of parameters for every file). Returns (error_nos,\n"
+  "result, offsets): a tuple with the error number of each file, a list\n"
+  "[t_0, ..., t_{nv-1}, v_0, ..., v_{nv-1}] of concatenated Float64Buffer\n"
+  "objects, and for each parameter a tuple of n_files+1 offsets marking\n"
+  "where the data of each file start.";
+
+typedef struct {
+  file_info_t FileInfo;
+  char *filename;
+  int ti;
+  int *vi;        /* sensor indices, sorted as get_variable() requires */
+  int *position;  /* position[k]: index in vi of the k-th requested parameter */
+  int skip_initial_line;
+  int errorno;
+} batch_item_t;
+
+/* Fills item from a descriptor tuple. Returns 0 on success, -1 (with a
+   python exception set) on failure. */
+static int parse_batch_descriptor(PyObject *descriptor, int nv, batch_item_t *item)
+{
+  PyObject *byteSizes, *viSeq, *fast;
+  char *filename;
+  long bin_offset;
+  int i, k, tmp;
+  int *order;
+
+  if (!PyTuple_Check(descriptor)){
+    PyErr_SetString(PyExc_TypeError, "get_many: descriptors should be tuples.");
+    return -1;
+  }
+  if (!PyArg_ParseTuple(descriptor, "iilOsiOi:get_many",
+			&item->FileInfo.n_state_bytes,
+			&item->FileInfo.n_sensors,
+			&bin_offset,
+			&byteSizes,
+			&filename,
+			&item->ti,
+			&viSeq,
+			&item->skip_initial_line))
+    return -1;
+  if (PySequence_Size(viSeq)!=nv){
+    PyErr_SetString(PyExc_ValueError,
+		    "get_many: the same number of parameters should be requested for each file.");
+    return -1;
+  }
+  fast=PySequence_Fast(byteSizes, "get_many: byte sizes should be a sequence.");
+  if (fast==NULL)
+    return -1;
+  if (PySequence_Fast_GET_SIZE(fast) < item->FileInfo.n_sensors){
+    Py_DECREF(fast);
+    PyErr_SetString(PyExc_ValueError, "get_many: too few byte sizes for the number of sensors.");
+    return -1;
   }
+  item->FileInfo.bin_offset=bin_offset;
+  item->FileInfo.cycle_offsets=NULL;
+  item->FileInfo.cycle_times=NULL;
+  item->FileInfo.n_cycles=0;
+  item->filename=strdup(filename);
+  item->FileInfo.byteSizes=(int*)malloc(item->FileInfo.n_sensors*sizeof(int));
+  for(i=0;i<item->FileInfo.n_sensors;i++){
+    item->FileInfo.byteSizes[i]=(int)PyLong_AsLong(PySequence_Fast_GET_ITEM(fast, i));
+  }
+  Py_DECREF(fast);
+  /* vi comes in the caller's order. Sort it (insertion sort, nv is
+     small) and remember where each requested parameter ends up. */
+  item->vi=(int*)malloc(nv*sizeof(int));
+  item->position=(int*)malloc(nv*sizeof(int));
+  order=(int*)malloc(nv*sizeof(int));
+  for(k=0;k<nv;k++){
+    PyObject *o=PySequence_GetItem(viSeq, k);
+    item->vi[k]=(o==NULL)? 0 : (int)PyLong_AsLong(o);
+    Py_XDECREF(o);
+    order[k]=k;
+  }
+  for(k=1;k<nv;k++){
+    for(i=k; i>0 && item->vi[i-1]>item->vi[i]; i--){
+      tmp=item->vi[i]; item->vi[i]=item->vi[i-1]; item->vi[i-1]=tmp;
+      tmp=order[i]; order[i]=order[i-1]; order[i-1]=tmp;
+    }
+  }
+  for(i=0;i<nv;i++)
+    item->position[order[i]]=i;
+  free(order);
+  item->errorno=0;
+  if (PyErr_Occurred())
+    return -1;
+  return 0;
+}
+
+static void free_batch_item(batch_item_t *item)
+{
+  free(item->filename);
+  free(item->FileInfo.byteSizes);
+  free(item->vi);
+  free(item->position);
+}
+
+static PyObject *
+py_get_many(PyObject *self, PyObject *args)
+{
+  PyObject *descriptors;
+  PyObject *descriptor;
+  PyObject *errorTuple, *containerList, *offsetList, *offsetTuple, *tmp;
+  int return_nans;
+  int max_values_to_read;
+  Py_ssize_t n_files, f, m, count, written;
+  int nv, i, j, k;
+  int failed=0;
+  batch_item_t *items;
+  double ***tail;       /* where the data of the current file go */
+  int *tail_capacity;
+  int *ndata;
+  double **out[2];
+  double *grown;
+  Py_ssize_t *n_out;
+  Py_ssize_t *capacity;
+  Py_ssize_t *counts;   /* counts[f*nv+k]: number of values of parameter k in file f */
+  Py_ssize_t *offsets;
+  Py_ssize_t values_read_sofar=0;
+
+  if (!PyArg_ParseTuple(args,"O!ii:get_many",
+			&PyList_Type, &descriptors,
+			&return_nans,
+			&max_values_to_read))
+    return NULL;
+  n_files=PyList_Size(descriptors);
+  if (n_files==0){
+    PyErr_SetString(PyExc_ValueError, "get_many: no files given.");
+    return NULL;
+  }
+  descriptor=PyList_GetItem(descriptors, 0);
+  if (!PyTuple_Check(descriptor) || PyTuple_Size(descriptor)!=8){
+    PyErr_SetString(PyExc_TypeError, "get_many: descriptors should be tuples of length 8.");
+    return NULL;
+  }
+  nv=(int)PySequence_Size(PyTuple_GetItem(descriptor, 6));
+  if (nv<1){
+    PyErr_SetString(PyExc_ValueError, "get_many: no parameters requested.");
+    return NULL;
+  }
+  /* Convert all descriptors while we hold the GIL. */
+  items=(batch_item_t*)calloc(n_files, sizeof(batch_item_t));
+  for(f=0;f<n_files;f++){
+    if (parse_batch_descriptor(PyList_GetItem(descriptors, f), nv, &items[f])<0){
+      for(f=0;f<n_files;f++)
+	free_batch_item(&items[f]);
+      free(items);
+      return NULL;
+    }
+  }
+
+  out[0]=(double **)calloc(nv, sizeof(double *));
+  out[1]=(double **)calloc(nv, sizeof(double *));
+  n_out=(Py_ssize_t *)calloc(nv, sizeof(Py_ssize_t));
+  capacity=(Py_ssize_t *)calloc(nv, sizeof(Py_ssize_t));
+  counts=(Py_ssize_t *)calloc(nv*n_files, sizeof(Py_ssize_t));
+  offsets=(Py_ssize_t *)calloc(nv*(n_files+1), sizeof(Py_ssize_t));
+  ndata=(int*)malloc(nv*sizeof(int));
+  tail_capacity=(int*)malloc(nv*sizeof(int));
+  tail=(double ***)malloc(nv*sizeof(double **));
+  for(i=0;i<nv;i++)
+    tail[i]=(double **)malloc(2*sizeof(double *));
+
+  Py_BEGIN_ALLOW_THREADS
+  /* Each file is opened, and so decompressed, once: its values are
+     counted, the concatenated arrays are grown to hold them, after
+     which the data are decoded straight into their slice. The arrays
+     grow geometrically, so that they are reallocated a few times
+     only, and are trimmed to size at the end. */
+  for(f=0;f<n_files && !failed;f++){
+    batch_item_t *item=&items[f];
+    if ((max_values_to_read<=0) || (values_read_sofar < max_values_to_read)){
+      /* the file is decompressed as a whole */
+      item->errorno=open_dbd_file(item->filename, &item->FileInfo.buffer, 0);
+      if (item->errorno==0){
+	count_variable(item->ti, item->vi, nv, item->FileInfo, return_nans, ndata,
+		       item->skip_initial_line, max_values_to_read, -INFINITY, INFINITY);
+	for(k=0;k<nv;k++)
+	  counts[f*nv+k]=ndata[item->position[k]];
+	values_read_sofar+=ndata[item->position[0]];
+	for(k=0;k<nv && !failed;k++){
+	  if (n_out[k]+counts[f*nv+k]<=capacity[k])
+	    continue;
+	  capacity[k]=(2*capacity[k]>n_out[k]+counts[f*nv+k])? 2*capacity[k] : n_out[k]+counts[f*nv+k];
+	  for(j=0;j<2;j++){
+	    grown=(double *)realloc(out[j][k], capacity[k]*sizeof(double));
+	    if (grown==NULL)
+	      failed=1;
+	    else
+	      out[j][k]=grown;
+	  }
+	}
+      }
+      if (item->errorno==0 && !failed){
+	for(k=0;k<nv;k++){
+	  i=item->position[k];
+	  for(j=0;j<2;j++)
+	    tail[i][j]=out[j][k]+n_out[k];
+	  tail_capacity[i]=(int)counts[f*nv+k];
+	  ndata[i]=0;
+	}
+	get_variable_into(item->ti, item->vi, nv, item->FileInfo, return_nans, tail,
+			  tail_capacity, ndata, item->skip_initial_line, max_values_to_read,
+			  -INFINITY, INFINITY);
+	for(k=0;k<nv;k++){
+	  i=item->position[k];
+	  count=counts[f*nv+k];
+	  written=(ndata[i]<count)? ndata[i] : count;
+	  for(j=0;j<2;j++)
+	    for(m=written;m<count;m++)
+	      out[j][k][n_out[k]+m]=NAN;
+	  n_out[k]+=count;
+	}
+      }
+      close_dbd_file(&item->FileInfo.buffer);
+    }
+    /* else: enough values read, the remaining files contribute nothing. */
+    for(k=0;k<nv;k++)
+      offsets[k*(n_files+1)+f+1]=n_out[k];
+  }
+  for(k=0;k<nv && !failed;k++)
+    for(j=0;j<2;j++){
+      /* at least one value is allocated, also if nothing is read at all */
+      grown=(double *)realloc(out[j][k], (n_out[k]>0? n_out[k] : 1)*sizeof(double));
+      if (grown!=NULL)
+	out[j][k]=grown;
+      else if (out[j][k]==NULL)
+	failed=1;
+    }
+  Py_END_ALLOW_THREADS
+
+  errorTuple=NULL;
+  containerList=NULL;
+  offsetList=NULL;
+  if (failed){
+    PyErr_NoMemory();
+  }
+  else {
+    errorTuple=PyTuple_New(n_files);
+    for(f=0;errorTuple!=NULL && f<n_files;f++)
+      PyTuple_SET_ITEM(errorTuple, f, PyLong_FromLong(items[f].errorno));
+    containerList=PyList_New(2*nv);
+    offsetList=PyList_New(nv);
+  }
+  for(k=0;k<nv;k++){
+    for(j=0;j<2;j++){
+      if (containerList==NULL){
+	free(out[j][k]);
+	continue;
+      }
+      tmp=new_float64_buffer(out[j][k], n_out[k]);
+      if (tmp==NULL){
+	Py_CLEAR(containerList);
+	continue;
+      }
+      PyList_SetItem(containerList, j*nv+k, tmp);
+    }
+    if (offsetList!=NULL){
+      offsetTuple=PyTuple_New(n_files+1);
+      for(f=0;offsetTuple!=NULL && f<n_files+1;f++)
+	PyTuple_SET_ITEM(offsetTuple, f, PyLong_FromSsize_t(offsets[k*(n_files+1)+f]));
+      if (offsetTuple==NULL)
+	Py_CLEAR(offsetList);
+      else
+	PyList_SetItem(offsetList, k, offsetTuple);
+    }
+  }
+  for(f=0;f<n_files;f++)
+    free_batch_item(&items[f]);
+  free(items);
+  free(out[0]);
+  free(out[1]);
+  free(n_out);
+  free(capacity);
+  free(counts);
+  free(offsets);
+  free(ndata);
+  free(tail_capacity);
+  for(i=0;i<nv;i++)
+    free(tail[i]);
+  free(tail);
+  if (errorTuple==NULL || containerList==NULL || offsetList==NULL){
+    Py_XDECREF(errorTuple);
+    Py_XDECREF(containerList);
+    Py_XDECREF(offsetList);
+    return NULL;
+  }
+  return Py_BuildValue("NNN", errorTuple, containerList, offsetList);
+}
+
+static char py_decompress_blocks_doc[]=
+  "decompress_blocks(source)\n\n"
+  "Decompresses a compressed glider file, given by its filename, or\n"
+  "compressed data (a bytes-like object holding a sequence of blocks,\n"
+  "each preceded by its 2-byte size) and returns (error_no, data), where\n"
+  "data is a bytes object, or None if error_no is not 0. The GIL is\n"
+  "released while decompressing.";
+
+static PyObject *
+py_decompress_blocks(PyObject *self, PyObject *args)
+{
+  PyObject *source;
+  PyObject *result;
+  Py_buffer view;
+  const char *filename;
+  unsigned char *data;
+  size_t size;
+  int errorno;
+
+  if (!PyArg_ParseTuple(args,"O:decompress_blocks", &source))
+    return NULL;
+  if (PyUnicode_Check(source)){
+    filename=PyUnicode_AsUTF8(source);
+    if (filename==NULL)
+      return NULL;
+    Py_BEGIN_ALLOW_THREADS
+    errorno=decompress_file_to_buffer(filename, &data, &size);
+    Py_END_ALLOW_THREADS
+  }
+  else{
+    if (PyObject_GetBuffer(source, &view, PyBUF_SIMPLE)<0)
+      return NULL;
+    Py_BEGIN_ALLOW_THREADS
+    errorno=decompress_data_to_buffer((const unsigned char *) view.buf, (size_t) view.len,
+				      &data, &size);
+    Py_END_ALLOW_THREADS
+    PyBuffer_Release(&view);
+  }
+  if (errorno != 0)
+    return Py_BuildValue("(iO)", errorno, Py_None);
+  result=PyBytes_FromStringAndSize((const char *) data, (Py_ssize_t) size);
   free(data);
-  return Py_BuildValue("iN",0, containerList); // return errorcode 0, and the list.
+  if (result==NULL)
+    return NULL;
+  return Py_BuildValue("(iN)", 0, result);
 }
 
 
+static char py_decompress_blocks_into_doc[]=
+  "decompress_blocks_into(source, buffer)\n\n"
+  "Decompresses compressed data (a bytes-like object, see\n"
+  "decompress_blocks()) straight into buffer, a writable bytes-like\n"
+  "object, and returns (error_no, size). On success the first size\n"
+  "bytes of buffer hold the decompressed data. If buffer is too small\n"
+  "to decode into, error_no is ERROR_BUFFER_TOO_SMALL and size is the\n"
+  "number of bytes buffer should have. The GIL is released while\n"
+  "decompressing.";
+
+static PyObject *
+py_decompress_blocks_into(PyObject *self, PyObject *args)
+{
+  Py_buffer source;
+  Py_buffer buffer;
+  size_t size;
+  int errorno;
+
+  if (!PyArg_ParseTuple(args,"y*w*:decompress_blocks_into", &source, &buffer))
+    return NULL;
+  Py_BEGIN_ALLOW_THREADS
+  errorno=decompress_data_into((const unsigned char *) source.buf, (size_t) source.len,
+			       (unsigned char *) buffer.buf, (size_t) buffer.len, &size);
+  Py_END_ALLOW_THREADS
+  PyBuffer_Release(&source);
+  PyBuffer_Release(&buffer);
+  return Py_BuildValue("(in)", errorno, (Py_ssize_t) size);
+}
+
 static PyMethodDef _dbdreadermethods[]={
-  {"get", py_get, METH_VARARGS,py_get_doc},
+  {"get", (PyCFunction)(void(*)(void)) py_get, METH_VARARGS | METH_KEYWORDS, py_get_doc},
+  {"get_many", py_get_many, METH_VARARGS, py_get_many_doc},
+  {"get_count", (PyCFunction)(void(*)(void)) py_get_count, METH_VARARGS | METH_KEYWORDS, py_get_count_doc},
+  {"get_into", (PyCFunction)(void(*)(void)) py_get_into, METH_VARARGS | METH_KEYWORDS, py_get_into_doc},
+  {"get_table", (PyCFunction)(void(*)(void)) py_get_table, METH_VARARGS | METH_KEYWORDS, py_get_table_doc},
+  {"get_cycle_index", py_get_cycle_index, METH_VARARGS, py_get_cycle_index_doc},
+  {"decompress_blocks", py_decompress_blocks, METH_VARARGS, py_decompress_blocks_doc},
+  {"decompress_blocks_into", py_decompress_blocks_into, METH_VARARGS, py_decompress_blocks_into_doc},
   {NULL    , NULL      ,0           ,NULL}
 };
 
@@ -131,7 +1094,17 @@ static struct PyModuleDef _dbdreader_module = {
 PyMODINIT_FUNC
 PyInit__dbdreader(void){
   PyObject *mod;
+  if (PyType_Ready(&Float64BufferType) < 0)
+    return NULL;
   mod = PyModule_Create(&_dbdreader_module);
+  if (mod==NULL)
+    return NULL;
+  Py_INCREF(&Float64BufferType);
+  if (PyModule_AddObject(mod, "Float64Buffer", (PyObject *) &Float64BufferType) < 0){
+    Py_DECREF(&Float64BufferType);
+    Py_DECREF(mod);
+    return NULL;
+  }
   /* not sure what this does:*/
   //PyModule_AddIntMacro(mod,MAGIC);
   return mod;
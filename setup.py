@@ -32,6 +32,8 @@ sources = ["extension/py_dbdreader.c",
            "extension/decompress.c"]
 include_dirs = ['extension/include']
 libraries = []
+# compressed files are decompressed by several threads (not on Windows)
+pthread_args = [] if sys.platform == 'win32' else ['-pthread']
 
 
 def _check_header_version(p):
@@ -89,6 +91,8 @@ setuptools.setup(
                              sources=sources,
                              libraries=libraries,
                              include_dirs=include_dirs,
-                             library_dirs=[])
+                             library_dirs=[],
+                             extra_compile_args=pthread_args,
+                             extra_link_args=pthread_args)
     ],
 )
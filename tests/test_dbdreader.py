@@ -13,6 +13,16 @@ def test_open():
     assert len(v) == 2 and len(v[0]) > 0
 
 
+def test_get_returns_float64_arrays():
+    # The reader hands over its own buffers; they should arrive as
+    # contiguous, writable float64 arrays.
+    dbd = dbdreader.DBD("dbdreader/data/amadeus-2014-204-05-000.sbd")
+    t, v = dbd.get("m_depth")
+    for x in (t, v):
+        assert isinstance(x, np.ndarray) and x.dtype == np.float64
+        assert x.flags.c_contiguous and x.flags.writeable
+
+
 def test_get_non_existing_variable():
     dbd = dbdreader.DBD("dbdreader/data/amadeus-2014-204-05-000.sbd")
     v = dbd.get("sci_water_pressure")
@@ -92,6 +102,56 @@ def test_non_standard_cache_dir_generate_cachefile():
     depth = dbd.get("m_depth")
     assert len(depth) == 2
 
+
+def test_sensor_lists_are_shared(tmp_path):
+    # Files with the same sensor list should share the parsed cache
+    # file, which is parsed again only when the cache file changes.
+    import shutil
+    fn0 = "dbdreader/data/amadeus-2014-204-05-000.sbd"
+    fn1 = "dbdreader/data/amadeus-2014-204-05-001.sbd"
+    cacheID = dbdreader.DBD(fn0).cacheID
+    shutil.copy(f"dbdreader/data/cac/{cacheID}.cac", tmp_path)
+    dbd0 = dbdreader.DBD(fn0, cacheDir=str(tmp_path))
+    dbd1 = dbdreader.DBD(fn1, cacheDir=str(tmp_path))
+    assert dbd0.cacheID == dbd1.cacheID
+    assert all(a is b for a, b in zip(dbd0.parameterNames, dbd1.parameterNames))
+    cacheFilename = str(tmp_path / f"{cacheID}.cac")
+    st = os.stat(cacheFilename)
+    os.utime(cacheFilename, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    dbd2 = dbdreader.DBD(fn0, cacheDir=str(tmp_path))
+    assert dbd2.parameterNames == dbd0.parameterNames
+    assert dbd2.parameterNames[0] is not dbd0.parameterNames[0]
+    assert dbd2.get("m_depth")[1].shape == dbd0.get("m_depth")[1].shape
+
+def test_header_inventory(tmp_path, monkeypatch):
+    # With the header inventory enabled, a file opened before should not
+    # have its header parsed again, unless it has been modified.
+    import shutil
+    fn = str(tmp_path / "amadeus-2014-204-05-000.sbd")
+    shutil.copy("dbdreader/data/amadeus-2014-204-05-000.sbd", fn)
+    dbd = dbdreader.DBD(fn, cacheDir="dbdreader/data/cac")
+    shutil.copy(f"dbdreader/data/cac/{dbd.cacheID}.cac", tmp_path)
+    monkeypatch.setattr(dbdreader.HeaderInventory, "ENABLED", True)
+    dbd = dbdreader.DBD(fn, cacheDir=str(tmp_path))
+    expected = dbd.get("m_depth")
+    def read_header(*p):
+        raise AssertionError("header was parsed")
+    with monkeypatch.context() as m:
+        m.setattr(dbdreader.DBD, "_read_header", read_header)
+        dbd1 = dbdreader.DBD(fn, cacheDir=str(tmp_path))
+    assert dbd1.headerInfo == dbd.headerInfo
+    assert dbd1.parameterNames == dbd.parameterNames
+    assert dbd1.fp_binary_start == dbd.fp_binary_start
+    assert dbd1.get_fileopen_time() == dbd.get_fileopen_time()
+    assert all(np.array_equal(a, b) for a, b in zip(dbd1.get("m_depth"), expected))
+    dbd1.close()
+    with open(fn, "ab") as fp:
+        fp.write(b"d")
+    with pytest.raises(AssertionError):
+        with monkeypatch.context() as m:
+            m.setattr(dbdreader.DBD, "_read_header", read_header)
+            dbdreader.DBD(fn, cacheDir=str(tmp_path))
+
     
 def test_G3S_data_file():
     #  Reading a G3S data file for which the byte order needs to be swapped
@@ -181,6 +241,303 @@ def test_get_reading_limited_values_requesting_multiple_parameters():
         dbd.get("m_depth", "m_pitch", max_values_to_read=10)
 
         
+def test_get_many_matches_get():
+    # Reading several files in one call should give the concatenated
+    # data of the individual files, with offsets marking each file.
+    from dbdreader.dbdreader import _dbdreader
+    fns = ["dbdreader/data/amadeus-2014-204-05-000.sbd",
+           "dbdreader/data/amadeus-2014-204-05-001.sbd"]
+    parameters = ("m_lat", "m_depth")
+    dbds = [dbdreader.DBD(fn) for fn in fns]
+    descriptors = []
+    for dbd in dbds:
+        ti = dbd.parameterNames.index(dbd.timeVariable)
+        vi = tuple(dbd.parameterNames.index(p) for p in parameters)
+        descriptors.append((dbd.n_state_bytes, dbd.headerInfo["sensors_per_cycle"],
+                            dbd.fp_binary_start, dbd.byteSizes, dbd.filename,
+                            ti, vi, 1))
+    error_nos, r, offsets = _dbdreader.get_many(descriptors, 0, 0)
+    assert error_nos == (0, 0)
+    for k, p in enumerate(parameters):
+        t = np.asarray(r[k])
+        v = np.asarray(r[len(parameters) + k])
+        for j, dbd in enumerate(dbds):
+            tj, vj = dbd.get(p, decimalLatLon=False, discardBadLatLon=False)
+            s = slice(offsets[k][j], offsets[k][j + 1])
+            assert np.array_equal(t[s], tj) and np.array_equal(v[s], vj)
+
+
+def test_python_reader_reuses_decompression_buffer(monkeypatch):
+    # Compressed files should be decompressed into the same buffer,
+    # which is not reallocated for a file that fits.
+    import threading
+    import dbdreader._dbdreader as _pyreader
+    monkeypatch.setattr(_pyreader, "_buffers", threading.local())
+    data = _pyreader._read_file("dbdreader/data/01600001.dcd")
+    buffer = data.obj
+    size = len(buffer)
+    del data
+    data = _pyreader._read_file("dbdreader/data/01600000.dcd")
+    assert data.obj is buffer and len(buffer) == size
+    with dbdreader.decompress.Decompressor("dbdreader/data/01600000.dcd") as d:
+        assert data == d.decompress()
+
+
+def test_python_reader_releases_large_decompression_buffer(monkeypatch):
+    # A buffer grown beyond the limit should not be kept for the next
+    # file, while the data read into it stays valid.
+    import threading
+    import dbdreader._dbdreader as _pyreader
+    monkeypatch.setattr(_pyreader, "_buffers", threading.local())
+    monkeypatch.setattr(_pyreader, "_MAX_KEPT_BUFFER_SIZE", 1024)
+    data = _pyreader._read_file("dbdreader/data/01600000.dcd")
+    assert _pyreader._buffers.buffer is None
+    with dbdreader.decompress.Decompressor("dbdreader/data/01600000.dcd") as d:
+        assert data == d.decompress()
+
+
+def test_python_reader_decodes_in_batches(monkeypatch):
+    # The pure python reader decodes the states of the cycles in
+    # batches; tiny batches should give the same data.
+    import dbdreader._dbdreader as _pyreader
+    fn = "dbdreader/data/amadeus-2014-204-05-000.dbd"
+    dbd = dbdreader.DBD(fn)
+    parameters = (dbd.parameterNames[3], "m_depth")
+    vi = tuple(sorted(dbd.parameterNames.index(p) for p in parameters))
+    args = (dbd.n_state_bytes, dbd.headerInfo["sensors_per_cycle"],
+            dbd.fp_binary_start, dbd.byteSizes, dbd.filename,
+            dbd.parameterNames.index(dbd.timeVariable), vi, 1, 1, 0)
+    expected = _pyreader.get(*args)
+    monkeypatch.setattr(_pyreader, "_BATCH_ELEMENTS", 50)
+    error_no, r = _pyreader.get(*args)
+    assert error_no == 0 and expected[0] == 0
+    for a, b in zip(r, expected[1]):
+        assert np.array_equal(a, b)
+    t, v = dbd.get("m_depth", return_nans=True)
+    assert np.array_equal(r[vi.index(dbd.parameterNames.index("m_depth")) + 2], v)
+
+
+def test_python_reader_finds_cycles_by_pointer_jumping():
+    # Finding the cycles by pointer jumping should give the cycles found
+    # by following them one by one, also if a separator is corrupt or
+    # the file is truncated.
+    import dbdreader._dbdreader as _pyreader
+    fn = "dbdreader/data/sebastian-2014-204-05-000.ebd"
+    dbd = dbdreader.DBD(fn)
+    n_sensors = dbd.headerInfo["sensors_per_cycle"]
+    chunk_lut = _pyreader._build_chunk_lut(dbd.n_state_bytes, n_sensors, list(dbd.byteSizes))
+    with open(fn, "rb") as fp:
+        data = fp.read()
+    expected = _pyreader._walk_cycles_serially(
+        data, dbd.n_state_bytes, dbd.fp_binary_start + 17, chunk_lut.tolist())
+    corrupt = bytearray(data[:-7])
+    corrupt[expected[len(expected) // 2] - 1] = 0
+    for d in [data, bytes(corrupt)]:
+        state_positions = _pyreader._walk_cycles(
+            d, dbd.n_state_bytes, n_sensors, dbd.fp_binary_start, list(dbd.byteSizes))
+        assert list(state_positions) == _pyreader._walk_cycles_serially(
+            d, dbd.n_state_bytes, dbd.fp_binary_start + 17, chunk_lut.tolist())
+    assert len(expected) == 4838
+
+
+def test_python_reader_stops_at_max_values_to_read(monkeypatch):
+    # With max_values_to_read set, the pure python reader should find
+    # only the first cycles of the file, and return the same values.
+    import dbdreader._dbdreader as _pyreader
+    fn = "dbdreader/data/sebastian-2014-204-05-000.ebd"
+    dbd = dbdreader.DBD(fn)
+    vi = (dbd.parameterNames.index("sci_water_temp"),)
+    args = (dbd.n_state_bytes, dbd.headerInfo["sensors_per_cycle"],
+            dbd.fp_binary_start, dbd.byteSizes, dbd.filename,
+            dbd.parameterNames.index(dbd.timeVariable), vi, 0, 1, 15)
+    expected = _pyreader.get(*args, t_min=-1e30) # reads all cycles
+    def walk_all_cycles(*p):
+        raise AssertionError("all cycles were walked")
+    monkeypatch.setattr(_pyreader, "_walk_cycles", walk_all_cycles)
+    error_no, r = _pyreader.get(*args)
+    assert error_no == 0 and len(r[0]) == 15
+    for a, b in zip(r, expected[1]):
+        assert np.array_equal(a, b)
+
+
+def test_python_reader_bounds_walk_for_sensor_never_set(monkeypatch):
+    # A sensor that is never set should not make the pure python reader
+    # walk the whole file cycle by cycle for max_values_to_read.
+    import dbdreader._dbdreader as _pyreader
+    fn = "dbdreader/data/sebastian-2014-204-05-001.ebd"
+    dbd = dbdreader.DBD(fn)
+    vi = tuple(sorted(dbd.parameterNames.index(p)
+                      for p in ["sci_water_temp", "sci_badd_error"]))
+    args = (dbd.n_state_bytes, dbd.headerInfo["sensors_per_cycle"],
+            dbd.fp_binary_start, dbd.byteSizes, dbd.filename,
+            dbd.parameterNames.index(dbd.timeVariable), vi, 0, 1, 15)
+    expected = _pyreader.get(*args, t_min=-1e30) # reads all cycles
+    walked = []
+    walk_cycles_serially = _pyreader._walk_cycles_serially
+    def walk(*p):
+        walked.append(walk_cycles_serially(*p))
+        return walked[-1]
+    monkeypatch.setattr(_pyreader, "_walk_cycles_serially", walk)
+    monkeypatch.setattr(_pyreader, "_SERIAL_WALK_LIMIT", 50)
+    error_no, r = _pyreader.get(*args)
+    assert len(walked[0]) == 50 # then all cycles are found by _walk_cycles
+    assert error_no == 0 and sorted(len(t) for t in r[:2]) == [0, 15]
+    for a, b in zip(r, expected[1]):
+        assert np.array_equal(a, b)
+
+
+def test_python_reader_decodes_time_window_only(monkeypatch):
+    # With a cycle index, the pure python reader should decode only the
+    # cycles of the time window (and a few before it), and return the
+    # same values as when decoding all cycles.
+    import dbdreader._dbdreader as _pyreader
+    fn = "dbdreader/data/sebastian-2014-204-05-000.ebd"
+    dbd = dbdreader.DBD(fn)
+    offsets, times = dbd.get_cycle_index()
+    vi = (dbd.parameterNames.index("sci_water_temp"),)
+    args = (dbd.n_state_bytes, dbd.headerInfo["sensors_per_cycle"],
+            dbd.fp_binary_start, dbd.byteSizes, dbd.filename,
+            dbd.parameterNames.index(dbd.timeVariable), vi, 0, 1, -1)
+    t_min = np.nanquantile(times, 0.9)
+    expected = _pyreader.get(*args, t_min=t_min)
+    decoded = []
+    chunk_offsets = _pyreader._chunk_offsets
+    def record(data_u8, sp_arr, *p):
+        decoded.append(len(sp_arr))
+        return chunk_offsets(data_u8, sp_arr, *p)
+    monkeypatch.setattr(_pyreader, "_chunk_offsets", record)
+    error_no, r = _pyreader.get(*args, cycle_offsets=offsets,
+                                cycle_times=times, t_min=t_min)
+    assert error_no == 0 and sum(decoded) < 0.2 * len(offsets)
+    for a, b in zip(r, expected[1]):
+        assert np.array_equal(a, b)
+
+
+def test_get_using_cycle_index():
+    # Reading via the cycle index should give the same data as
+    # walking through the cycles.
+    for fn in ["dbdreader/data/amadeus-2014-204-05-000.dbd",
+               "dbdreader/data/01600000.dcd"]:
+        dbd = dbdreader.DBD(fn)
+        parameters = dbd.parameterNames[:20]
+        expected = dbd.get(*parameters, return_nans=True)
+        offsets, times = dbd.get_cycle_index()
+        assert offsets.dtype == np.int64 and np.all(np.diff(offsets) > 0)
+        assert len(times) == len(offsets)
+        for (t0, v0), (t1, v1) in zip(expected, dbd.get(*parameters, return_nans=True)):
+            assert np.array_equal(t0, t1, equal_nan=True)
+            assert np.array_equal(v0, v1, equal_nan=True)
+
+
+def test_get_truncated_compressed_file(tmp_path):
+    # A compressed file that ends halfway a block cannot be read, also
+    # not when it is decompressed while it is read.
+    fn = tmp_path / "01600000.dcd"
+    with open("dbdreader/data/01600000.dcd", "rb") as fp:
+        fn.write_bytes(fp.read()[:40000])
+    dbd = dbdreader.DBD(str(fn))
+    with pytest.raises(dbdreader.DbdError) as e:
+        dbd.get("m_depth")
+    assert e.value.value == dbdreader.DBD_ERROR_READ_ERROR
+    with pytest.raises(dbdreader.DbdError):
+        dbd.get("m_depth", max_values_to_read=10)
+
+
+def test_get_time_window():
+    # Limiting the time window should give the same data as filtering
+    # afterwards, with or without cycle index.
+    fn = "dbdreader/data/amadeus-2014-204-05-000.dbd"
+    dbd = dbdreader.DBD(fn)
+    t, v = dbd.get("m_depth")
+    t_min, t_max = t[len(t) // 3], t[2 * len(t) // 3]
+    condition = (t >= t_min) & (t <= t_max)
+    for use_index in (False, True):
+        dbd = dbdreader.DBD(fn)
+        if use_index:
+            dbd.get_cycle_index()
+        tw, vw = dbd.get("m_depth", t_min=t_min, t_max=t_max)
+        assert np.array_equal(tw, t[condition]) and np.array_equal(vw, v[condition])
+
+
+def test_get_shared_time():
+    # One time vector and a column per parameter; a parameter not in
+    # the file gives a column of nans.
+    dbd = dbdreader.DBD("dbdreader/data/amadeus-2014-204-05-000.sbd")
+    parameters = ["m_lat", "m_depth", "sci_water_pressure"]
+    t, values = dbd.get(*parameters, shared_time=True)
+    assert values.shape == (len(t), len(parameters))
+    for k, p in enumerate(parameters[:2]):
+        tk, vk = dbd.get(p, return_nans=True)
+        assert np.array_equal(t, tk) and np.array_equal(values[:, k], vk, equal_nan=True)
+    assert np.all(np.isnan(values[:, 2]))
+
+
+def test_get_all():
+    dbd = dbdreader.DBD("dbdreader/data/amadeus-2014-204-05-000.sbd")
+    r = dbd.get_all()
+    assert list(r.keys()) == dbd.parameterNames
+    t, v = dbd.get("m_depth", return_nans=True)
+    assert np.array_equal(r[dbd.timeVariable], t)
+    assert np.array_equal(r["m_depth"], v, equal_nan=True)
+
+
+def test_get_into():
+    dbds = [
+        dbdreader.DBD(f"dbdreader/data/amadeus-2014-204-05-00{i}.sbd") for i in range(3)
+    ]
+    parameters = ("m_depth", "m_lat")
+    counts = np.array([dbd.count_values(*parameters) for dbd in dbds])
+    offsets = np.vstack([np.zeros(len(parameters), int), np.cumsum(counts, axis=0)])
+    out = [(np.empty(n), np.empty(n)) for n in offsets[-1]]
+    for i, dbd in enumerate(dbds):
+        n = dbd.get_into(
+            *parameters,
+            out=[(t[a:b], v[a:b]) for (t, v), a, b in zip(out, offsets[i], offsets[i + 1])],
+        )
+        assert n == list(counts[i])
+    for k, p in enumerate(parameters):
+        t, v = np.hstack([dbd.get(p, discardBadLatLon=False) for dbd in dbds])
+        assert np.array_equal(out[k][0], t)
+        assert np.array_equal(out[k][1], v)
+
+
+def test_cycle_index_stored_in_cache_dir(tmp_path):
+    fn = "dbdreader/data/amadeus-2014-204-05-000.sbd"
+    cacheID = dbdreader.DBD(fn).cacheID
+    with open(f"dbdreader/data/cac/{cacheID}.cac", "rb") as fp_in:
+        (tmp_path / f"{cacheID}.cac").write_bytes(fp_in.read())
+    dbd = dbdreader.DBD(fn, cacheDir=str(tmp_path), cycle_index=True)
+    t0, v0 = dbd.get("m_depth")
+    assert len(list(tmp_path.glob("*.cix"))) == 1
+    # a new object should pick up the stored index.
+    dbd = dbdreader.DBD(fn, cacheDir=str(tmp_path), cycle_index=True)
+    assert dbd._load_cycle_index() is not None
+    t1, v1 = dbd.get("m_depth")
+    assert np.array_equal(t0, t1) and np.array_equal(v0, v1)
+
+
+def test_corrupt_cycle_index_is_ignored(tmp_path):
+    # A cycle index that does not fit the file should not be trusted.
+    fn = "dbdreader/data/amadeus-2014-204-05-000.ebd"
+    cacheID = dbdreader.DBD(fn).cacheID
+    with open(f"dbdreader/data/cac/{cacheID}.cac", "rb") as fp_in:
+        (tmp_path / f"{cacheID}.cac").write_bytes(fp_in.read())
+    dbd = dbdreader.DBD(fn, cacheDir=str(tmp_path), cycle_index=True)
+    t = dbd.get("sci_water_temp")[0]
+    t_min = t[len(t) // 2]
+    expected = dbdreader.DBD(fn).get("sci_water_temp", t_min=t_min)
+    (cix,) = tmp_path.glob("*.cix")
+    with np.load(cix) as index:
+        offsets, times, signature = index["offsets"], index["times"], index["signature"]
+    for corrupt in [offsets + 3, offsets * 1000, np.full_like(offsets, -1e9)]:
+        with open(cix, "wb") as fp:
+            np.savez(fp, offsets=corrupt, times=times, signature=signature)
+        dbd = dbdreader.DBD(fn, cacheDir=str(tmp_path), cycle_index=True)
+        result = dbd.get("sci_water_temp", t_min=t_min)
+        assert np.array_equal(result[0], expected[0])
+        assert np.array_equal(result[1], expected[1])
+
+
 @pytest.fixture
 def multiSBDData(scope='class'):
     pattern = "dbdreader/data/amadeus-2014-*.[st]bd"
@@ -451,6 +808,37 @@ class TestMultiDBD():
             dbd = dbdreader.MultiDBD(pattern)
             dbd.get("m_depth", "m_pitch", max_values_to_read=10)
 
+    def test_get_using_threads(self):
+        # Reading the files concurrently should give the same result,
+        # in the same order, as reading them one by one.
+        pattern = "dbdreader/data/amadeus-2014-*.[st]bd"
+        parameters = ["m_depth", "sci_water_temp", "m_lat"]
+        serial = dbdreader.MultiDBD(pattern).get(*parameters)
+        threaded = dbdreader.MultiDBD(pattern, n_threads=4).get(*parameters)
+        for (t0, v0), (t1, v1) in zip(serial, threaded):
+            assert np.array_equal(t0, t1) and np.array_equal(v0, v1)
+
+    def test_get_shared_time(self):
+        pattern = "dbdreader/data/amadeus-2014-*.[st]bd"
+        parameters = ["m_depth", "m_pitch", "m_lat"]
+        mdbd = dbdreader.MultiDBD(pattern)
+        (t, values), src = mdbd.get(*parameters, shared_time=True, include_source=True)
+        assert values.shape == (len(t), len(parameters)) and len(src) == len(t)
+        for k, (tk, vk) in enumerate(mdbd.get(*parameters, return_nans=True)):
+            assert np.array_equal(t, tk)
+            assert np.array_equal(values[:, k], vk, equal_nan=True)
+        with pytest.raises(ValueError):
+            mdbd.get("m_depth", "sci_water_temp", shared_time=True)
+
+    def test_get_all(self):
+        mdbd = dbdreader.MultiDBD("dbdreader/data/amadeus-2014-*.[st]bd")
+        r = mdbd.get_all(include_source=True)
+        assert set(r.keys()) == {"eng", "sci"}
+        t, v = mdbd.get("sci_water_temp", return_nans=True)
+        assert np.array_equal(r["sci"]["sci_m_present_time"], t)
+        assert np.array_equal(r["sci"]["sci_water_temp"], v, equal_nan=True)
+        assert len(r["sci"]["source"]) == len(t)
+
     def test_get_missing_parameter_in_some_files(self):
         # Test whether we can read multiple files and extract a
         # parameter that is not available in all of them.
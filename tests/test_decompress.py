@@ -1,4 +1,5 @@
 import os
+import shutil
 from hashlib import md5
 
 if not __name__ == '__main__':
@@ -45,6 +46,35 @@ def test_read_file_in_memory(load_verification_data):
         data = d.decompress()
     assert data.decode('ascii') == verification_data
 
+# Decompress a whole file into a buffer, which is grown if it is too
+# small to hold the file.
+#
+def test_read_file_into_buffer(load_verification_data):
+    verification_data = load_verification_data
+    filename = 'dbdreader/data/01600000.mcg'
+    for buffer in [bytearray(), bytearray(100)]:
+        with Decompressor(filename) as d:
+            data = d.decompress_into(buffer)
+        assert isinstance(data, memoryview)
+        assert bytes(data).decode('ascii') == verification_data
+        assert data.obj is buffer and len(buffer) >= len(data)
+
+# Decompress a whole file by several threads, which should give the
+# same data as decompressing block by block.
+#
+def test_read_file_in_parallel(monkeypatch):
+    filename = 'dbdreader/data/01600001.dcd'
+    with Decompressor(filename) as d:
+        blocks = [block for block in d.decompressed_blocks()]
+    monkeypatch.setattr(Decompressor, 'BLOCKS_PER_THREAD', 1)
+    monkeypatch.setattr(os, 'cpu_count', lambda: 4)
+    with Decompressor(filename) as d:
+        data = d.decompress()
+    assert data == b''.join(blocks)
+    with open(filename, 'rb') as fp:
+        index = Decompressor().block_index(fp.read())
+    assert len(index) == len(blocks)
+
 # Open a file and decompress first block only.
 #
 #
@@ -96,6 +126,51 @@ def test_convenience_function():
         pass
     assert md5(data_decompressed).hexdigest() == 'f6935ba8307efb29dcb16fb2429e167d'
 
+# Decompress several files at once, skipping those that are up to date.
+def test_decompress_files(tmp_path):
+    import shutil
+    filenames = []
+    for f in ['01600000.dcd', '01600001.dcd', '02380108.ecd']:
+        shutil.copy(os.path.join('dbdreader/data', f), tmp_path)
+        filenames.append(str(tmp_path / f))
+    results = decompress_files(filenames, n_workers=2)
+    assert results[:2] == [str(tmp_path / '01600000.dbd'), str(tmp_path / '01600001.dbd')]
+    assert isinstance(results[2], Exception)
+    with open(results[0], 'rb') as fp:
+        assert md5(fp.read()).hexdigest() == 'f6935ba8307efb29dcb16fb2429e167d'
+    mtime = os.path.getmtime(results[1])
+    with open(results[1], 'wb') as fp:
+        pass
+    os.utime(results[1], (mtime + 10, mtime + 10))
+    assert decompress_files(filenames[1:2]) == results[1:2]
+    assert os.path.getsize(results[1]) == 0 # up to date, so not decompressed
+    decompress_files(filenames[1:2], skip_if_up_to_date=False)
+    assert os.path.getsize(results[1]) > 0
+
+# Compress a file, which should give back the same data when it is
+# decompressed, and read as a compressed file.
+@pytest.mark.parametrize("high_compression", [False, True])
+def test_compress_file(tmp_path, monkeypatch, high_compression):
+    import shutil
+    filename = str(tmp_path / '01600001.dbd')
+    shutil.copy('dbdreader/data/01600001.dbd', filename)
+    monkeypatch.setattr(Compressor, 'BLOCKS_PER_THREAD', 1)
+    monkeypatch.setattr(os, 'cpu_count', lambda: 4)
+    compressed_filename = compress_file(filename, high_compression=high_compression)
+    assert compressed_filename == str(tmp_path / '01600001.dcd')
+    assert os.path.getsize(compressed_filename) < os.path.getsize(filename)
+    with open(filename, 'rb') as fp:
+        data = fp.read()
+    with Decompressor(compressed_filename) as d:
+        assert d.decompress() == data
+    compressed_dbd = dbdreader.DBD(compressed_filename, cacheDir='dbdreader/data/cac')
+    regular_dbd = dbdreader.DBD(filename, cacheDir='dbdreader/data/cac')
+    t, v = compressed_dbd.get("m_depth")
+    t0, v0 = regular_dbd.get("m_depth")
+    assert np.all(t == t0) and np.all(v == v0)
+    assert FileCompressor()._generate_filename_for_output('00aa00aa.cac') == '00aa00aa.ccc'
+    assert FileCompressor()._generate_filename_for_output('01600000.mlg') == '01600000.mcg'
+
 # Test whether all extensions are translated correctly.
 def test_extension_generator():
     fd = FileDecompressor()
@@ -167,6 +242,26 @@ def test_CompressedFileReadlines(load_verification_data):
     assert data.decode('ascii') == verification_data
 
 
+# Random access to a compressed file, which decompresses only the
+# blocks needed.
+def test_CompressedFileSeek():
+    filename = 'dbdreader/data/01600001.dcd'
+    with open('dbdreader/data/01600001.dbd', 'rb') as fp:
+        verification_data = fp.read()
+    with CompressedFile(filename) as fd:
+        header = fd.readline()
+        assert len(fd._blocks) == 1
+        assert header == verification_data[:len(header)]
+        position = len(verification_data) - 40000
+        assert fd.seek(position) == position
+        assert fd.read(100) == verification_data[position:position + 100]
+        assert fd.tell() == position + 100
+        fd.seek(10)
+        assert fd.read(50000) == verification_data[10:50010]
+        assert fd.seek(-5, 2) == len(verification_data) - 5
+        assert fd.read() == verification_data[-5:]
+        assert fd.read() == b''
+
 
 # Test reading of data/01600001.dcd and check it is identical to data/01600001.dbd
 def test_read_compressed_file_C_code():
@@ -260,6 +355,92 @@ def test_handle_failing_decompression_dbd():
         dbd = dbdreader.DBD('dbdreader/data/02450137.tcd', cacheDir='dbdreader/data/cac')
     assert e.value.value == dbdreader.DBD_ERROR_DECOMPRESSION_ERROR
 
+# Whether the C extension or the lz4 package decompresses the data, a
+# corrupt file raises a DecompressionError.
+def test_decompression_error():
+    filename = 'dbdreader/data/02450137.tcd'
+    with pytest.raises(DecompressionError):
+        with Decompressor(filename) as d:
+            d.decompress()
+    with pytest.raises(DecompressionError):
+        with Decompressor(filename) as d:
+            blocks = [block for block in d.decompressed_blocks()]
+    with pytest.raises(DecompressionError):
+        with CompressedFile(filename) as fd:
+            fd.read()
+
 
 
 
+
+
+# Test the cache of decompressed files
+def test_decompressed_file_cache(tmp_path):
+    cache = DecompressedFileCache
+    filename = 'dbdreader/data/01600001.dcd'
+    regular_data = dbdreader.DBD('dbdreader/data/01600001.dbd', cacheDir='dbdreader/data/cac').get("m_depth")
+    cache.set_cachedir(str(tmp_path))
+    try:
+        cached_filename = cache.lookup(filename)
+        with open(cached_filename, 'rb') as fp, open('dbdreader/data/01600001.dbd', 'rb') as fp_regular:
+            assert fp.read() == fp_regular.read()
+        # a second lookup is a cache hit.
+        assert cache.lookup(filename) == cached_filename
+        compressed_data = dbdreader.DBD(filename, cacheDir='dbdreader/data/cac').get("m_depth")
+        assert np.all(compressed_data[0]==regular_data[0]) and np.all(compressed_data[1]==regular_data[1])
+        assert len(os.listdir(tmp_path)) == 1
+    finally:
+        cache.set_cachedir(None)
+
+
+def test_decompressed_file_cache_evicts_least_recently_used(tmp_path):
+    cache = DecompressedFileCache
+    max_size = cache.MAX_SIZE
+    cache.set_cachedir(str(tmp_path), max_size=1)
+    other_file = tmp_path / 'not_in_the_cache.dbd'
+    other_file.write_bytes(b'data')
+    try:
+        first = cache.lookup('dbdreader/data/01600000.dcd')
+        second = cache.lookup('dbdreader/data/01600001.dcd')
+        # the cache is too small to hold both files.
+        assert not os.path.exists(first) and os.path.exists(second)
+        # files not written by the cache are never removed.
+        assert other_file.exists()
+    finally:
+        cache.set_cachedir(None, max_size=max_size)
+
+
+def test_decompressed_file_cache_entry_evicted_before_read(tmp_path, monkeypatch):
+    # A reader should decompress a file again if its copy in the cache
+    # is removed by another reader between lookup and read.
+    cache = DecompressedFileCache
+    lookup = cache.lookup
+    evicted = []
+    def lookup_and_evict(filename):
+        cached_filename = lookup(filename)
+        if cached_filename is not None and filename not in evicted:
+            evicted.append(filename)
+            os.unlink(cached_filename)
+        return cached_filename
+    monkeypatch.setattr(cache, 'lookup', lookup_and_evict)
+    regular = dbdreader.DBD('dbdreader/data/01600001.dbd', cacheDir='dbdreader/data/cac').get("m_depth")
+    pattern = 'dbdreader/data/01600*.dcd'
+    expected = dbdreader.MultiDBD(pattern=pattern, cacheDir='dbdreader/data/cac').get("m_depth")
+    cache.set_cachedir(str(tmp_path))
+    try:
+        t, v = dbdreader.DBD('dbdreader/data/01600001.dcd', cacheDir='dbdreader/data/cac').get("m_depth")
+        assert np.all(t == regular[0]) and np.all(v == regular[1])
+        evicted.clear()
+        dbd = dbdreader.MultiDBD(pattern=pattern, cacheDir='dbdreader/data/cac')
+        t, v = dbd.get("m_depth")
+        assert np.all(t == expected[0]) and np.all(v == expected[1])
+        assert len(evicted) == 2
+        evicted.clear()
+        filename = str(tmp_path / '01600001.dcd')
+        shutil.copy('dbdreader/data/01600001.dcd', filename)
+        output_filename = FileDecompressor().decompress(filename)
+        assert evicted == [filename]
+        with open(output_filename, 'rb') as fp, open('dbdreader/data/01600001.dbd', 'rb') as fp_regular:
+            assert fp.read() == fp_regular.read()
+    finally:
+        cache.set_cachedir(None)